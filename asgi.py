@@ -0,0 +1,201 @@
+import os
+import asyncio
+import logging
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+# The agent, checkpointer, prompt and chat helpers are shared with the Flask app
+import main
+import coalesce
+import fast_path
+import prefetch
+import telemetry
+import tenants
+from response_cache import response_cache
+from main import (
+    DEFAULT_SESSION_ID, STREAM_MODES, build_input_message, message_text, prefetch_for, read_user, shortcut, sse,
+    stream_events, thread_config,
+)
+
+# googleapiclient is blocking, so tool calls run on this many threads (the loop's default executor)
+TOOL_THREADS = int(os.getenv("CAL_TOOL_THREADS", "32"))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    executor = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="tool")
+    asyncio.get_running_loop().set_default_executor(executor)
+    logging.info(f"✅ ASGI mode: {TOOL_THREADS} tool threads")
+    # Start building the agent now, without holding up startup; /ready reports when it is done
+    main.warm_up()
+    yield
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _read_chat_request(request: Request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    data = data or {}
+    user_input = data.get('message')
+    if not user_input or not isinstance(user_input, str) or not user_input.strip():
+        return None, None, data
+    session_id = data.get("sessionId", DEFAULT_SESSION_ID)
+    return user_input, session_id, data
+
+
+async def _agent():
+    # The first build imports LangGraph and the Gemini client, so it runs off the loop
+    if main.agent_executor is not None:
+        return main.agent_executor
+    return await asyncio.to_thread(main.get_agent)
+
+
+# --- Health Check Endpoint ---
+async def health(request: Request):
+    prefetch_for(request.query_params)
+    return JSONResponse({"status": "ok"})
+
+
+# --- Readiness Endpoint ---
+async def ready(request: Request):
+    body, status = main.readiness()
+    return JSONResponse(body, status_code=status)
+
+
+# --- Stats Endpoint ---
+async def stats(request: Request):
+    return JSONResponse({
+        "fast_path": fast_path.stats.snapshot(),
+        "response_cache": response_cache.snapshot(),
+        "sessions": telemetry.session_usage.snapshot(),
+        "coalescing": coalesce.snapshot(),
+        "prefetch": prefetch.snapshot(),
+    })
+
+
+# --- Metrics Endpoint ---
+async def metrics(request: Request):
+    body, content_type = telemetry.metrics_response()
+    return Response(body, media_type=content_type)
+
+
+# --- Chat Endpoint ---
+async def chat(request: Request):
+    try:
+        user_input, session_id, data = await _read_chat_request(request)
+        if user_input is None:
+            logging.warning("No message provided in chat endpoint request.")
+            return JSONResponse({"error": "No message provided"}, status_code=400)
+
+        user_id, error = read_user(data)
+        if error:
+            return JSONResponse({"error": error}, status_code=403)
+
+        config = thread_config(session_id, user_id)
+        # Reads the checkpointer (and opens it on first use), so off the loop
+        input_message = await asyncio.to_thread(build_input_message, user_input, config, user_id)
+        agent = await _agent()
+
+        logging.info(f"Received message: '{user_input}' | Session: {session_id}")
+
+        # to_thread and the agent's tool executors copy the context, so they act for the user too
+        with tenants.acting_as(user_id), telemetry.turn(session_id) as trace:
+            # Common and repeated read-only questions are answered without the LLM (the tools block, so off the loop)
+            hit = await asyncio.to_thread(shortcut, user_input, input_message)
+            if hit is not None:
+                agent_response, update = hit
+                await agent.aupdate_state(config, update, as_node="agent")
+                return JSONResponse({"response": agent_response, "sessionId": session_id})
+
+            pending = await asyncio.to_thread(response_cache.prepare, user_input)
+            final_state = await agent.ainvoke(input_message, {**config, "callbacks": [trace.callback]})
+            response_cache.store(pending, final_state["messages"])
+            agent_response = message_text(final_state["messages"][-1])
+
+        logging.info(f"Agent response: {agent_response}")
+
+        return JSONResponse({"response": agent_response, "sessionId": session_id})
+
+    except Exception as e:
+        logging.error(f"An error occurred: {e}", exc_info=True)
+        return JSONResponse({"error": "An internal server error occurred."}, status_code=500)
+
+
+# --- Streaming Chat Endpoint ---
+async def chat_stream(request: Request):
+    user_input, session_id, data = await _read_chat_request(request)
+    if user_input is None:
+        logging.warning("No message provided in chat stream endpoint request.")
+        return JSONResponse({"error": "No message provided"}, status_code=400)
+
+    user_id, error = read_user(data)
+    if error:
+        return JSONResponse({"error": error}, status_code=403)
+
+    config = thread_config(session_id, user_id)
+    input_message = await asyncio.to_thread(build_input_message, user_input, config, user_id)
+
+    logging.info(f"Received streaming message: '{user_input}' | Session: {session_id}")
+
+    async def generate():
+        try:
+            agent = await _agent()
+            with tenants.acting_as(user_id), telemetry.turn(session_id) as trace:
+                hit = await asyncio.to_thread(shortcut, user_input, input_message)
+                if hit is not None:
+                    agent_response, update = hit
+                    await agent.aupdate_state(config, update, as_node="agent")
+                    yield sse("token", {"text": agent_response})
+                    yield sse("done", {"response": agent_response, "sessionId": session_id})
+                    return
+
+                pending = await asyncio.to_thread(response_cache.prepare, user_input)
+                run_config = {**config, "callbacks": [trace.callback]}
+                async for mode, chunk in agent.astream(input_message, run_config, stream_mode=STREAM_MODES):
+                    for event in stream_events(mode, chunk):
+                        yield event
+
+                state = await agent.aget_state(config)
+                response_cache.store(pending, state.values["messages"])
+                agent_response = message_text(state.values["messages"][-1])
+            logging.info(f"Agent response: {agent_response}")
+            yield sse("done", {"response": agent_response, "sessionId": session_id})
+
+        except Exception as e:
+            logging.error(f"An error occurred while streaming: {e}", exc_info=True)
+            yield sse("error", {"error": "An internal server error occurred."})
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health, methods=['GET']),
+        Route('/ready', ready, methods=['GET']),
+        Route('/stats', stats, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+        Route('/chat', chat, methods=['POST']),
+        Route('/chat/stream', chat_stream, methods=['POST']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan,
+)
+
+# --- Main App Runner ---
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, port=5000)
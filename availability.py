@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from intervals import IST, WORKING_HOURS
+
+MINUTES_PER_DAY = 24 * 60
+# Candidate blocks start on multiples of this many minutes (IST clock)
+SLOT_GRANULARITY = 15
+# Free time on both sides of a block improves its rank up to this many minutes
+BUFFER_CAP = 30
+
+
+def working_mask(working_hours: list = WORKING_HOURS) -> np.ndarray:
+    """
+    Returns a (1440,) boolean mask of the minutes of a day inside the (time, time) IST blocks.
+    """
+    mask = np.zeros(MINUTES_PER_DAY, dtype=bool)
+    for block_start, block_end in working_hours:
+        mask[block_start.hour * 60 + block_start.minute:block_end.hour * 60 + block_end.minute] = True
+    return mask
+
+
+class AvailabilityGrid:
+    """
+    Minute-resolution availability over whole IST days.
+
+    The window [start, end) is laid out as a (days, 1440) boolean grid, one row
+    per IST calendar day. Busy intervals (from any number of calendars) are
+    rasterized in one pass with a difference array and a cumulative sum, the
+    working-hours mask is broadcast over every day, and free runs are found with
+    a vectorized run-length scan over the flattened grid, so months of events
+    cost milliseconds. IST has no DST, so every row is exactly 1440 minutes.
+
+    Args:
+        start (datetime): Aware window start.
+        end (datetime): Aware window end.
+        working_hours (list, optional): (time, time) IST blocks to search in; None searches whole days.
+    """
+
+    def __init__(self, start: datetime, end: datetime, working_hours: list = WORKING_HOURS):
+        first_day = start.astimezone(IST).date()
+        self.origin = IST.localize(datetime.combine(first_day, datetime.min.time()))
+        self.days = (end.astimezone(IST).date() - first_day).days + 1
+        size = self.days * MINUTES_PER_DAY
+
+        self.free = np.ones((self.days, MINUTES_PER_DAY), dtype=bool)
+        if working_hours:
+            self.free &= working_mask(working_hours)
+        flat = self.free.reshape(-1)
+        # Minutes of the first and last day outside the window
+        flat[:max(0, min(size, self._minute_floor(start)))] = False
+        flat[max(0, min(size, self._minute_ceil(end))):] = False
+
+    def _minute_floor(self, moment: datetime) -> int:
+        return int((moment - self.origin).total_seconds() // 60)
+
+    def _minute_ceil(self, moment: datetime) -> int:
+        return -int(-(moment - self.origin).total_seconds() // 60)
+
+    def mark_busy(self, busy: list):
+        """
+        Clears the minutes covered by (start, end) busy intervals; a partly covered minute counts as busy.
+        """
+        if not busy:
+            return
+        size = self.days * MINUTES_PER_DAY
+        # Subtracting from a UTC origin is several times cheaper than datetime.timestamp()
+        origin = self.origin.astimezone(timezone.utc)
+        seconds = np.fromiter(
+            ((moment - origin).total_seconds() for pair in busy for moment in pair),
+            dtype=np.float64, count=2 * len(busy),
+        ).reshape(-1, 2)
+        starts = np.clip(np.floor(seconds[:, 0] / 60), 0, size).astype(np.int64)
+        ends = np.clip(np.ceil(seconds[:, 1] / 60), 0, size).astype(np.int64)
+
+        # +1 where a busy interval starts, -1 where it ends; a positive running sum is busy
+        diff = np.bincount(starts, minlength=size + 1) - np.bincount(ends, minlength=size + 1)
+        self.free.reshape(-1)[np.cumsum(diff[:-1]) > 0] = False
+
+    def free_runs(self):
+        """
+        Returns (starts, ends) minute offsets of every maximal free run, in order.
+        Runs continue across midnight when both sides are free.
+        """
+        padded = np.concatenate(([False], self.free.reshape(-1), [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+        return edges[0::2], edges[1::2]
+
+    def candidates(self, duration: int, count: int = 3, one_per_day: bool = True,
+                   granularity: int = SLOT_GRANULARITY) -> list:
+        """
+        Ranks free blocks of exactly `duration` minutes.
+
+        Every start on the granularity grid where the block fits inside a free
+        run is a candidate, so a block can sit in the middle of a longer run
+        with slack on both sides. Blocks are ranked by the free time around
+        them (more is better, up to BUFFER_CAP minutes on the tighter side),
+        then by start. Picked blocks never overlap or touch, so two of them are
+        never one long block.
+
+        Args:
+            duration (int): Block length in minutes.
+            count (int, optional): Blocks to return.
+            one_per_day (bool, optional): At most one block per IST day, to spread them out.
+            granularity (int, optional): Blocks start on multiples of this many minutes.
+
+        Returns:
+            list: (start, end, buffer minutes) tuples with aware IST datetimes, best first.
+
+        Raises:
+            ValueError: count or duration is not positive.
+        """
+        if count <= 0 or duration <= 0:
+            raise ValueError("count and duration must be positive")
+        run_starts, run_ends = self.free_runs()
+        aligned = -(-run_starts // granularity) * granularity
+        per_run = np.maximum((run_ends - duration - aligned) // granularity + 1, 0)
+        total = int(per_run.sum())
+        if total == 0:
+            return []
+
+        run = np.repeat(np.arange(len(per_run)), per_run)
+        nth = np.arange(total) - np.repeat(np.cumsum(per_run) - per_run, per_run)
+        starts = aligned[run] + nth * granularity
+        buffers = np.minimum(
+            np.minimum(starts - run_starts[run], run_ends[run] - (starts + duration)), BUFFER_CAP
+        )
+        # Stable: equal buffers stay in start order
+        order = np.argsort(-buffers, kind="stable")
+
+        picked, days = [], set()
+        for i in order:
+            day = int(starts[i]) // MINUTES_PER_DAY
+            if one_per_day and day in days:
+                continue
+            if any(starts[i] <= starts[j] + duration and starts[j] <= starts[i] + duration for j in picked):
+                continue
+            days.add(day)
+            picked.append(i)
+            if len(picked) == count:
+                break
+        return [
+            (
+                (self.origin + timedelta(minutes=int(starts[i]))).astimezone(IST),
+                (self.origin + timedelta(minutes=int(starts[i]) + duration)).astimezone(IST),
+                int(buffers[i]),
+            )
+            for i in picked
+        ]
+
+
+def find_blocks(busy: list, start: datetime, end: datetime, duration: timedelta, count: int = 3,
+                working_hours: list = WORKING_HOURS, one_per_day: bool = True) -> list:
+    """
+    Finds the best `count` free blocks of `duration` in [start, end) around the busy intervals.
+
+    Args:
+        busy (list): (start, end) aware datetime pairs of busy time, from any number of calendars, in any order.
+        start (datetime): Window start.
+        end (datetime): Window end.
+        duration (timedelta): Block length (whole minutes).
+        count (int, optional): Blocks to return.
+        working_hours (list, optional): (time, time) IST blocks to search in; None searches whole days.
+        one_per_day (bool, optional): At most one block per day.
+
+    Returns:
+        list: (start, end, buffer minutes) tuples, best first. See AvailabilityGrid.candidates().
+    """
+    grid = AvailabilityGrid(start, end, working_hours)
+    grid.mark_busy(busy)
+    return grid.candidates(int(duration.total_seconds() // 60), count, one_per_day)
@@ -0,0 +1,68 @@
+"""
+Free-block search over long windows: the interval sweep (intervals.free_slots) vs the minute-bitmap AvailabilityGrid.
+
+Busy time comes from several synthetic calendars; both searches see the same data.
+
+    python benchmarks/bench_availability.py --days 7 30 90 --calendars 3 --events-per-day 6
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability import find_blocks
+from intervals import WORKING_HOURS, free_slots
+
+# Event times as the mirror parses them: fixed-offset datetimes
+IST_OFFSET = timezone(timedelta(hours=5, minutes=30))
+
+
+def synthetic_busy(days, calendars, per_day, seed=5):
+    rng = random.Random(seed)
+    start = datetime(2030, 1, 1, tzinfo=IST_OFFSET)
+    busy = []
+    for _ in range(days * calendars * per_day):
+        s = start + timedelta(minutes=15 * rng.randint(0, days * 96 - 1))
+        busy.append((s, s + timedelta(minutes=rng.choice([30, 45, 60, 90]))))
+    return start, start + timedelta(days=days), busy
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def sweep_blocks(busy, start, end, duration):
+    # What the agent had before: every gap at least `duration` long, still to be split and ranked
+    return free_slots(sorted(busy), start, end, duration, WORKING_HOURS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 90])
+    parser.add_argument("--calendars", type=int, default=3)
+    parser.add_argument("--events-per-day", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    duration = timedelta(hours=2)
+    print(f"{'days':>5}  {'intervals':>9}  {'sweep p50':>10}  {'bitmap p50':>11}  {'blocks':>6}")
+    for days in args.days:
+        start, end, busy = synthetic_busy(days, args.calendars, args.events_per_day)
+        sweep_ms = timed(lambda: sweep_blocks(busy, start, end, duration), args.repeat)
+        bitmap_ms = timed(lambda: find_blocks(busy, start, end, duration, count=3), args.repeat)
+        found = len(find_blocks(busy, start, end, duration, count=3))
+        print(f"{days:>5}  {len(busy):>9}  {sweep_ms:>8.2f}ms  {bitmap_ms:>9.2f}ms  {found:>6}")
+
+
+if __name__ == "__main__":
+    main()
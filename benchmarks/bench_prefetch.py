@@ -0,0 +1,90 @@
+"""
+First-turn latency of a new session with and without prefetching (prefetch.py).
+
+Each trial starts from empty mirrors and read caches and sends one agent turn
+(scripted model calling get_events) in a new session, against the fake APIs:
+
+    cold      prefetching off: the tool call loads the week itself
+    session   the prefetch the new session starts overlaps the first model call
+    health    calendar-chat.html's /health?prefetch=1 check, then --think seconds before the message
+
+It reports the mean turn time and the Google HTTP requests made during the turn.
+
+    python benchmarks/bench_prefetch.py --api-latency 0.1 --llm-latency 0.3
+    python benchmarks/bench_prefetch.py --no-mirror
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.suite import setup
+
+MESSAGE = "What's on my calendar this week?"
+
+
+def reset():
+    import event_store
+    import task_store
+    import prefetch
+    import tools
+
+    event_store._stores.clear()
+    task_store._stores.clear()
+    tools._event_reads.invalidate()
+    tools._task_reads.invalidate()
+    prefetch._started.clear()
+
+
+def trial(client, server, mode, session_id, think):
+    import prefetch
+
+    reset()
+    prefetch.USE_PREFETCH = mode != "cold"
+    if mode == "health":
+        client.get("/health?prefetch=1")
+        time.sleep(think)
+    server.state.reset_counters()
+    started = time.perf_counter()
+    response = client.post("/chat", json={"message": MESSAGE, "sessionId": session_id})
+    seconds = time.perf_counter() - started
+    assert response.status_code == 200, response.data
+    # The session's own prefetch may still be loading tasks, so let it finish before the next trial
+    time.sleep(think)
+    return seconds, server.state.requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--api-latency", type=float, default=0.1, help="Seconds per fake Google HTTP request")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds per scripted model call")
+    parser.add_argument("--think", type=float, default=1.0, help="Seconds between page load and the first message")
+    parser.add_argument("--no-mirror", action="store_true", help="Serve reads from the API (CAL_EVENT_MIRROR=0)")
+    args = parser.parse_args()
+    args.shortcuts = False
+
+    server = setup(args)
+    import main as app_main
+
+    client = app_main.app.test_client()
+    results = {}
+    try:
+        for mode in ("cold", "session", "health"):
+            runs = [trial(client, server, mode, f"{mode}-{i}", args.think) for i in range(args.runs)]
+            results[mode] = {
+                "turn_ms": round(statistics.mean(seconds for seconds, _ in runs) * 1000, 1),
+                "http_requests_in_turn": statistics.mean(requests for _, requests in runs),
+            }
+    finally:
+        server.stop()
+    print(json.dumps({"mirror": not args.no_mirror, "api_latency": args.api_latency,
+                      "llm_latency": args.llm_latency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Bulk writes against a quota-limited fake Calendar API, with and without the client-side rate limiter.
+
+The fake answers 403 rateLimitExceeded once more than --quota calls per second
+arrive on average over a --window second allowance (batch parts count one
+each), like Google's per-minute user quota. For each mode it reports failed
+items, 403s the server sent, wall time and achieved calls per second.
+
+    python benchmarks/bench_rate_limit.py --events 600 --quota 20 --window 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_google import FakeGoogleServer
+from benchmarks.suite import write_fake_token
+
+
+def event(i):
+    day, slot = divmod(i, 20)
+    return {
+        "summary": f"[WORK] Bulk {i}",
+        "start_datetime_str": f"2030-02-{day % 28 + 1:02d} {6 + slot // 2:02d}:{30 * (slot % 2):02d}:00",
+        "end_datetime_str": f"2030-02-{day % 28 + 1:02d} {6 + slot // 2:02d}:{30 * (slot % 2) + 29:02d}:00",
+    }
+
+
+def run(server, tools, mode, events, threads):
+    server.state.reset_counters()
+    started = time.perf_counter()
+    if mode == "batch":
+        results = tools.create_multiple_events.invoke({"events": events})
+    else:
+        # Concurrent single inserts, like many sessions creating events at once
+        with ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(lambda e: _insert(tools, e), events))
+    seconds = time.perf_counter() - started
+    failed = sum(1 for result in results if "error" in result)
+    return {
+        "failed": failed,
+        "quota_errors": server.state.quota_errors,
+        "seconds": round(seconds, 2),
+        "calls_per_s": round((len(events) - failed) / seconds, 1),
+    }
+
+
+def _insert(tools, event):
+    try:
+        return tools.create_event_non_tool(event["summary"], event["start_datetime_str"], event["end_datetime_str"])
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=600)
+    parser.add_argument("--quota", type=float, default=20, help="Fake API calls per second")
+    parser.add_argument("--window", type=float, default=5, help="Seconds of quota the fake lets through at once")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent single inserts")
+    args = parser.parse_args()
+
+    server = FakeGoogleServer(quota=args.quota, quota_window=args.window).start()
+    workdir = tempfile.mkdtemp(prefix="cal-rate-")
+    os.environ.update(
+        GOOGLE_API_ROOT=server.root_url,
+        GOOGLE_API=os.getenv("GOOGLE_API", "bench"),
+        GOOGLE_TOKEN_PATH=os.path.join(workdir, "token.json"),
+        GOOGLE_CREDS_PATH=os.path.join(workdir, "creds.json"),
+        CAL_EVENT_MIRROR="0",
+        # The limiter should find the quota on its own, starting above it
+        CAL_CALENDAR_QPS=os.getenv("CAL_CALENDAR_QPS", str(args.quota * 2)),
+        CAL_RATE_BURST=os.getenv("CAL_RATE_BURST", str(args.quota * args.window)),
+    )
+    write_fake_token(os.environ["GOOGLE_TOKEN_PATH"])
+    import tools
+    import rate_limit
+
+    events = [event(i) for i in range(args.events)]
+    results = {}
+    try:
+        for limited in (False, True):
+            rate_limit.USE_RATE_LIMIT = limited
+            for mode in ("batch", "concurrent"):
+                rate_limit._buckets.clear()
+                time.sleep(args.window)  # let the fake quota refill
+                results[f"{mode}_{'limited' if limited else 'unlimited'}"] = run(server, tools, mode, events, args.threads)
+    finally:
+        server.stop()
+    print(json.dumps({"events": args.events, "quota_per_s": args.quota, "window_s": args.window, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
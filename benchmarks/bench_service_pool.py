@@ -0,0 +1,70 @@
+"""
+Per-call overhead of building a Calendar client on every tool call vs the pooled client.
+
+Runs against the local fake API server, so no Google credentials are needed:
+
+    python benchmarks/bench_service_pool.py --calls 200
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_google import FakeGoogleServer
+
+CALENDAR_ID = "bench@group.calendar.google.com"
+
+
+def run(label, calls, list_events, server):
+    server.state.reset_counters()
+    timings = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        list_events()
+        timings.append((time.perf_counter() - started) * 1000)
+    print(
+        f"{label:<22} mean {statistics.mean(timings):7.2f} ms   "
+        f"p50 {statistics.median(timings):7.2f} ms   "
+        f"tcp connections {server.state.connections}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with FakeGoogleServer() as server:
+        os.environ["GOOGLE_API_ROOT"] = server.root_url
+        for i in range(20):
+            server.state.add_event(CALENDAR_ID, {
+                "summary": f"[STUDY] Block {i}",
+                "start": {"dateTime": f"2025-08-05T{i % 24:02d}:00:00+05:30"},
+                "end": {"dateTime": f"2025-08-05T{i % 24:02d}:30:00+05:30"},
+            })
+
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build
+        from google_clients import calendar_service
+
+        creds = Credentials(token="fake-token")
+
+        def build_per_call():
+            service = build(
+                "calendar", "v3", credentials=creds,
+                client_options={"api_endpoint": f"{server.root_url}calendar/v3/"},
+            )
+            service.events().list(calendarId=CALENDAR_ID).execute()
+
+        def pooled():
+            calendar_service(creds).events().list(calendarId=CALENDAR_ID).execute()
+
+        run("build() per call", args.calls, build_per_call, server)
+        run("pooled service", args.calls, pooled, server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Fuzzy title search: the old per-call lowercase + partial_ratio loop vs TitleIndex.
+
+    python benchmarks/bench_title_index.py --sizes 10000 50000 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rapidfuzz import fuzz
+
+from title_index import TitleIndex
+
+CATEGORIES = ["STUDY", "WORK", "PERSONAL", "INTERVIEW"]
+WORDS = (
+    "algorithms physics chemistry revision team sync standup interview mock gym run doctor dentist "
+    "dinner lunch review project sprint planning retro call mom dad groceries reading chapter lab "
+    "assignment deadline thesis meeting client demo launch yoga swim flight trip exam quiz"
+).split()
+QUERIES = ["team sync", "physics revision", "mock interview", "dentist", "sprint retro", "grocries"]
+
+
+def synthetic_titles(count, seed=7):
+    rng = random.Random(seed)
+    return [f"[{rng.choice(CATEGORIES)}] {' '.join(rng.sample(WORDS, rng.randint(2, 5)))}" for _ in range(count)]
+
+
+def loop_search(titles, name, threshold=65, top_k=5):
+    # What get_event_by_name_and_timefarame / get_tasks_by_name did before the index
+    matches = []
+    for title in titles:
+        score = fuzz.partial_ratio(name.lower(), title.lower())
+        if score >= threshold:
+            matches.append((score, title))
+    matches.sort(reverse=True, key=lambda x: x[0])
+    return matches[:top_k]
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            fn(query)
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'titles':>8}  {'loop p50':>10}  {'index p50':>10}  {'speedup':>8}  {'build':>9}")
+    for size in args.sizes:
+        titles = synthetic_titles(size)
+
+        started = time.perf_counter()
+        index = TitleIndex()
+        index.rebuild(enumerate(titles))
+        build_ms = (time.perf_counter() - started) * 1000
+
+        loop_ms = timed(lambda q: loop_search(titles, q), args.repeat)
+        index_ms = timed(lambda q: index.search(q, limit=5, score_cutoff=65), args.repeat)
+        print(f"{size:>8}  {loop_ms:>8.2f}ms  {index_ms:>8.2f}ms  {loop_ms / index_ms:>7.1f}x  {build_ms:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
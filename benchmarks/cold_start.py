@@ -0,0 +1,109 @@
+"""
+Cold-start benchmark: how long a fresh worker takes to import main.py and serve its first requests.
+
+Each run is a new Python process (so nothing is already imported) talking to
+benchmarks.fake_google, with no Google or Gemini credentials. It times:
+
+    import_s         import main
+    health_s         first GET /health
+    ready_s          GET /ready polled until it reports ready (absent on older trees)
+    first_chat_s     first POST /chat, a fast-path question (tools, Google client, graph)
+    second_chat_s    the same question again in another session
+
+    python benchmarks/cold_start.py --runs 5
+    python benchmarks/cold_start.py --skip-ready   # the first /chat pays for initialization
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+MESSAGE = "What's on my calendar this week?"
+
+
+def child(skip_ready=False):
+    """
+    One cold start; prints the timings as JSON. Expects the environment set up by run().
+    """
+    started = time.perf_counter()
+    import main
+    timings = {"import_s": time.perf_counter() - started}
+    client = main.app.test_client()
+
+    started = time.perf_counter()
+    client.get("/health")
+    timings["health_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = client.get("/ready") if not skip_ready else None
+    if response is not None and response.status_code != 404:
+        while response.status_code != 200:
+            time.sleep(0.01)
+            response = client.get("/ready")
+        timings["ready_s"] = time.perf_counter() - started
+
+    for name, session in (("first_chat_s", "cold-1"), ("second_chat_s", "cold-2")):
+        started = time.perf_counter()
+        response = client.post("/chat", json={"message": MESSAGE, "sessionId": session})
+        assert response.status_code == 200, response.data
+        timings[name] = time.perf_counter() - started
+    print(json.dumps(timings))
+
+
+def run(args):
+    from benchmarks.fake_google import FakeGoogleServer
+    from benchmarks.suite import write_fake_token
+
+    server = FakeGoogleServer(latency=args.api_latency).start()
+    workdir = tempfile.mkdtemp(prefix="cal-cold-")
+    env = dict(
+        os.environ,
+        GOOGLE_API_ROOT=server.root_url,
+        GOOGLE_API=os.getenv("GOOGLE_API", "bench"),
+        GOOGLE_TOKEN_PATH=os.path.join(workdir, "token.json"),
+        GOOGLE_CREDS_PATH=os.path.join(workdir, "creds.json"),
+        CAL_CHECKPOINT_DB=os.path.join(workdir, "checkpoints.sqlite"),
+        CAL_RESPONSE_CACHE="0",
+    )
+    os.environ["GOOGLE_TOKEN_PATH"] = env["GOOGLE_TOKEN_PATH"]
+    write_fake_token(env["GOOGLE_TOKEN_PATH"])
+
+    runs = []
+    try:
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", *(["--skip-ready"] if args.skip_ready else [])],
+                env=env, cwd=ROOT, capture_output=True, text=True, check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        server.stop()
+
+    results = {
+        name: {
+            "median_ms": round(statistics.median(run[name] for run in runs) * 1000, 1),
+            "min_ms": round(min(run[name] for run in runs) * 1000, 1),
+        }
+        for name in runs[0]
+    }
+    print(json.dumps({"runs": args.runs, "timings": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Seconds per fake Google HTTP request")
+    parser.add_argument("--skip-ready", action="store_true", help="Send the first /chat without waiting on /ready")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.skip_ready)
+    else:
+        run(args)
@@ -0,0 +1,482 @@
+import re
+import json
+import time
+import uuid
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+# The repo's expansion stands in for Google's on singleEvents=true listings and instance IDs
+import recurrence
+
+# singleEvents=true listings without timeMin/timeMax expand series over this far around now
+SERIES_HORIZON = timedelta(days=365)
+
+
+def _now_rfc3339():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _parse_fields(spec, i=0):
+    """
+    Parses a partial-response mask ("nextPageToken,items(id,start/dateTime)") into
+    {name: subtree}, where a subtree of None selects the whole value.
+    """
+    tree = {}
+    while i < len(spec):
+        j = i
+        while j < len(spec) and spec[j] not in ",()":
+            j += 1
+        name, sub = spec[i:j].strip(), None
+        if j < len(spec) and spec[j] == "(":
+            sub, j = _parse_fields(spec, j + 1)
+            j += 1
+        if name:
+            node, parts = tree, name.split("/")
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = sub
+        if j < len(spec) and spec[j] == ")":
+            return tree, j
+        i = j + 1
+    return tree, i
+
+
+def _select_fields(value, tree):
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_select_fields(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _select_fields(value[key], sub) for key, sub in tree.items() if key in value}
+    return value
+
+
+def _event_start(event):
+    start = event.get("start", {})
+    return _parse_time(start.get("dateTime") or f"{start.get('date')}T00:00:00+00:00")
+
+
+def _event_end(event):
+    end = event.get("end", {})
+    return _parse_time(end.get("dateTime") or f"{end.get('date')}T00:00:00+00:00")
+
+
+class FakeGoogleState:
+    """
+    In-memory Calendar v3 / Tasks v1 data shared by all handler threads.
+
+    Args:
+        latency (float, optional): Seconds to sleep before answering each HTTP request.
+        quota (float, optional): API calls per second (batch parts each count) before answering
+            403 rateLimitExceeded, like Google's per-user quota; None for no limit.
+        quota_window (float, optional): Seconds of quota that may be spent at once (Google counts per minute).
+    """
+
+    def __init__(self, latency: float = 0.0, quota: float = None, quota_window: float = 1.0):
+        self.latency = latency
+        self.quota = quota
+        self.quota_capacity = (quota or 0.0) * quota_window
+        self.quota_tokens = self.quota_capacity
+        self.quota_updated = time.monotonic()
+        self.quota_errors = 0
+        self.lock = threading.Lock()
+        self.events = {}   # calendarId -> {eventId: event}
+        self.tasks = {}    # tasklistId -> {taskId: task}
+        self.requests = 0
+        self.connections = 0
+        self.bytes_sent = 0  # response body bytes, batch parts included once
+        self.calls = {}    # "METHOD path-template" -> count
+        self.seq = 0       # change counter behind the fake sync tokens
+        self.event_seq = {}  # (calendarId, eventId) -> seq of the last change
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def take_quota(self):
+        """
+        Spends one call of the quota; returns False if it is used up.
+        """
+        if self.quota is None:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.quota_tokens = min(self.quota_capacity, self.quota_tokens + (now - self.quota_updated) * self.quota)
+            self.quota_updated = now
+            if self.quota_tokens < 1:
+                self.quota_errors += 1
+                return False
+            self.quota_tokens -= 1
+            return True
+
+    def reset_counters(self):
+        with self.lock:
+            self.quota_errors = 0
+            self.requests = 0
+            self.connections = 0
+            self.bytes_sent = 0
+            self.calls = {}
+
+    def add_event(self, calendar_id, event):
+        event = dict(event)
+        event.setdefault("id", uuid.uuid4().hex)
+        event.setdefault("status", "confirmed")
+        event["etag"] = f'"{uuid.uuid4().hex}"'
+        event["updated"] = _now_rfc3339()
+        with self.lock:
+            self.seq += 1
+            self.events.setdefault(calendar_id, {})[event["id"]] = event
+            self.event_seq[(calendar_id, event["id"])] = self.seq
+        return event
+
+    def add_task(self, tasklist_id, task):
+        task = dict(task)
+        task.setdefault("id", uuid.uuid4().hex)
+        task.setdefault("status", "needsAction")
+        task["etag"] = f'"{uuid.uuid4().hex}"'
+        task["updated"] = _now_rfc3339()
+        with self.lock:
+            self.tasks.setdefault(tasklist_id, {})[task["id"]] = task
+        return task
+
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoints
+    disable_nagle_algorithm = True
+
+    routes = []
+
+    def setup(self):
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method):
+        state = self.server.state
+        with state.lock:
+            state.requests += 1
+        if state.latency:
+            time.sleep(state.latency)
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        status, payload = self.handle_call(method, self.path, body, self.headers)
+        self._send(status, payload)
+
+    def handle_call(self, method, path, body, headers=None):
+        """
+        Runs a single API call (also used for each part of a batch request).
+        """
+        state = self.server.state
+        # Handlers read request headers (If-Match) from here; batch parts run one at a time
+        self.call_headers = {key.lower(): value for key, value in (headers or {}).items()}
+        parsed = urlparse(path)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        # The batch envelope itself is free; each call in it counts
+        if not parsed.path.startswith("/batch") and not state.take_quota():
+            return 403, {"error": {
+                "code": 403, "message": "Rate Limit Exceeded",
+                "errors": [{"domain": "usageLimits", "reason": "rateLimitExceeded", "message": "Rate Limit Exceeded"}],
+            }}
+        for route_method, pattern, name, handler in self.routes:
+            match = pattern.fullmatch(parsed.path)
+            if route_method == method and match:
+                state.count(name)
+                status, payload = handler(self, state, query, body, *map(unquote, match.groups()))
+                # Partial response (the fields= parameter)
+                if "fields" in query and status < 300 and isinstance(payload, dict):
+                    payload = _select_fields(payload, _parse_fields(query["fields"])[0])
+                return status, payload
+        return 404, {"error": {"code": 404, "message": f"No route for {method} {parsed.path}"}}
+
+    def _send(self, status, payload):
+        content_type = "application/json"
+        if isinstance(payload, tuple):
+            content_type, payload = payload
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        with self.server.state.lock:
+            self.server.state.bytes_sent += len(data)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+def route(method, path, name):
+    def register(handler):
+        FakeGoogleHandler.routes.append((method, re.compile(path), name, handler))
+        return handler
+    return register
+
+
+def _not_found():
+    return 404, {"error": {"code": 404, "message": "Not Found"}}
+
+
+def _precondition_failed(handler, current):
+    # If-Match against the stored etag, like the real APIs
+    if_match = handler.call_headers.get("if-match")
+    if if_match and if_match != "*" and if_match != current["etag"]:
+        return 412, {"error": {"code": 412, "message": "Precondition Failed"}}
+    return None
+
+
+# --- Batch ---
+@route("POST", r"/batch(?:/calendar/v3|/tasks/v1)?", "batch")
+def _batch(handler, state, query, body):
+    header = f"Content-Type: {handler.headers['Content-Type']}\r\n\r\n".encode()
+    message = BytesParser(policy=HTTP).parsebytes(header + body)
+    boundary = f"batch_{uuid.uuid4().hex}"
+
+    parts = []
+    for part in message.iter_parts():
+        raw = part.get_payload(decode=True) or part.get_payload().encode()
+        head, _, part_body = raw.partition(b"\r\n\r\n")
+        if not _:
+            head, _, part_body = raw.partition(b"\n\n")
+        request_line, *header_lines = head.decode().splitlines()
+        method, path, _version = request_line.split(" ", 2)
+        headers = dict(line.split(": ", 1) for line in header_lines if ": " in line)
+
+        status, payload = handler.handle_call(method, path, part_body, headers)
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-{part['Content-ID'].strip('<>')}>\r\n\r\n"
+            f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"
+            "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+            f"{json.dumps(payload)}\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return 200, (f"multipart/mixed; boundary={boundary}", "".join(parts).encode())
+
+
+# --- Calendar v3 ---
+@route("GET", r"/calendar/v3/calendars/([^/]+)/events", "calendar.events.list")
+def _events_list(handler, state, query, body, calendar_id):
+    with state.lock:
+        items = list(state.events.get(calendar_id, {}).values())
+        sync_token = str(state.seq)
+        seqs = {event["id"]: state.event_seq[(calendar_id, event["id"])] for event in items}
+
+    if "syncToken" in query:
+        if not query["syncToken"].isdigit() or int(query["syncToken"]) > int(sync_token):
+            return 410, {"error": {"code": 410, "message": "Sync token is no longer valid."}}
+        since = int(query["syncToken"])
+        items = [e for e in items if seqs[e["id"]] > since]  # changes only, including cancellations
+    else:
+        if query.get("singleEvents") == "true":
+            # Every occurrence as its own resource; cancelled and modified instances replace generated ones
+            now = datetime.now(timezone.utc)
+            time_min = _parse_time(query["timeMin"]) if "timeMin" in query else now - SERIES_HORIZON
+            time_max = _parse_time(query["timeMax"]) if "timeMax" in query else now + SERIES_HORIZON
+            items = recurrence.expand(items, time_min, time_max, _event_start, _event_end)
+        else:
+            # Series masters are listed when they start before the window ends (the rule may run past it)
+            if "timeMin" in query:
+                time_min = _parse_time(query["timeMin"])
+                items = [e for e in items if recurrence.is_master(e) or _event_end(e) > time_min]
+            if "timeMax" in query:
+                time_max = _parse_time(query["timeMax"])
+                items = [e for e in items if _event_start(e) < time_max]
+            if query.get("showDeleted") != "true":
+                # Like Google, cancelled instances of a live series are still listed so clients can skip them
+                live = {e["id"] for e in items if recurrence.is_master(e) and e.get("status") != "cancelled"}
+                items = [e for e in items if e.get("status") != "cancelled" or e.get("recurringEventId") in live]
+    items.sort(key=lambda e: (_event_start(e), e["id"]))
+
+    offset = int(query.get("pageToken", 0))
+    limit = int(query.get("maxResults", 250))
+    page = items[offset:offset + limit]
+    response = {"kind": "calendar#events", "items": page}
+    if offset + limit < len(items):
+        response["nextPageToken"] = str(offset + limit)
+    else:
+        response["nextSyncToken"] = sync_token
+    return 200, response
+
+
+@route("POST", r"/calendar/v3/freeBusy", "calendar.freebusy.query")
+def _freebusy_query(handler, state, query, body):
+    request = json.loads(body)
+    time_min, time_max = _parse_time(request["timeMin"]), _parse_time(request["timeMax"])
+    calendars = {}
+    for item in request.get("items", []):
+        with state.lock:
+            events = state.events.get(item["id"])
+            events = None if events is None else list(events.values())
+        if events is None:
+            calendars[item["id"]] = {"errors": [{"domain": "global", "reason": "notFound"}], "busy": []}
+            continue
+        busy = sorted(
+            (max(_event_start(e), time_min), min(_event_end(e), time_max))
+            for e in events
+            if e.get("status") != "cancelled" and e.get("transparency") != "transparent"
+            and _event_end(e) > time_min and _event_start(e) < time_max
+        )
+        calendars[item["id"]] = {"busy": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in busy]}
+    return 200, {"kind": "calendar#freeBusy", "timeMin": request["timeMin"], "timeMax": request["timeMax"], "calendars": calendars}
+
+
+@route("POST", r"/calendar/v3/calendars/([^/]+)/events", "calendar.events.insert")
+def _events_insert(handler, state, query, body, calendar_id):
+    return 200, state.add_event(calendar_id, json.loads(body))
+
+
+@route("GET", r"/calendar/v3/calendars/([^/]+)/events/([^/]+)", "calendar.events.get")
+def _events_get(handler, state, query, body, calendar_id, event_id):
+    event = _find_event(state, calendar_id, event_id)
+    return (200, event) if event else _not_found()
+
+
+def _find_event(state, calendar_id, event_id):
+    # A stored event, or an unmodified instance ('<master id>_<start>') of a stored series
+    events = state.events.get(calendar_id, {})
+    event = events.get(event_id)
+    if event is None and "_" in event_id:
+        master_id, key = event_id.rsplit("_", 1)
+        master = events.get(master_id)
+        if master is not None and recurrence.is_master(master) and master.get("status") != "cancelled":
+            event = recurrence.occurrence(master, key)
+            if event is not None:
+                event["etag"] = master["etag"]
+    return event
+
+
+@route("PUT", r"/calendar/v3/calendars/([^/]+)/events/([^/]+)", "calendar.events.update")
+def _events_update(handler, state, query, body, calendar_id, event_id):
+    if event_id not in state.events.get(calendar_id, {}):
+        return _not_found()
+    event = json.loads(body)
+    event["id"] = event_id
+    return 200, state.add_event(calendar_id, event)
+
+
+@route("PATCH", r"/calendar/v3/calendars/([^/]+)/events/([^/]+)", "calendar.events.patch")
+def _events_patch(handler, state, query, body, calendar_id, event_id):
+    # Patching an instance of a series stores it as a modified instance
+    current = _find_event(state, calendar_id, event_id)
+    if current is None:
+        return _not_found()
+    failed = _precondition_failed(handler, current)
+    if failed:
+        return failed
+    return 200, state.add_event(calendar_id, {**current, **json.loads(body), "id": event_id})
+
+
+# --- Tasks v1 ---
+@route("GET", r"/tasks/v1/lists/([^/]+)/tasks", "tasks.tasks.list")
+def _tasks_list(handler, state, query, body, tasklist_id):
+    with state.lock:
+        items = list(state.tasks.get(tasklist_id, {}).values())
+    if "updatedMin" in query:
+        updated_min = _parse_time(query["updatedMin"])
+        items = [t for t in items if _parse_time(t["updated"]) >= updated_min]
+    if query.get("showDeleted") != "true":
+        items = [t for t in items if not t.get("deleted")]
+    if query.get("showHidden") != "true":
+        items = [t for t in items if not t.get("hidden")]
+
+    offset = int(query.get("pageToken", 0))
+    limit = int(query.get("maxResults", 20))
+    response = {"kind": "tasks#tasks", "items": items[offset:offset + limit]}
+    if offset + limit < len(items):
+        response["nextPageToken"] = str(offset + limit)
+    return 200, response
+
+
+@route("POST", r"/tasks/v1/lists/([^/]+)/tasks", "tasks.tasks.insert")
+def _tasks_insert(handler, state, query, body, tasklist_id):
+    return 200, state.add_task(tasklist_id, json.loads(body))
+
+
+@route("GET", r"/tasks/v1/lists/([^/]+)/tasks/([^/]+)", "tasks.tasks.get")
+def _tasks_get(handler, state, query, body, tasklist_id, task_id):
+    task = state.tasks.get(tasklist_id, {}).get(task_id)
+    return (200, task) if task else _not_found()
+
+
+@route("PUT", r"/tasks/v1/lists/([^/]+)/tasks/([^/]+)", "tasks.tasks.update")
+def _tasks_update(handler, state, query, body, tasklist_id, task_id):
+    if task_id not in state.tasks.get(tasklist_id, {}):
+        return _not_found()
+    task = json.loads(body)
+    task["id"] = task_id
+    return 200, state.add_task(tasklist_id, task)
+
+
+@route("PATCH", r"/tasks/v1/lists/([^/]+)/tasks/([^/]+)", "tasks.tasks.patch")
+def _tasks_patch(handler, state, query, body, tasklist_id, task_id):
+    current = state.tasks.get(tasklist_id, {}).get(task_id)
+    if current is None:
+        return _not_found()
+    failed = _precondition_failed(handler, current)
+    if failed:
+        return failed
+    return 200, state.add_task(tasklist_id, {**current, **json.loads(body), "id": task_id})
+
+
+class FakeGoogleServer:
+    """
+    Local stand-in for the Calendar and Tasks HTTP APIs, used by the benchmarks.
+
+    Usage:
+        with FakeGoogleServer(latency=0.02) as server:
+            os.environ["GOOGLE_API_ROOT"] = server.root_url
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0, quota: float = None,
+                 quota_window: float = 1.0):
+        self.state = FakeGoogleState(latency, quota, quota_window)
+        self._httpd = ThreadingHTTPServer((host, port), FakeGoogleHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.state = self.state
+        self._thread = None
+
+    @property
+    def root_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-google", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
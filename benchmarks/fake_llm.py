@@ -0,0 +1,66 @@
+import json
+import time
+import asyncio
+from typing import Any, Dict
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for Gemini used by the benchmarks.
+
+    On a user message it calls `tool_name` with `tool_args`; once the tool result
+    is in, it answers with `answer`. Every call waits `latency` seconds (without
+    blocking the event loop on the async path), so agent turns cost two model
+    round trips like a real single-tool turn.
+    """
+
+    tool_name: str = "get_events"
+    tool_args: Dict[str, Any] = {}
+    answer: str = "Here is your schedule for the requested period."
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages) -> AIMessage:
+        if isinstance(messages[-1], HumanMessage) and self.tool_name:
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": self.tool_name, "args": dict(self.tool_args), "id": f"call_{len(messages)}"}],
+            )
+        return AIMessage(content=self.answer)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    def _chunks(self, message: AIMessage):
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": index}
+                for index, call in enumerate(message.tool_calls)
+            ]))
+            return
+        for word in message.content.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=f"{word} "))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        yield from self._chunks(self._reply(messages))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._reply(messages)):
+            yield chunk
@@ -0,0 +1,134 @@
+"""
+Concurrent-session load test: Flask (main.py) vs ASGI (asgi.py) serving the same agent.
+
+The LLM is benchmarks.fake_llm.ScriptedChatModel (one get_events call, then an
+answer) and Calendar is benchmarks.fake_google, so no credentials are needed.
+The load generator, the fake APIs and the server share one process:
+
+    python benchmarks/load_test.py --sessions 50 200 --turns 2 --llm-latency 0.5 --api-latency 0.05
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import threading
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.fake_google import FakeGoogleServer
+
+
+def setup(args):
+    server = FakeGoogleServer(latency=args.api_latency).start()
+    os.environ["GOOGLE_API_ROOT"] = server.root_url
+    os.environ.setdefault("GOOGLE_API", "load-test")
+    # Every tool call goes to the (slow) fake API, so blocking tool threads show up
+    os.environ["CAL_EVENT_MIRROR"] = "0"
+    # The load message is a fast-path question; without these no turn would reach the agent
+    os.environ["CAL_FAST_PATH"] = "0"
+    os.environ["CAL_RESPONSE_CACHE"] = "0"
+    # All sessions share the default account, so pacing would only measure CAL_CALENDAR_QPS
+    os.environ.setdefault("CAL_RATE_LIMIT", "0")
+
+    from google.oauth2.credentials import Credentials
+    import google_clients
+    google_clients._credential_cache._creds = Credentials(token="load-test")
+
+    import main
+    from benchmarks.fake_llm import ScriptedChatModel
+
+    main.agent_executor = main.build_agent(ScriptedChatModel(latency=args.llm_latency))
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    return server
+
+
+def start_flask(port):
+    from werkzeug.serving import make_server
+    import main
+
+    httpd = make_server("127.0.0.1", port, main.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd.shutdown
+
+
+def start_asgi(port):
+    import uvicorn
+    import asgi
+
+    server = uvicorn.Server(uvicorn.Config(asgi.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+    return stop
+
+
+async def drive(base_url, sessions, turns, label):
+    latencies, errors = [], 0
+
+    async def session(client, n):
+        nonlocal errors
+        for turn in range(turns):
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    f"{base_url}/chat",
+                    json={"message": "What's on my calendar this week?", "sessionId": f"{label}-{n}"},
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(session(client, n) for n in range(sessions)))
+        wall = time.perf_counter() - started
+    return latencies, errors, wall
+
+
+def report(label, sessions, latencies, errors, wall):
+    ordered = sorted(latencies) or [float("nan")]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{label:<6} sessions={sessions:<4} turns/s={len(latencies) / wall:7.1f}  "
+        f"p50={statistics.median(ordered):6.2f}s  p95={p95:6.2f}s  errors={errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    fake_google = setup(args)
+    servers = [("flask", start_flask, 5101), ("asgi", start_asgi, 5102)]
+    try:
+        for label, start, port in servers:
+            stop = start(port)
+            try:
+                for sessions in args.sessions:
+                    latencies, errors, wall = asyncio.run(
+                        drive(f"http://127.0.0.1:{port}", sessions, args.turns, f"{label}-{sessions}")
+                    )
+                    report(label, sessions, latencies, errors, wall)
+            finally:
+                stop()
+    finally:
+        fake_google.stop()
+
+
+if __name__ == "__main__":
+    main()
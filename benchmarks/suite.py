@@ -0,0 +1,298 @@
+"""
+Offline end-to-end benchmark suite: fake Calendar/Tasks APIs, a scripted LLM, JSON results.
+
+Scenarios:
+    single_read          /chat turns that read the calendar through the agent (one tool call each)
+    bulk_create          create_multiple_events with 100 events
+    fuzzy_search         get_event_by_name_and_timefarame over 10k events
+    concurrent_sessions  200 sessions chatting at once against the ASGI server
+
+No Google or Gemini credentials are needed. Results (p50/p95/p99 latency,
+throughput, Google API requests per operation) go to stdout or --out:
+
+    python benchmarks/suite.py --out bench.json
+    python benchmarks/suite.py --scenarios single_read fuzzy_search --api-latency 0.05
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_google import FakeGoogleServer
+from benchmarks.bench_title_index import QUERIES, synthetic_titles
+
+SCENARIOS = ["single_read", "bulk_create", "fuzzy_search", "concurrent_sessions"]
+READ_MESSAGE = "What's on my calendar this week?"
+
+
+# --- Setup ---
+def write_fake_token(path):
+    """
+    Writes a token.json that google_clients loads as valid, non-expiring credentials.
+    """
+    from google_clients import SCOPES
+
+    with open(path, "w") as token:
+        json.dump({
+            "token": "bench", "refresh_token": "bench", "client_id": "bench", "client_secret": "bench",
+            "token_uri": "https://oauth2.googleapis.com/token", "scopes": SCOPES,
+            "expiry": "2099-01-01T00:00:00Z",
+        }, token)
+
+
+def setup(args):
+    """
+    Starts the fake APIs, configures the app for them and swaps the agent's LLM for the scripted model.
+
+    The environment must be set before main / tools are imported, since they read it at import time.
+    """
+    server = FakeGoogleServer(latency=args.api_latency).start()
+    workdir = tempfile.mkdtemp(prefix="cal-bench-")
+    os.environ["GOOGLE_API_ROOT"] = server.root_url
+    os.environ.setdefault("GOOGLE_API", "bench")
+    os.environ["GOOGLE_TOKEN_PATH"] = os.path.join(workdir, "token.json")
+    os.environ["GOOGLE_CREDS_PATH"] = os.path.join(workdir, "creds.json")
+    os.environ["CAL_CHECKPOINTER"] = "memory"
+    os.environ["CAL_EVENT_MIRROR"] = "0" if args.no_mirror else "1"
+    os.environ["CAL_TASK_MIRROR"] = "0" if args.no_mirror else "1"
+    # The fake has no quota, so pacing would only measure CAL_CALENDAR_QPS (bench_rate_limit.py covers it)
+    os.environ.setdefault("CAL_RATE_LIMIT", "0")
+    # Measure the agent loop itself unless asked otherwise
+    if not args.shortcuts:
+        os.environ["CAL_FAST_PATH"] = "0"
+        os.environ["CAL_RESPONSE_CACHE"] = "0"
+
+    write_fake_token(os.environ["GOOGLE_TOKEN_PATH"])
+    import main
+    from benchmarks.fake_llm import ScriptedChatModel
+
+    main.agent_executor = main.build_agent(ScriptedChatModel(latency=args.llm_latency))
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    seed(server)
+    return server
+
+
+def seed(server):
+    import tools
+
+    # Two weeks of ordinary calendar around now, plus a task list
+    rng = random.Random(11)
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    titles = synthetic_titles(150, seed=3)
+    for i, title in enumerate(titles):
+        start = now + timedelta(hours=rng.randint(-24, 14 * 24))
+        server.state.add_event(tools.CALENDAR_ID, {
+            "summary": title,
+            "description": "Seeded by benchmarks/suite.py",
+            "start": {"dateTime": start.isoformat(), "timeZone": "Asia/Kolkata"},
+            "end": {"dateTime": (start + timedelta(minutes=rng.choice([30, 60, 90]))).isoformat(), "timeZone": "Asia/Kolkata"},
+        })
+    for title in synthetic_titles(50, seed=5):
+        server.state.add_task(tools.TASKLIST_ID, {"title": title, "due": (now + timedelta(days=rng.randint(0, 30))).strftime("%Y-%m-%dT00:00:00.000Z")})
+
+
+# --- Measurement ---
+def percentile(ordered, fraction):
+    # Nearest rank
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class ApiCounter:
+    """
+    Snapshots the fake server's request counters around a scenario.
+    """
+
+    def __init__(self, server):
+        self.state = server.state
+
+    def __enter__(self):
+        with self.state.lock:
+            self.requests = self.state.requests
+            self.calls = dict(self.state.calls)
+        return self
+
+    def __exit__(self, *exc):
+        with self.state.lock:
+            self.requests = self.state.requests - self.requests
+            self.calls = {
+                name: count - self.calls.get(name, 0)
+                for name, count in self.state.calls.items()
+                if count != self.calls.get(name, 0)
+            }
+
+
+def summarize(latencies, wall, ops, api, errors=0, **extra):
+    ordered = sorted(latencies) or [float("nan")]
+    return {
+        "operations": ops,
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "throughput_per_s": round(ops / wall, 2) if wall else None,
+        "http_requests_per_op": round(api.requests / ops, 2) if ops else None,
+        "api_calls_per_op": {name: round(count / ops, 2) for name, count in sorted(api.calls.items())},
+        **extra,
+    }
+
+
+# --- Scenarios ---
+def single_read(server, args):
+    import main
+
+    client = main.app.test_client()
+    # Warm-up: the first read pays for the mirror's full sync
+    client.post("/chat", json={"message": READ_MESSAGE, "sessionId": "warmup"})
+
+    latencies, errors = [], 0
+    with ApiCounter(server) as api:
+        started = time.perf_counter()
+        for turn in range(args.turns):
+            turn_started = time.perf_counter()
+            response = client.post("/chat", json={"message": READ_MESSAGE, "sessionId": f"read-{turn}"})
+            latencies.append(time.perf_counter() - turn_started)
+            errors += response.status_code != 200
+        wall = time.perf_counter() - started
+    return summarize(latencies, wall, args.turns, api, errors)
+
+
+def bulk_create(server, args):
+    import tools
+
+    latencies, errors = [], 0
+    day = datetime(2031, 1, 1)
+    with ApiCounter(server) as api:
+        started = time.perf_counter()
+        for run in range(args.repeat):
+            batch = []
+            for i in range(args.bulk_size):
+                start = day + timedelta(days=run, minutes=15 * i)
+                batch.append({
+                    "summary": f"[WORK] Bulk {run}-{i}",
+                    "start_datetime_str": start.strftime("%Y-%m-%d %H:%M:%S"),
+                    "end_datetime_str": (start + timedelta(minutes=15)).strftime("%Y-%m-%d %H:%M:%S"),
+                })
+            run_started = time.perf_counter()
+            results = tools.create_multiple_events.invoke({"events": batch})
+            latencies.append(time.perf_counter() - run_started)
+            errors += sum(1 for result in results if "error" in result)
+        wall = time.perf_counter() - started
+    return summarize(
+        latencies, wall, args.repeat, api, errors,
+        events_per_op=args.bulk_size, events_per_s=round(args.repeat * args.bulk_size / wall, 1),
+    )
+
+
+def fuzzy_search(server, args):
+    import tools
+
+    # A separate year, so the other scenarios' windows are unaffected
+    rng = random.Random(13)
+    year = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    for title in synthetic_titles(args.search_events, seed=17):
+        start = year + timedelta(minutes=30 * rng.randint(0, 365 * 48 - 1))
+        server.state.add_event(tools.CALENDAR_ID, {
+            "summary": title,
+            "start": {"dateTime": start.isoformat()},
+            "end": {"dateTime": (start + timedelta(minutes=30)).isoformat()},
+        })
+    window = {"start_datetime_str": "2030-01-01 00:00:00", "end_datetime_str": "2031-01-01 00:00:00"}
+
+    # Pull the new events into the mirror now (an incremental sync), rather than inside a timed search
+    sync_ms = None
+    if tools.USE_EVENT_MIRROR:
+        sync_started = time.perf_counter()
+        tools.get_event_store(tools.CALENDAR_ID).sync(force=True)
+        sync_ms = round((time.perf_counter() - sync_started) * 1000, 2)
+
+    latencies = []
+    with ApiCounter(server) as api:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            for query in QUERIES:
+                query_started = time.perf_counter()
+                tools.get_event_by_name_and_timefarame.invoke({"name": query, **window})
+                latencies.append(time.perf_counter() - query_started)
+        wall = time.perf_counter() - started
+    return summarize(
+        latencies, wall, len(latencies), api,
+        events=args.search_events, sync_ms=sync_ms,
+    )
+
+
+def concurrent_sessions(server, args):
+    from benchmarks.load_test import drive, start_asgi
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    stop = start_asgi(port)
+    try:
+        with ApiCounter(server) as api:
+            latencies, errors, wall = asyncio.run(
+                drive(f"http://127.0.0.1:{port}", args.sessions, args.session_turns, "concurrent")
+            )
+    finally:
+        stop()
+    turns = args.sessions * args.session_turns
+    return summarize(latencies, wall, turns, api, errors, sessions=args.sessions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--out", help="Write the JSON results to this file as well as stdout")
+    parser.add_argument("--api-latency", type=float, default=0.02, help="Seconds per fake Google HTTP request")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per scripted model call")
+    parser.add_argument("--turns", type=int, default=50, help="single_read turns")
+    parser.add_argument("--repeat", type=int, default=5, help="bulk_create runs / fuzzy_search rounds")
+    parser.add_argument("--bulk-size", type=int, default=100)
+    parser.add_argument("--search-events", type=int, default=10000)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--session-turns", type=int, default=1)
+    parser.add_argument("--no-mirror", action="store_true", help="Read from the API instead of the local mirrors")
+    parser.add_argument("--shortcuts", action="store_true", help="Keep the fast path and response cache on")
+    args = parser.parse_args()
+
+    server = setup(args)
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "scenarios": {},
+    }
+    try:
+        # In SCENARIOS order: fuzzy_search adds 10k events the others should not pay for
+        for name in [name for name in SCENARIOS if name in args.scenarios]:
+            print(f"running {name} ...", file=sys.stderr)
+            results["scenarios"][name] = globals()[name](server, args)
+    finally:
+        server.stop()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w") as out:
+            out.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# "sqlite" keeps sessions on disk across restarts, "memory" keeps them in process
+CHECKPOINTER = os.getenv("CAL_CHECKPOINTER", "sqlite")
+CHECKPOINT_DB = os.getenv(
+    "CAL_CHECKPOINT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints.sqlite"),
+)
+# At most this many sessions are retained; the least recently used go first
+MAX_SESSIONS = int(os.getenv("CAL_MAX_SESSIONS", "1000"))
+# Sessions idle for longer than this (seconds) are dropped
+SESSION_TTL = float(os.getenv("CAL_SESSION_TTL", str(24 * 60 * 60)))
+
+
+class ThreadedSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver whose async methods run the sync ones on the default executor.
+
+    SqliteSaver serializes access to its connection with a lock, so one saver can
+    back both the Flask app and the ASGI app (which calls ainvoke / astream).
+    """
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def create_checkpointer(backend: str = CHECKPOINTER, path: str = CHECKPOINT_DB):
+    """
+    Creates the agent's checkpointer.
+
+    Args:
+        backend (str, optional): "sqlite" or "memory".
+        path (str, optional): SQLite database file (sqlite backend only).
+
+    Returns:
+        BaseCheckpointSaver: The checkpointer.
+    """
+    if backend == "memory":
+        return MemorySaver()
+    if backend != "sqlite":
+        raise ValueError(f"Unknown checkpointer backend: {backend!r} (expected 'sqlite' or 'memory')")
+
+    conn = sqlite3.connect(path, check_same_thread=False)
+    # WAL lets readers run while a turn is being written; NORMAL is durable enough under WAL
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    saver = ThreadedSqliteSaver(conn)
+    saver.setup()
+    return saver
+
+
+def stored_thread_ids(checkpointer) -> list:
+    """
+    Returns the thread IDs already in a SQLite checkpointer, least recently written first.
+    """
+    if not isinstance(checkpointer, SqliteSaver):
+        return []
+    with checkpointer.cursor(transaction=False) as cur:
+        # Checkpoint IDs are time-ordered (UUIDv6), so the newest one dates the thread
+        cur.execute(
+            "SELECT thread_id FROM checkpoints GROUP BY thread_id ORDER BY MAX(checkpoint_id)"
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+class SessionRegistry:
+    """
+    Bounds the sessions kept by a checkpointer.
+
+    Every turn touches its session. Sessions idle for longer than `ttl`, and the
+    least recently used ones beyond `max_sessions`, are deleted from the
+    checkpointer, so memory (or the database) stays flat however many sessions
+    come and go. Expired sessions sit at the front of the LRU order, so checking
+    them on each touch only costs as much as the evictions themselves.
+
+    Args:
+        checkpointer (BaseCheckpointSaver): Where the sessions are stored.
+        max_sessions (int, optional): Most sessions to retain.
+        ttl (float, optional): Seconds of inactivity before a session is dropped.
+    """
+
+    def __init__(self, checkpointer, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL):
+        self.checkpointer = checkpointer
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()  # thread id -> last activity (monotonic), oldest first
+        self._lock = threading.Lock()
+
+        # Sessions restored from disk start a fresh TTL but keep their LRU order
+        now = time.monotonic()
+        for thread_id in stored_thread_ids(checkpointer):
+            self._sessions[thread_id] = now
+        self._delete(self._collect(now))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def touch(self, thread_id: str):
+        """
+        Marks a session as active and evicts expired or excess sessions.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[thread_id] = now
+            self._sessions.move_to_end(thread_id)
+            evicted = self._collect(now)
+        self._delete(evicted)
+
+    def evict_expired(self):
+        """
+        Drops sessions past their TTL without touching any session.
+        """
+        with self._lock:
+            evicted = self._collect(time.monotonic())
+        self._delete(evicted)
+
+    def _collect(self, now: float) -> list:
+        evicted = []
+        while self._sessions:
+            thread_id, last_active = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_active <= self.ttl:
+                break
+            del self._sessions[thread_id]
+            evicted.append(thread_id)
+        return evicted
+
+    def _delete(self, thread_ids: list):
+        for thread_id in thread_ids:
+            try:
+                self.checkpointer.delete_thread(thread_id)
+            except Exception as e:
+                logging.warning(f"Could not evict session {thread_id}: {e}")
+        if thread_ids:
+            logging.info(f"Evicted {len(thread_ids)} idle session(s); {len(self._sessions)} retained")
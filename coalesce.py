@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future
+
+import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Seconds a finished read keeps answering identical or narrower reads; 0 only merges reads in flight
+COALESCE_WINDOW = float(os.getenv("CAL_COALESCE_WINDOW", "2"))
+
+_counts = {}  # read name -> {outcome: count}
+_counts_lock = threading.Lock()
+
+
+def record(name: str, outcome: str):
+    """
+    Counts one read by outcome: "upstream" (an API call was made), "joined" (waited
+    for an identical call in flight) or "reused" (answered by a call that just finished).
+    """
+    telemetry.COALESCED_READS.labels(name, outcome).inc()
+    with _counts_lock:
+        counts = _counts.setdefault(name, {"upstream": 0, "joined": 0, "reused": 0})
+        counts[outcome] += 1
+    if outcome != "upstream":
+        logger.debug(f"Coalesced {name} read ({outcome})")
+
+
+def snapshot() -> dict:
+    """
+    Returns the read counts by name and outcome, plus the share of reads that needed no API call, for /stats.
+    """
+    with _counts_lock:
+        result = {}
+        for name, counts in _counts.items():
+            total = sum(counts.values())
+            result[name] = {**counts, "coalesced_rate": round(1 - counts["upstream"] / total, 3) if total else 0.0}
+        return result
+
+
+class _Flight:
+    __slots__ = ("scope", "window", "future", "finished_at")
+
+    def __init__(self, scope, window):
+        self.scope = scope
+        self.window = window
+        self.future = Future()
+        self.finished_at = None
+
+
+class SingleFlight:
+    """
+    Merges concurrent and back-to-back reads of the same data into one upstream call.
+
+    Reads are grouped by key (e.g. user and calendar). A read whose scope is
+    covered by a call in flight waits for that call, and one covered by a call
+    that finished less than `window` seconds ago reuses its result; either way
+    `narrow` cuts the shared result down to the read's own scope. Anything
+    else becomes a new upstream call. Failures are not reused: waiters see the
+    exception, the next read calls again. invalidate(key) forgets a key's
+    results, so reads after a write never see data from before it.
+
+    Results are shared between callers and must not be modified.
+
+    Args:
+        name (str): Name for the counts in /stats and metrics, e.g. 'calendar.events.list'.
+        covers (callable): covers(call scope, read scope) -> whether the call's result contains the read's.
+        narrow (callable, optional): narrow(result, read scope) -> the part of a covering result the read asked for.
+        window (float, optional): Seconds a finished call keeps being reused, unless run() is given its own.
+    """
+
+    def __init__(self, name: str, covers, narrow=None, window: float = COALESCE_WINDOW):
+        self.name = name
+        self.covers = covers
+        self.narrow = narrow
+        self.window = window
+        self._flights = {}  # key -> [_Flight], in flight or recently finished
+        self._lock = threading.Lock()
+
+    def run(self, key, scope, fetch, window: float = None):
+        """
+        Returns fetch()'s result for this scope, calling it only if no in-flight or fresh call covers the scope.
+
+        Args:
+            window (float, optional): Seconds this call's result is reused once finished, if it makes one
+                (prefetches keep theirs longer). Defaults to the instance's window.
+        """
+        with self._lock:
+            now = time.monotonic()
+            flights = [flight for flight in self._flights.get(key, []) if _live(flight, now)]
+            shared = next((flight for flight in flights if self.covers(flight.scope, scope)), None)
+            if shared is None:
+                # Going upstream anyway, so also drop expired results of idle keys (other users, old windows)
+                self._prune(now)
+                own = _Flight(scope, self.window if window is None else window)
+                flights.append(own)
+            self._flights[key] = flights
+
+        if shared is not None:
+            record(self.name, "joined" if shared.finished_at is None else "reused")
+            result = shared.future.result()
+            return self.narrow(result, scope) if self.narrow else result
+
+        record(self.name, "upstream")
+        try:
+            result = fetch()
+        except BaseException as e:
+            own.future.set_exception(e)
+            self._forget(key, own)
+            raise
+        own.future.set_result(result)
+        with self._lock:
+            own.finished_at = time.monotonic()
+        if own.window <= 0:
+            self._forget(key, own)
+        return result
+
+    def _prune(self, now):
+        for key, flights in list(self._flights.items()):
+            live = [flight for flight in flights if _live(flight, now)]
+            if live:
+                self._flights[key] = live
+            else:
+                del self._flights[key]
+
+    def _forget(self, key, flight):
+        with self._lock:
+            flights = self._flights.get(key)
+            if flights and flight in flights:
+                flights.remove(flight)
+                if not flights:
+                    del self._flights[key]
+
+    def invalidate(self, key=None):
+        """
+        Stops reusing a key's results (every key's if None), including those of calls still in flight
+        (their current waiters still get them).
+        """
+        with self._lock:
+            if key is None:
+                self._flights.clear()
+            else:
+                self._flights.pop(key, None)
+
+
+def _live(flight, now):
+    return flight.finished_at is None or now - flight.finished_at < flight.window
@@ -0,0 +1,310 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import pytz
+from googleapiclient.errors import HttpError
+
+import coalesce
+import recurrence
+import tenants
+from google_clients import calendar_service
+from intervals import IntervalIndex
+from title_index import TitleIndex
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# Reads trigger an incremental sync when the mirror is older than this (seconds)
+EVENT_SYNC_INTERVAL = float(os.getenv("CAL_EVENT_SYNC_INTERVAL", "30"))
+PAGE_SIZE = 2500
+# Partial response: the fields the tools read (compact and verbose views, conflicts, edits)
+EVENT_FIELDS = (
+    "id,etag,status,summary,description,location,start,end,transparency,"
+    "attendees(email,responseStatus),reminders,recurrence,recurringEventId,originalStartTime,updated"
+)
+LIST_FIELDS = f"nextPageToken,nextSyncToken,items({EVENT_FIELDS})"
+
+
+def _parse_event_time(value: dict) -> datetime:
+    if "dateTime" in value:
+        return datetime.fromisoformat(value["dateTime"])
+    # All-day events only carry a date; anchor them to local midnight
+    return IST.localize(datetime.fromisoformat(value["date"]))
+
+
+def event_start(event: dict) -> datetime:
+    """
+    Returns the timezone-aware start of an event resource.
+    """
+    return _parse_event_time(event["start"])
+
+
+def event_end(event: dict) -> datetime:
+    """
+    Returns the timezone-aware end of an event resource.
+    """
+    return _parse_event_time(event["end"])
+
+
+class EventStore:
+    """
+    Local mirror of one Google Calendar, kept current with incremental syncs.
+
+    The first sync downloads every event once; later syncs send the stored
+    nextSyncToken and only receive what changed. If Google expires the token
+    (HTTP 410) the mirror is rebuilt with a full sync. Writes made by the tools
+    are applied immediately through apply().
+
+    Recurring events are mirrored as their series master plus the instances
+    that differ from it (moved, edited or cancelled), and reads expand the
+    master's RRULE locally, so a daily meeting costs one resource instead of
+    one per day (see recurrence.py and CAL_EXPAND_RECURRENCE).
+
+    Args:
+        calendar_id (str): The calendar to mirror.
+        sync_interval (float, optional): Seconds a sync stays fresh for reads.
+    """
+
+    def __init__(self, calendar_id: str, sync_interval: float = EVENT_SYNC_INTERVAL):
+        self.calendar_id = calendar_id
+        self.sync_interval = sync_interval
+        # Bumped whenever the mirrored data changes
+        self.version = 0
+
+        self._events = {}           # event id -> one-off event or modified instance
+        self._masters = {}          # event id -> recurring series master
+        self._overrides = {}        # master id -> instance keys not generated from the rule (modified or cancelled)
+        self._index = None          # IntervalIndex of event ids, rebuilt lazily after changes
+        self.titles = TitleIndex()  # kept in step with _events on every change
+        self._sync_token = None
+        self._last_sync = None
+
+        self._lock = threading.RLock()      # guards the mirrored data
+        self._sync_lock = threading.Lock()  # one sync at a time
+
+    # --- Sync ---
+    def sync(self, force: bool = False):
+        """
+        Brings the mirror up to date unless it was synced within sync_interval.
+
+        Args:
+            force (bool, optional): Sync even if the mirror is still fresh.
+        """
+        # Readers that queue behind a running sync are usually answered by it
+        waited = not self._sync_lock.acquire(blocking=False)
+        if waited:
+            self._sync_lock.acquire()
+        try:
+            if not force and self._is_fresh():
+                if waited:
+                    coalesce.record("events.sync", "joined")
+                return
+            coalesce.record("events.sync", "upstream")
+            if self._sync_token is None:
+                self._full_sync()
+            else:
+                try:
+                    self._incremental_sync()
+                except HttpError as e:
+                    if e.resp.status != 410:
+                        raise
+                    logger.info(f"Sync token expired for {self.calendar_id}, running a full sync")
+                    self._full_sync()
+            self._last_sync = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def _is_fresh(self) -> bool:
+        return self._last_sync is not None and time.monotonic() - self._last_sync < self.sync_interval
+
+    def _list_all(self, **params):
+        service = calendar_service()
+        items, page_token = [], None
+        while True:
+            result = service.events().list(
+                calendarId=self.calendar_id,
+                singleEvents=not recurrence.EXPAND_RECURRENCE,
+                maxResults=PAGE_SIZE,
+                pageToken=page_token,
+                fields=LIST_FIELDS,
+                **params,
+            ).execute()
+            items.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return items, result.get("nextSyncToken")
+
+    def _full_sync(self):
+        items, sync_token = self._list_all()
+        with self._lock:
+            self._events, self._masters, self._overrides = {}, {}, {}
+            for event in items:
+                self._store(event)
+            self.titles.rebuild(
+                (event_id, event.get("summary", ""))
+                for events in (self._events, self._masters) for event_id, event in events.items()
+            )
+            self._index = None
+            self.version += 1
+        self._sync_token = sync_token
+
+    def _incremental_sync(self):
+        items, sync_token = self._list_all(syncToken=self._sync_token)
+        if items:
+            with self._lock:
+                for event in items:
+                    self._apply(event)
+        self._sync_token = sync_token
+
+    # --- Writes ---
+    def apply(self, event: dict):
+        """
+        Writes a created, updated or cancelled event resource through to the mirror.
+        """
+        with self._lock:
+            self._apply(event)
+
+    def _apply(self, event: dict):
+        self._events.pop(event["id"], None)
+        if self._masters.pop(event["id"], None) is not None and event.get("status") == "cancelled":
+            # Deleting a series deletes all of its instances
+            self._overrides.pop(event["id"], None)
+        if self._store(event):
+            self.titles.upsert(event["id"], event.get("summary", ""))
+        else:
+            self.titles.remove(event["id"])
+        self._index = None
+        self.version += 1
+
+    def _store(self, event: dict) -> bool:
+        # Files an event resource; returns whether it is a live event (not a cancellation)
+        if event.get("recurringEventId") and event.get("originalStartTime"):
+            # An instance that no longer follows its master's rule
+            key = recurrence.instance_key(event["originalStartTime"])
+            self._overrides.setdefault(event["recurringEventId"], set()).add(key)
+        if event.get("status") == "cancelled":
+            return False
+        (self._masters if recurrence.is_master(event) else self._events)[event["id"]] = event
+        return True
+
+    def _expand(self, master: dict, start: datetime, end: datetime) -> list:
+        try:
+            return recurrence.occurrences(master, start, end, self._overrides.get(master["id"], frozenset()))
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Cannot expand recurring event {master.get('id')}: {e}")
+            return []
+
+    # --- Reads ---
+    def get(self, event_id: str) -> dict:
+        """
+        Returns the mirrored event with this ID, or None.
+
+        Instance IDs of a recurring event ('<master id>_<start>') that were
+        never modified are answered from the series master.
+        """
+        if not event_id:
+            return None
+        self.sync()
+        with self._lock:
+            event = self._events.get(event_id) or self._masters.get(event_id)
+            if event is not None or "_" not in event_id:
+                return event
+            master_id, key = event_id.rsplit("_", 1)
+            master = self._masters.get(master_id)
+            if master is None or key in self._overrides.get(master_id, ()):
+                return None
+            try:
+                return recurrence.occurrence(master, key)
+            except (KeyError, ValueError):
+                return None
+
+    def query(self, start: datetime, end: datetime) -> list:
+        """
+        Returns the events overlapping [start, end), ordered by start time.
+        """
+        self.sync()
+        with self._lock:
+            events = [self._events[event_id] for event_id in self._build_index().overlapping(start, end)]
+            if not self._masters:
+                return events
+            for master in self._masters.values():
+                events.extend(self._expand(master, start, end))
+        events.sort(key=event_start)
+        return events
+
+    def search(self, name: str, start: datetime, end: datetime, limit: int = 5, score_cutoff: float = 0,
+               with_scores: bool = False) -> list:
+        """
+        Fuzzy-matches event titles among the events overlapping [start, end).
+
+        A matching recurring series yields each of its instances in the window.
+
+        Args:
+            with_scores (bool, optional): Return (event, score) pairs, e.g. to merge results across calendars.
+
+        Returns:
+            list: Matching events, best match first.
+        """
+        self.sync()
+        with self._lock:
+            window_ids = self._build_index().overlapping(start, end) + list(self._masters)
+            matches = self.titles.search(name, len(window_ids), score_cutoff, ids=window_ids)
+            events = []
+            for event_id, score in matches:
+                if event_id in self._masters:
+                    events.extend((event, score) for event in self._expand(self._masters[event_id], start, end))
+                else:
+                    events.append((self._events[event_id], score))
+                if len(events) >= limit:
+                    break
+            events = events[:limit]
+        return events if with_scores else [event for event, _ in events]
+
+    def all_events(self) -> list:
+        """
+        Returns every mirrored event (one-off events, modified instances and series masters), ordered by start time.
+        """
+        self.sync()
+        with self._lock:
+            events = [self._events[event_id] for event_id in self._build_index().items()]
+            events.extend(self._masters.values())
+        events.sort(key=event_start)
+        return events
+
+    def _build_index(self) -> IntervalIndex:
+        if self._index is None:
+            intervals = []
+            for event in self._events.values():
+                try:
+                    intervals.append((event_start(event), event_end(event), event["id"]))
+                except (KeyError, ValueError):
+                    continue  # events without usable times are never returned by window queries
+            self._index = IntervalIndex(intervals)
+        return self._index
+
+
+_stores = OrderedDict()  # (user, calendar_id) -> EventStore, least recently used first
+_stores_lock = threading.Lock()
+
+
+def get_event_store(calendar_id: str) -> EventStore:
+    """
+    Returns the shared mirror for a calendar of the current user (see tenants.acting_as()), creating it on first use.
+
+    At most tenants.MAX_MIRRORS mirrors are kept; an evicted one is rebuilt with a full sync when used again.
+    """
+    key = (tenants.current_user(), calendar_id)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = EventStore(calendar_id)
+            while len(_stores) > tenants.MAX_MIRRORS:
+                _stores.popitem(last=False)
+        else:
+            _stores.move_to_end(key)
+    return store
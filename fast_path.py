@@ -0,0 +1,248 @@
+import os
+import re
+import uuid
+import logging
+import threading
+from datetime import datetime, time, timedelta
+
+import pytz
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# Answer recognised read-only questions without the LLM; set CAL_FAST_PATH=0 to always use the agent
+USE_FAST_PATH = os.getenv("CAL_FAST_PATH", "1") != "0"
+
+# Day parts, as defined in the system prompt
+DAY_PARTS = {
+    "morning": (time(8, 0), time(12, 0)),
+    "afternoon": (time(12, 0), time(17, 0)),
+    "evening": (time(17, 0), time(21, 0)),
+    "night": (time(21, 0), None),  # until midnight
+}
+
+_PERIOD = r"(?P<period>today|tonight|tomorrow|this week|next week|this weekend|this morning|this afternoon|this evening)"
+_PART = r"(?:\s+(?:in the\s+)?(?P<part>morning|afternoon|evening|night))?"
+EVENTS_QUERY = re.compile(
+    r"(?P<ask>(?:whats|what is|what do i have|what have i got|show(?: me)?|list|get|tell me)\s+)?"
+    r"(?:(?P<subject>(?:on\s+)?(?:my\s+)?(?:calendar|schedule|agenda|events?|meetings|plans?))\s+)?"
+    r"(?:(?:on|for)\s+)?"
+    + _PERIOD + _PART
+)
+# A period anywhere in a message
+PERIOD = re.compile(r"\b" + _PERIOD + _PART + r"\b")
+TASKS_QUERY = re.compile(
+    r"(?:(?:show|list|get|what are)(?: me)?\s+)?(?:all\s+)?(?:of\s+)?(?:my\s+)?"
+    r"(?:open\s+|pending\s+)?(?:tasks|todos|to dos|todo list|to do list|task list)"
+)
+
+
+def normalize(text: str) -> str:
+    """
+    Lower-cases a message and strips punctuation and extra whitespace ("What's on today?" -> "whats on today").
+    """
+    text = text.lower().replace("’", "").replace("'", "").replace("-", " ")
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def _day_window(day, part=None):
+    start, end = datetime.combine(day, time(0, 0)), datetime.combine(day + timedelta(days=1), time(0, 0))
+    if part:
+        part_start, part_end = DAY_PARTS[part]
+        start = datetime.combine(day, part_start)
+        if part_end is not None:
+            end = datetime.combine(day, part_end)
+    return start, end
+
+
+def resolve_period(period: str, part: str = None, now: datetime = None):
+    """
+    Turns a period ("tomorrow", "this week", ...) and an optional day part into a naive IST (start, end) window.
+
+    "This week" is Monday-Sunday of the current week and "next week" the following Monday-Sunday.
+    """
+    today = (now or datetime.now(IST)).date()
+    if period.startswith("this ") and period[5:] in DAY_PARTS:
+        period, part = "today", period[5:]
+    if period == "tonight":
+        start, _ = _day_window(today, "evening")
+        return start, _day_window(today, "night")[1]
+    if period == "today":
+        return _day_window(today, part)
+    if period == "tomorrow":
+        return _day_window(today + timedelta(days=1), part)
+
+    monday = today - timedelta(days=today.weekday())
+    if period == "next week":
+        monday += timedelta(days=7)
+    if period == "this weekend":
+        saturday = monday + timedelta(days=5)
+        return _day_window(saturday)[0], _day_window(saturday + timedelta(days=1))[1]
+    return _day_window(monday)[0], _day_window(monday + timedelta(days=6))[1]
+
+
+def find_window(text: str, now: datetime = None):
+    """
+    Returns the (start, end) window of the first period mentioned in a normalized message, or None.
+    """
+    found = PERIOD.search(text)
+    if found is None:
+        return None
+    part = found["part"] if found["period"] in ("today", "tomorrow") else None
+    return resolve_period(found["period"], part, now)
+
+
+def match(user_input: str):
+    """
+    Recognises a read-only question the fast path can answer.
+
+    Returns:
+        tuple: (intent, params), with intent "events" or "tasks", or None for anything else.
+    """
+    text = normalize(user_input)
+    found = EVENTS_QUERY.fullmatch(text)
+    # A bare period ("today") is too ambiguous to answer without the agent
+    if found and (found["ask"] or found["subject"]):
+        part = found["part"]
+        if part and found["period"] not in ("today", "tomorrow"):
+            return None
+        return "events", {"period": found["period"], "part": part}
+    if TASKS_QUERY.fullmatch(text):
+        return "tasks", {}
+    return None
+
+
+# --- Rendering ---
+def _clock(value: str) -> str:
+    return value[11:16] if value and len(value) > 10 else ""
+
+
+def _event_line(event: dict) -> str:
+    start, end = _clock(event["start"]), _clock(event["end"])
+    when = f"{start}–{end}" if start else "All day"
+    location = f" ({event['location']})" if event.get("location") else ""
+    return f"- {when} {event['title']}{location}"
+
+
+def render_events(events: list, period: str, part: str, start: datetime, end: datetime) -> str:
+    label = f"{period} {part}" if part else period
+    heading = label[0].upper() + label[1:]
+    if not events:
+        return f"📅 Nothing on your calendar {label} — you're free."
+
+    count = f"{len(events)} event{'s' if len(events) != 1 else ''}"
+    if end - start <= timedelta(days=1):
+        return f"📅 **{heading}** ({start.strftime('%a %d %b')}) — {count}:\n" + "\n".join(map(_event_line, events))
+
+    lines = [f"📅 **{heading}** ({start.strftime('%d %b')} – {(end - timedelta(seconds=1)).strftime('%d %b')}) — {count}:"]
+    day = None
+    for event in events:
+        event_day = event["start"][:10]
+        if event_day != day:
+            day = event_day
+            lines.append(f"\n**{datetime.strptime(day, '%Y-%m-%d').strftime('%A %d %b')}**")
+        lines.append(_event_line(event))
+    return "\n".join(lines)
+
+
+def render_tasks(tasks: list) -> str:
+    open_tasks = [task for task in tasks if task.get("status") != "completed"]
+    done = len(tasks) - len(open_tasks)
+    if not open_tasks:
+        return "📝 No open tasks." + (f" ({done} completed)" if done else "")
+    open_tasks.sort(key=lambda task: (task.get("due") is None, task.get("due") or ""))
+    lines = [f"📝 You have {len(open_tasks)} open task{'s' if len(open_tasks) != 1 else ''}:"]
+    for task in open_tasks:
+        due = f" — due {task['due']}" if task.get("due") else ""
+        lines.append(f"- {task['title']}{due}")
+    if done:
+        lines.append(f"\n({done} completed)")
+    return "\n".join(lines)
+
+
+# --- Routing ---
+class FastPathStats:
+    """
+    Counts how many chat turns the fast path answered instead of the agent.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.hits = {}    # intent -> count
+        self.errors = 0
+
+    def record(self, intent=None, error=False):
+        with self._lock:
+            self.turns += 1
+            if intent:
+                self.hits[intent] = self.hits.get(intent, 0) + 1
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            hits = sum(self.hits.values())
+            return {
+                "turns": self.turns,
+                "hits": hits,
+                "hit_rate": round(hits / self.turns, 4) if self.turns else 0.0,
+                "hits_by_intent": dict(self.hits),
+                "errors": self.errors,
+            }
+
+
+stats = FastPathStats()
+
+
+class FastPathAnswer:
+    """
+    A templated answer plus the tool call that produced it, so the exchange can be recorded in the agent thread.
+    """
+
+    def __init__(self, intent, text, tool_name, tool_args, result):
+        self.intent = intent
+        self.text = text
+        self.tool_name = tool_name
+        self.tool_args = tool_args
+        self.result = result
+        self.tool_call_id = f"fast_path_{uuid.uuid4().hex}"
+
+
+def try_answer(user_input: str, now: datetime = None):
+    """
+    Answers a recognised read-only question directly from get_events / get_tasks.
+
+    Returns:
+        FastPathAnswer: The answer, or None if the agent should handle the message.
+    """
+    found = match(user_input) if USE_FAST_PATH else None
+    if found is None:
+        stats.record()
+        return None
+
+    intent, params = found
+    # Imported on first use, so importing this module stays cheap at boot
+    from tools import get_events, get_tasks
+
+    try:
+        if intent == "events":
+            start, end = resolve_period(params["period"], params["part"], now)
+            args = {
+                "start_datetime_str": start.strftime('%Y-%m-%d %H:%M:%S'),
+                "end_datetime_str": end.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            events = get_events.invoke(args)
+            text = render_events(events, params["period"], params["part"], start, end)
+            answer = FastPathAnswer(intent, text, get_events.name, args, events)
+        else:
+            tasks = get_tasks.invoke({})
+            answer = FastPathAnswer(intent, render_tasks(tasks), get_tasks.name, {}, tasks)
+    except Exception as e:
+        # Let the agent deal with it (and report the error) instead
+        logging.warning(f"Fast path failed for {intent}, falling back to the agent: {e}")
+        stats.record(error=True)
+        return None
+
+    stats.record(intent)
+    return answer
@@ -0,0 +1,394 @@
+import os
+import json
+import logging
+import threading
+import contextlib
+import contextvars
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import httplib2
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import HttpRequest
+
+import rate_limit
+import telemetry
+import tenants
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ["https://www.googleapis.com/auth/calendar",'https://www.googleapis.com/auth/tasks']
+
+# OAuth token cache and client secrets; override with GOOGLE_TOKEN_PATH / GOOGLE_CREDS_PATH
+TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "/Users/akshaythammana/Ai_Calendar/token.json")
+CREDS_PATH = os.getenv("GOOGLE_CREDS_PATH", "/Users/akshaythammana/Ai_Calendar/creds.json")
+
+# Point every API client at another host (e.g. a local fake server), like "http://127.0.0.1:8765/"
+GOOGLE_API_ROOT = os.getenv("GOOGLE_API_ROOT")
+HTTP_TIMEOUT = 30
+
+# Refresh this long before the access token expires so tool calls never wait on it
+REFRESH_MARGIN = timedelta(minutes=5)
+# Service clients each thread keeps (one per user and API), least recently used evicted first
+MAX_CLIENTS_PER_THREAD = int(os.getenv("CAL_MAX_CLIENTS_PER_THREAD", "64"))
+
+
+_interactive_login = contextvars.ContextVar("cal_interactive_login", default=True)
+
+
+@contextlib.contextmanager
+def without_login():
+    """
+    Runs the block without the browser consent flow: get_creds() raises PermissionError instead of
+    opening it (and holding the credential lock) when no usable token is stored. For background work.
+    """
+    token = _interactive_login.set(False)
+    try:
+        yield
+    finally:
+        _interactive_login.reset(token)
+
+
+class CredentialCache:
+    """
+    Thread-safe, in-process holder for the Google OAuth credentials.
+
+    The token file is read once. When the access token gets close to expiry a
+    single background refresh is started while callers keep using the current
+    token; an already expired token is refreshed synchronously. Only one refresh
+    runs at a time, and the token file is rewritten only when its content changed.
+    """
+
+    def __init__(self, token_path: str, creds_path: str, scopes: list, refresh_margin: timedelta = REFRESH_MARGIN):
+        self.token_path = token_path
+        self.creds_path = creds_path
+        self.scopes = scopes
+        self.refresh_margin = refresh_margin
+
+        self._creds = None
+        self._persisted_json = None
+        self._request = Request()
+        # Held for every load / refresh / login, so they are single-flight
+        self._lock = threading.Lock()
+
+    def get(self) -> Credentials:
+        """
+        Returns valid credentials, loading or refreshing them only when needed.
+        """
+        creds = self._creds
+        if creds is None or not creds.valid:
+            return self._load_or_refresh()
+
+        if self._expires_soon(creds):
+            self._refresh_in_background()
+        return creds
+
+    def _expires_soon(self, creds: Credentials) -> bool:
+        if not creds.expiry:
+            return False
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth uses naive UTC
+        return creds.expiry - self.refresh_margin <= now
+
+    def _load_or_refresh(self) -> Credentials:
+        with self._lock:
+            creds = self._creds
+            # Another thread may have finished the refresh while we were waiting
+            if creds is not None and creds.valid:
+                return creds
+
+            if creds is None:
+                with telemetry.span("credentials", "load"):
+                    token_json = self._read_token()
+                    if token_json is not None:
+                        creds = Credentials.from_authorized_user_info(json.loads(token_json), self.scopes)
+                        self._persisted_json = token_json
+
+            if creds and not creds.valid and creds.refresh_token:
+                try:
+                    self._refresh(creds)
+                except Exception as e:
+                    logger.warning(f"⚠️ Token refresh failed: {e}. Re-authenticating...")
+                    creds = None  # force login
+
+            if not creds or not creds.valid:
+                if not _interactive_login.get():
+                    raise PermissionError("No usable Google token is stored and this call may not sign in")
+                creds = self._login()
+                self._persist(creds)
+
+            self._creds = creds
+            return creds
+
+    def _refresh_in_background(self):
+        # A refresh (background or synchronous) is already in flight
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(target=self._background_refresh, name="creds-refresh", daemon=True).start()
+        except Exception:
+            self._lock.release()
+            raise
+
+    def _background_refresh(self):
+        try:
+            creds = self._creds
+            if creds is not None and creds.refresh_token and self._expires_soon(creds):
+                self._refresh(creds, "background_refresh")
+        except Exception as e:
+            # The current token is still valid; the next call retries synchronously once it expires
+            logger.warning(f"⚠️ Background token refresh failed: {e}")
+        finally:
+            self._lock.release()
+
+    def _refresh(self, creds: Credentials, name: str = "refresh"):
+        with telemetry.span("credentials", name):
+            creds.refresh(self._request)
+        self._persist(creds)
+
+    def _persist(self, creds: Credentials):
+        token_json = creds.to_json()
+        if token_json == self._persisted_json:
+            return
+        self._write_token(token_json)
+        self._persisted_json = token_json
+
+    # --- Token storage (overridden by TenantCredentialCache) ---
+    def _read_token(self):
+        if not os.path.exists(self.token_path):
+            return None
+        with open(self.token_path) as token:
+            return token.read()
+
+    def _write_token(self, token_json: str):
+        tmp_path = f"{self.token_path}.tmp"
+        with open(tmp_path, "w") as token:
+            token.write(token_json)
+        os.replace(tmp_path, self.token_path)
+
+    def _login(self) -> Credentials:
+        flow = InstalledAppFlow.from_client_secrets_file(self.creds_path, self.scopes)
+        return flow.run_local_server(port=0)
+
+
+class TenantCredentialCache(CredentialCache):
+    """
+    CredentialCache for one user of a multi-tenant server, backed by the encrypted TokenVault.
+
+    Each user has their own lock, so one user's refresh never blocks another's.
+    There is no interactive login: a user without a linked account (see
+    link_account.py) gets a PermissionError.
+    """
+
+    def __init__(self, user_id: str, vault: tenants.TokenVault, scopes: list, refresh_margin: timedelta = REFRESH_MARGIN):
+        super().__init__(None, None, scopes, refresh_margin)
+        self.user_id = user_id
+        self.vault = vault
+
+    def _read_token(self):
+        return self.vault.read(self.user_id)
+
+    def _write_token(self, token_json: str):
+        self.vault.write(self.user_id, token_json)
+
+    def _login(self) -> Credentials:
+        raise PermissionError(f"No Google account is linked for user {self.user_id!r}")
+
+
+_credential_cache = CredentialCache(TOKEN_PATH, CREDS_PATH, SCOPES)
+
+_tenant_caches = OrderedDict()  # user id -> TenantCredentialCache, least recently used first
+_tenant_lock = threading.Lock()
+
+
+def _tenant_credentials(user_id: str) -> TenantCredentialCache:
+    with _tenant_lock:
+        cache = _tenant_caches.get(user_id)
+        if cache is None:
+            cache = _tenant_caches[user_id] = TenantCredentialCache(user_id, tenants.vault, SCOPES)
+            while len(_tenant_caches) > tenants.MAX_TENANTS:
+                _tenant_caches.popitem(last=False)
+        else:
+            _tenant_caches.move_to_end(user_id)
+        return cache
+
+
+def get_creds() -> Credentials:
+    """
+    Returns the Google credentials of the current user (see tenants.acting_as()), refreshed ahead of expiry.
+
+    Without a user these are the server's own account (token.json). Users'
+    credentials stay loaded for the MAX_TENANTS most recently active users.
+
+    Raises:
+        PermissionError: The current user has not linked a Google account, or
+            signing in would be needed inside without_login().
+    """
+    user_id = tenants.current_user()
+    if user_id is None:
+        return _credential_cache.get()
+    return _tenant_credentials(user_id).get()
+
+
+# --- Service Client Pool ---
+class TracedHttpRequest(HttpRequest):
+    """
+    HttpRequest whose execute() is rate limited per user and API (see rate_limit.py),
+    retried on quota and transient errors, and timed per attempt and API method
+    (e.g. calendar.events.list) in telemetry.
+    """
+
+    def execute(self, http=None, num_retries=0):
+        name = self.methodId or "unknown"
+
+        def send():
+            with telemetry.span("google_api", name):
+                return super(TracedHttpRequest, self).execute(http=http, num_retries=num_retries)
+
+        return rate_limit.call(name.split(".")[0], name, self.method, send)
+
+
+_discovery_docs = {}
+_discovery_lock = threading.Lock()
+_local = threading.local()
+
+
+def _discovery_doc(api: str, version: str) -> dict:
+    """
+    Returns the bundled discovery document for an API, parsed only once per process.
+    """
+    key = (api, version)
+    doc = _discovery_docs.get(key)
+    if doc is None:
+        with _discovery_lock:
+            doc = _discovery_docs.get(key)
+            if doc is None:
+                doc = json.loads(get_static_doc(api, version))
+                if GOOGLE_API_ROOT:
+                    doc["rootUrl"] = GOOGLE_API_ROOT
+                _discovery_docs[key] = doc
+    return doc
+
+
+def get_service(api: str, version: str, creds: Credentials = None):
+    """
+    Returns a Google API service client that is reused across calls.
+
+    httplib2 connections are not thread-safe, so each thread keeps its own client
+    per user and API (at most MAX_CLIENTS_PER_THREAD, least recently used evicted);
+    the client (and its keep-alive connection) is rebuilt only when the
+    credentials object changes.
+
+    Args:
+        api (str): API name, e.g. 'calendar' or 'tasks'.
+        version (str): API version, e.g. 'v3'.
+        creds (Credentials, optional): Credentials to use. Defaults to get_creds().
+
+    Returns:
+        googleapiclient.discovery.Resource: The service client.
+    """
+    creds = creds or get_creds()
+    services = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = OrderedDict()
+
+    key = (tenants.current_user(), api, version)
+    cached = services.get(key)
+    if cached is not None and cached[0] is creds:
+        services.move_to_end(key)
+        return cached[1]
+
+    with telemetry.span("google_build", f"{api}.{version}"):
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+        service = build_from_document(_discovery_doc(api, version), http=http, requestBuilder=TracedHttpRequest)
+    services[key] = (creds, service)
+    services.move_to_end(key)
+    while len(services) > MAX_CLIENTS_PER_THREAD:
+        services.popitem(last=False)
+    return service
+
+
+def calendar_service(creds: Credentials = None):
+    """
+    Returns the pooled Calendar v3 client for the current thread.
+    """
+    return get_service("calendar", "v3", creds)
+
+
+def tasks_service(creds: Credentials = None):
+    """
+    Returns the pooled Tasks v1 client for the current thread.
+    """
+    return get_service("tasks", "v1", creds)
+
+
+# --- Batch Requests ---
+# Calendar accepts at most 50 calls per batch request
+BATCH_LIMIT = 50
+
+
+def execute_batch(service, requests: list, batch_size: int = BATCH_LIMIT) -> list:
+    """
+    Executes API requests through the batch endpoint, batch_size calls per round trip.
+
+    Each round trip takes one rate-limit token per call in it, since the parts
+    of a batch count against the quota one by one; a batch bigger than the
+    bucket leaves it in debt rather than being split. Calls that fail with
+    quota (or, for reads, transient) errors are sent again in a smaller batch
+    after a backoff, so a bulk job slows down instead of losing items.
+
+    Args:
+        service: The service client the requests were created from.
+        requests (list): HttpRequest objects, e.g. service.events().insert(...).
+        batch_size (int, optional): Maximum number of calls per batch request.
+
+    Returns:
+        list: One (response, exception) pair per request, in input order.
+              Exactly one of the two is None.
+    """
+    results = [None] * len(requests)
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+
+    def send(batch):
+        with telemetry.span("google_api", "batch"):
+            batch.execute()
+
+    if not requests:
+        return results
+    api = (requests[0].methodId or "calendar").split(".")[0]
+
+    for offset in range(0, len(requests), batch_size):
+        pending = list(range(offset, min(offset + batch_size, len(requests))))
+        attempt = 0
+        while pending:
+            batch = service.new_batch_http_request(callback=callback)
+            for index in pending:
+                batch.add(requests[index], request_id=str(index))
+            try:
+                rate_limit.call(api, "batch", "POST", lambda: send(batch), calls=len(pending), credit=False)
+            except Exception as e:
+                # The whole round trip failed, so every call in it failed
+                for index in pending:
+                    results[index] = (None, e)
+                break
+
+            kinds = {
+                index: rate_limit.classify(results[index][1], requests[index].method)
+                for index in pending if results[index][1] is not None
+            }
+            retry = [index for index, kind in kinds.items() if kind]
+            if "quota" not in kinds.values():
+                rate_limit.bucket(api).succeeded(len(pending) - len(kinds))
+            if not retry or not rate_limit.USE_RATE_LIMIT or attempt >= rate_limit.MAX_RETRIES:
+                break
+            kind = "quota" if "quota" in kinds.values() else "transient"
+            rate_limit.retry_in(rate_limit.bucket(api), api, "batch", kind, attempt)
+            attempt += 1
+            pending = retry
+    return results
@@ -0,0 +1,213 @@
+import os
+import json
+import logging
+
+from langchain_core.messages import (
+    AIMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage,
+)
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+# Rough input budget per model call, in tokens (estimated as characters / 4)
+HISTORY_TOKEN_BUDGET = int(os.getenv("CAL_HISTORY_TOKENS", "12000"))
+# Share of the budget kept as verbatim recent turns when older ones are summarized
+RECENT_SHARE = 0.5
+# Tool results from earlier turns longer than this (characters) are compacted
+TOOL_RESULT_CHARS = 600
+# Items listed in a compacted tool result
+COMPACT_ITEMS = 20
+COMPACT_MARK = "[compacted "
+SUMMARY_ID = "history-summary"
+SUMMARY_HEADING = "CONVERSATION SO FAR (summary):\n"
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and CAL, a calendar and task assistant.
+Keep every fact later turns may need: the user's preferences, decisions made, and the titles, times and IDs of events and tasks that were discussed, created or edited.
+Write terse bullet points, at most 200 words, and no preamble.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}"""
+
+
+def estimate_tokens(message) -> int:
+    """
+    Estimates a message's token count from its length (about four characters per token).
+    """
+    content = message.content
+    text = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+    chars = len(text)
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        chars += len(tool_call["name"]) + len(json.dumps(tool_call["args"], ensure_ascii=False))
+    return chars // 4 + 1
+
+
+def _item_line(item) -> str:
+    if not isinstance(item, dict):
+        return str(item)[:80]
+    title = item.get("summary") or item.get("title") or ""
+    when = item.get("start") or item.get("due") or ""
+    if isinstance(when, dict):
+        when = when.get("dateTime") or when.get("date") or ""
+    parts = [f"id={item['id']}" if item.get("id") else "", repr(title) if title else "", str(when)]
+    return " ".join(part for part in parts if part)
+
+
+def compact_tool_result(message: ToolMessage) -> ToolMessage:
+    """
+    Replaces a long tool result with one line per item (ID, title, start), keeping what later turns refer to.
+    """
+    content = message.content
+    if not isinstance(content, str) or len(content) <= TOOL_RESULT_CHARS or content.startswith(COMPACT_MARK):
+        return message
+    try:
+        result = json.loads(content)
+    except ValueError:
+        result = None
+
+    if isinstance(result, dict):
+        result = result.get("items", [result])
+    if isinstance(result, list):
+        lines = [_item_line(item) for item in result[:COMPACT_ITEMS]]
+        if len(result) > COMPACT_ITEMS:
+            lines.append(f"... and {len(result) - COMPACT_ITEMS} more")
+        compacted = f"{COMPACT_MARK}{message.name} result, {len(result)} item(s)]\n" + "\n".join(lines)
+    else:
+        compacted = f"{COMPACT_MARK}{message.name} result] " + content[:TOOL_RESULT_CHARS] + " ..."
+    return message.model_copy(update={"content": compacted})
+
+
+def _turn_starts(messages: list) -> list:
+    # A turn starts at a user message, so cutting there never separates a tool call from its result
+    return [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+
+def _transcript(messages: list) -> str:
+    lines = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            lines.append(f"USER: {message.content}")
+        elif isinstance(message, AIMessage):
+            if message.content:
+                lines.append(f"CAL: {message.content}")
+            for tool_call in message.tool_calls:
+                lines.append(f"CAL called {tool_call['name']}({json.dumps(tool_call['args'], ensure_ascii=False)})")
+        elif isinstance(message, ToolMessage):
+            lines.append(f"{message.name} returned: {compact_tool_result(message).content}")
+    return "\n".join(lines)
+
+
+class HistoryManager:
+    """
+    Keeps each model call within a token budget.
+
+    Used as the agent's pre_model_hook. Tool results from earlier turns are
+    collapsed to one line per item. When the thread still exceeds the budget,
+    the oldest turns are folded into a rolling summary (a second system message)
+    by one extra LLM call, leaving the system prompt and the most recent turns
+    verbatim. The trimmed thread replaces the stored one, so the checkpoint
+    shrinks too and each message is summarized only once.
+
+    Args:
+        llm (BaseChatModel): Model used to write the summary.
+        token_budget (int, optional): Estimated input tokens allowed per model call.
+    """
+
+    def __init__(self, llm, token_budget: int = HISTORY_TOKEN_BUDGET):
+        self.llm = llm
+        self.token_budget = token_budget
+
+    def as_hook(self) -> RunnableLambda:
+        """
+        Returns the hook for create_react_agent(pre_model_hook=...), with sync and async paths.
+        """
+        return RunnableLambda(self.trim, afunc=self.atrim, name="trim_history")
+
+    # --- Hook ---
+    def trim(self, state: dict) -> dict:
+        plan = self._plan(state["messages"])
+        if plan is None:
+            return {}
+        head, summary, old, recent = plan
+        if old:
+            summary = self._summarize(summary, old)
+            if summary is None:
+                return {}
+        return self._rewrite(head, summary, recent)
+
+    async def atrim(self, state: dict) -> dict:
+        plan = self._plan(state["messages"])
+        if plan is None:
+            return {}
+        head, summary, old, recent = plan
+        if old:
+            summary = await self._asummarize(summary, old)
+            if summary is None:
+                return {}
+        return self._rewrite(head, summary, recent)
+
+    # --- Planning ---
+    def _plan(self, messages: list):
+        """
+        Splits the thread into (system head, summary text, turns to summarize, turns to keep),
+        or returns None when nothing needs to change.
+        """
+        head = [m for m in messages[:1] if isinstance(m, SystemMessage)]
+        rest = messages[len(head):]
+        summary = ""
+        if rest and isinstance(rest[0], SystemMessage) and rest[0].id == SUMMARY_ID:
+            summary = rest[0].content.removeprefix(SUMMARY_HEADING)
+            rest = rest[1:]
+
+        starts = _turn_starts(rest)
+        current = starts[-1] if starts else 0
+        # The turn in progress stays verbatim; earlier tool results are compacted
+        compacted = [
+            compact_tool_result(m) if isinstance(m, ToolMessage) and index < current else m
+            for index, m in enumerate(rest)
+        ]
+        changed = any(new is not old for new, old in zip(compacted, rest))
+
+        fixed = sum(map(estimate_tokens, head)) + len(SUMMARY_HEADING + summary) // 4
+        total = fixed + sum(map(estimate_tokens, compacted))
+        if total <= self.token_budget:
+            return (head, summary, [], compacted) if changed else None
+
+        # Keep whole turns, newest first, while they fit in the recent share
+        keep_from = current
+        used = sum(map(estimate_tokens, compacted[current:]))
+        for start in reversed(starts[:-1]):
+            cost = sum(map(estimate_tokens, compacted[start:keep_from]))
+            if fixed + used + cost > self.token_budget * RECENT_SHARE:
+                break
+            keep_from, used = start, used + cost
+        if keep_from == 0 and not changed:
+            return None
+        return head, summary, compacted[:keep_from], compacted[keep_from:]
+
+    def _rewrite(self, head: list, summary: str, recent: list) -> dict:
+        messages = list(head)
+        if summary:
+            messages.append(SystemMessage(content=SUMMARY_HEADING + summary, id=SUMMARY_ID))
+        messages.extend(recent)
+        return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *messages]}
+
+    # --- Summarizing ---
+    def _summary_prompt(self, summary: str, old: list) -> str:
+        return SUMMARY_PROMPT.format(summary=summary or "(none)", messages=_transcript(old))
+
+    def _summarize(self, summary: str, old: list):
+        # None on failure: the thread is left as it is, and the next turn tries again
+        try:
+            return self.llm.invoke(self._summary_prompt(summary, old)).text.strip()
+        except Exception as e:
+            logging.warning(f"History summary failed, keeping {len(old)} old message(s) for the next turn: {e}")
+            return None
+
+    async def _asummarize(self, summary: str, old: list):
+        try:
+            return (await self.llm.ainvoke(self._summary_prompt(summary, old))).text.strip()
+        except Exception as e:
+            logging.warning(f"History summary failed, keeping {len(old)} old message(s) for the next turn: {e}")
+            return None
@@ -0,0 +1,140 @@
+from datetime import datetime, time, timedelta
+
+import pytz
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# Same blocks as the "Working Hours" section of the system prompt
+WORKING_HOURS = [(time(6, 30), time(10, 30)), (time(18, 30), time(22, 30))]
+
+
+class IntervalIndex:
+    """
+    Static interval tree over [start, end) intervals.
+
+    Intervals are kept in a start-sorted array that doubles as an implicit
+    balanced BST (the middle of every range is its root); each node stores the
+    largest end in its subtree, so overlap queries skip whole subtrees that end
+    before the window and run in O(log n + k).
+
+    Args:
+        intervals (list): (start, end, item) tuples; start/end are aware datetimes.
+    """
+
+    def __init__(self, intervals: list):
+        rows = sorted(
+            ((s.timestamp(), e.timestamp(), item) for s, e, item in intervals),
+            key=lambda row: row[0],
+        )
+        self._starts = [row[0] for row in rows]
+        self._ends = [row[1] for row in rows]
+        self._items = [row[2] for row in rows]
+        self._max_end = list(self._ends)
+        self._fill_max_end(0, len(rows))
+
+    def __len__(self):
+        return len(self._items)
+
+    def items(self) -> list:
+        """
+        Returns every item, ordered by start.
+        """
+        return list(self._items)
+
+    def _fill_max_end(self, lo: int, hi: int) -> float:
+        if lo >= hi:
+            return float("-inf")
+        mid = (lo + hi) // 2
+        self._max_end[mid] = max(self._ends[mid], self._fill_max_end(lo, mid), self._fill_max_end(mid + 1, hi))
+        return self._max_end[mid]
+
+    def overlapping(self, start: datetime, end: datetime) -> list:
+        """
+        Returns the items whose interval overlaps [start, end), ordered by start.
+
+        Zero-length intervals count when they fall inside the window.
+        """
+        out = []
+        self._query(0, len(self._items), start.timestamp(), end.timestamp(), out)
+        return out
+
+    def _query(self, lo: int, hi: int, start: float, end: float, out: list):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        # Nothing in this subtree reaches the window
+        if self._max_end[mid] < start:
+            return
+        self._query(lo, mid, start, end, out)
+        if self._starts[mid] < end:
+            if self._ends[mid] > start or self._starts[mid] >= start:
+                out.append(self._items[mid])
+            self._query(mid + 1, hi, start, end, out)
+
+
+def merge_intervals(intervals: list) -> list:
+    """
+    Merges start-sorted (start, end) pairs into disjoint busy blocks.
+    """
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def working_blocks(start: datetime, end: datetime, working_hours: list = WORKING_HOURS) -> list:
+    """
+    Returns the working-hour blocks (IST) that fall inside [start, end), clipped to it.
+    """
+    blocks = []
+    day = start.astimezone(IST).date()
+    last_day = end.astimezone(IST).date()
+    while day <= last_day:
+        for block_start, block_end in working_hours:
+            s = max(IST.localize(datetime.combine(day, block_start)), start)
+            e = min(IST.localize(datetime.combine(day, block_end)), end)
+            if s < e:
+                blocks.append((s, e))
+        day += timedelta(days=1)
+    return blocks
+
+
+def free_slots(busy: list, start: datetime, end: datetime, min_duration: timedelta,
+               working_hours: list = WORKING_HOURS) -> list:
+    """
+    Sweeps the gaps between busy intervals.
+
+    Args:
+        busy (list): Start-sorted (start, end) pairs of busy time.
+        start (datetime): Window start.
+        end (datetime): Window end.
+        min_duration (timedelta): Shortest gap worth returning.
+        working_hours (list, optional): (time, time) IST blocks to search in;
+            None searches the whole window.
+
+    Returns:
+        list: (start, end) free slots of at least min_duration, in order.
+    """
+    blocks = working_blocks(start, end, working_hours) if working_hours else [(start, end)]
+    merged = merge_intervals(busy)
+
+    slots = []
+    i = 0
+    for block_start, block_end in blocks:
+        # Busy blocks are sorted, so skip everything that ended before this block
+        while i < len(merged) and merged[i][1] <= block_start:
+            i += 1
+        cursor = block_start
+        j = i
+        while j < len(merged) and merged[j][0] < block_end:
+            if merged[j][0] - cursor >= min_duration:
+                slots.append((cursor, merged[j][0]))
+            cursor = max(cursor, merged[j][1])
+            j += 1
+        if block_end - cursor >= min_duration:
+            slots.append((cursor, block_end))
+    return slots
@@ -0,0 +1,45 @@
+"""
+Links a user's Google account for the multi-tenant server: runs the OAuth consent flow
+(or imports an existing token.json) and stores the token encrypted in CAL_TOKEN_DIR.
+
+    python link_account.py --generate-key             # prints a key to export as CAL_TOKEN_KEY
+    python link_account.py alice@example.com          # opens the consent screen in a browser
+    python link_account.py alice@example.com --token token.json
+
+The chat UI then acts for that user when opened with ?user=alice@example.com.
+"""
+import argparse
+
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+
+import tenants
+from google_clients import CREDS_PATH, SCOPES
+
+
+def link(user_id: str, token_path: str = None):
+    if token_path:
+        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+    else:
+        flow = InstalledAppFlow.from_client_secrets_file(CREDS_PATH, SCOPES)
+        creds = flow.run_local_server(port=0)
+    if not creds.refresh_token:
+        raise SystemExit("The token has no refresh token, so the server could not keep it valid")
+    tenants.vault.write(user_id, creds.to_json())
+    print(f"✅ Linked {user_id} ({tenants.vault.path(user_id)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("user_id", nargs="?", help="The userId calendar-chat.html will send")
+    parser.add_argument("--token", help="Import this authorized-user token.json instead of running the consent flow")
+    parser.add_argument("--generate-key", action="store_true", help="Print a new Fernet key for CAL_TOKEN_KEY")
+    args = parser.parse_args()
+    if args.generate_key:
+        from cryptography.fernet import Fernet
+
+        print(Fernet.generate_key().decode())
+    elif args.user_id:
+        link(args.user_id, args.token)
+    else:
+        parser.error("user_id is required")
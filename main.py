@@ -1,27 +1,23 @@
 import os
 import sys
+import json
 import uuid
 import logging
+import threading
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 
-# --- LangGraph and LangChain Imports ---
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.prebuilt import create_react_agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-# --- Import Tools ---
-try:
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from tools import (
-        create_event, edit_event_by_id, get_events, get_event_by_name_and_timefarame,
-        get_tasks, get_tasks_by_name, edit_task_by_id, create_multiple_events
-    )
-except ImportError:
-    print("Error: 'tools.py' not found. Please ensure it is in the same directory as this script.")
-    sys.exit(1)
+# LangGraph, LangChain, the Gemini client, googleapiclient and the tools are
+# imported on first use (see Lazy Initialization), so a worker boots in well under a second
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import coalesce
+import fast_path
+import prefetch
+import telemetry
+import tenants
+from response_cache import response_cache
 
 # --- Logging Setup ---
 logging.basicConfig(
@@ -41,8 +37,8 @@ if not GOOGLE_API_KEY:
     raise ValueError("GOOGLE_API not found in environment variables. Please create a .env file and add it.")
 
 # --- System Prompt ---
-today = datetime.now().strftime("%Y-%m-%d")
-system_prompt = f"""
+# Formatted per session by build_system_prompt(), so the date is never stale
+SYSTEM_PROMPT = """
 SYSTEM PROMPT
 
 You are CAL, a highly-capable, friendly, and efficient AI calendar and task assistant.Your job is to help users organize, create, edit, and review their calendar events and tasks.
@@ -51,18 +47,25 @@ Always use the provided tools instead of saying you cannot do something.
 TOOLS AVAILABLE:  
 
 📅 Calendar:  
-- get_events(start_datetime_str=None, end_datetime_str=None): List events between two times (defaults to today → +7 days).  
-- create_event(summary, start_datetime_str, end_datetime_str, description="", location="", attendees=None, reminders=None): Create a calendar event.  
+- get_events(start_datetime_str=None, end_datetime_str=None, verbose=False, calendar_ids=None): List events between two times (defaults to today → +7 days) across the user's calendars, or the given ones.  
+- create_event(summary, start_datetime_str, end_datetime_str, description="", location="", attendees=None, reminders=None, recurrence=None): Create a calendar event; recurrence takes RRULE lines for repeating events.  
 - create_multiple_events(events): Create multiple calendar events at once.  
-- get_event_by_name_and_timefarame(name, start_datetime_str, end_datetime_str, threshold=65, top_k=5): Find an event by name in a time range (fuzzy search).  
-- edit_event_by_id(event_id, updated_fields): Update an event by ID.  
+- get_event_by_name_and_timefarame(name, start_datetime_str, end_datetime_str, threshold=65, top_k=5, verbose=False, calendar_ids=None): Find an event by name in a time range (fuzzy search).  
+- edit_event_by_id(event_id, updated_fields): Update an event by ID (only the fields you pass change).  
+- edit_multiple_events(edits): Edit or reschedule several events in one call; each edit is {{event_id, updated_fields and/or shift_minutes}}.  
+- check_conflicts(start_datetime_str, end_datetime_str, verbose=False, calendar_ids=None): List the events that overlap a time range.  
+- find_free_slots(start_datetime_str=None, end_datetime_str=None, duration_minutes=60, working_hours_only=True): List free gaps of at least the given length.  
+- find_time_blocks(duration_minutes, count=3, start_datetime_str=None, end_datetime_str=None, working_hours_only=True, one_per_day=True, calendar_ids=None): Find the best free blocks of exactly that length (e.g. "three 2-hour study blocks next week"), optionally free in other calendars too.  
+- Events read from several calendars carry a `calendar` field. Creating and editing only works on the user's main calendar.  
 
 📝 Tasks:  
 - list_task_lists(): Show available task lists.  
-- get_tasks(): List all tasks in the default list.  
+- get_tasks(verbose=False): List all tasks in the default list.  
 - create_task(title, notes=None, due=None): Create a new task.  
 - edit_task_by_id(task_id, update_payload): Update a task.  
-- get_tasks_by_name(name, top_n=5, score_cutoff=50): Fuzzy search for tasks.  
+- edit_multiple_tasks(edits): Update several tasks in one call; each edit is {{task_id, update_payload}}.  
+- get_tasks_by_name(name, top_n=5, score_cutoff=50, verbose=False): Fuzzy search for tasks.  
+- Reads return a compact view (id, title, times in IST, category, location / due, status). Pass verbose=True only when you need descriptions, attendees, reminders or notes.  
 
 BEHAVIOR RULES:  
 - Manage time and tasks proactively on the user's behalf.  
@@ -84,6 +87,8 @@ BEHAVIOR RULES:
 
 ### Conflict & Error Handling
 - When conflicts, duplicates, or errors are detected, flag them and suggest direct solutions.  
+- For bulk changes ("move all my STUDY blocks an hour later"), make one edit_multiple_events / edit_multiple_tasks call instead of one edit per item.  
+- Use check_conflicts before creating or moving an event, find_free_slots for free time and find_time_blocks to place blocks of a given length, instead of comparing event lists yourself.  
 
 ### Best Practices
 - Use descriptive, keyword-rich titles.  
@@ -97,12 +102,7 @@ BEHAVIOR RULES:
 - “Next week” = Monday through Sunday of the following calendar week.  
 - Current date (anchor for all calculations): {today}  
 
-Great question 👍 — the **system prompt is your "rules of the road"** for how the agent interprets and manages calendar data.
-The more precise you are, the less guesswork the model does.
-
-Here’s a list of **robustness improvements** you can add, grouped by category:
-
----
+### Detailed Guidelines
 
 ## 🗓 Date & Time Handling
 
@@ -141,6 +141,8 @@ Here’s a list of **robustness improvements** you can add, grouped by category:
 
   * Recognize “every day”, “every Monday”, “weekly”, “monthly”.
   * Default recurrence to **infinite** unless an end date is provided.
+  * Create them once with `recurrence` (e.g. `["RRULE:FREQ=WEEKLY;BYDAY=MO"]`, add `;UNTIL=YYYYMMDD` or `;COUNT=n` for an end), never as many separate events.
+  * Listed occurrences carry a `series_id`: edit the occurrence's `id` to change just that day, or the `series_id` to change every occurrence.
 * For duplicates:
 
   * If event with same title & time exists → flag as duplicate and suggest either merging or skipping.
@@ -190,26 +192,306 @@ Here’s a list of **robustness improvements** you can add, grouped by category:
 * If asked for “free time”, return **time gaps** in the calendar.
 """
 
-# --- LLM + Agent Setup ---
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=GOOGLE_API_KEY)
-
-tools = [
-    create_event, edit_event_by_id, get_events, get_event_by_name_and_timefarame,
-    get_tasks, get_tasks_by_name, edit_task_by_id, create_multiple_events
-]
-
-memory = MemorySaver()
-agent_executor = create_react_agent(llm, tools, checkpointer=memory)
+def build_system_prompt(now=None):
+    """
+    Returns the system prompt for a new session, dated today (or `now`).
+    """
+    return SYSTEM_PROMPT.format(today=(now or datetime.now()).strftime("%Y-%m-%d"))
+
+# --- Lazy Initialization ---
+# Each is built on first use (or by warm_up()); benchmarks may assign them beforehand
+llm = None
+tools = None
+memory = None
+sessions = None
+agent_executor = None
+_init_lock = threading.RLock()
+
+def get_llm():
+    global llm
+    if llm is None:
+        with _init_lock:
+            if llm is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=GOOGLE_API_KEY)
+    return llm
+
+def get_tools():
+    global tools
+    if tools is None:
+        with _init_lock:
+            if tools is None:
+                from tools import (
+                    create_event, edit_event_by_id, get_events, get_event_by_name_and_timefarame,
+                    get_tasks, get_tasks_by_name, edit_task_by_id, create_multiple_events,
+                    check_conflicts, find_free_slots, find_time_blocks, edit_multiple_events, edit_multiple_tasks
+                )
+                tools = [
+                    create_event, edit_event_by_id, get_events, get_event_by_name_and_timefarame,
+                    get_tasks, get_tasks_by_name, edit_task_by_id, create_multiple_events,
+                    check_conflicts, find_free_slots, find_time_blocks, edit_multiple_events, edit_multiple_tasks
+                ]
+    return tools
+
+def get_memory():
+    """
+    Returns the checkpointer, opening it (and the session registry) on first use.
+    """
+    global memory, sessions
+    if sessions is None:
+        with _init_lock:
+            if sessions is None:
+                from checkpointing import SessionRegistry, create_checkpointer
+                # SQLite by default (CAL_CHECKPOINTER); idle and excess sessions are evicted
+                if memory is None:
+                    memory = create_checkpointer()
+                sessions = SessionRegistry(memory)
+    return memory
+
+def build_agent(model):
+    """
+    Builds the ReAct agent over the tools and the shared checkpointer for a chat model.
+    """
+    from langgraph.prebuilt import create_react_agent
+    from history import HistoryManager
+
+    # Keeps each model call within CAL_HISTORY_TOKENS by compacting and summarizing old turns
+    history = HistoryManager(model)
+    return create_react_agent(model, get_tools(), checkpointer=get_memory(), pre_model_hook=history.as_hook())
+
+def get_agent():
+    global agent_executor
+    if agent_executor is None:
+        with _init_lock:
+            if agent_executor is None:
+                agent_executor = build_agent(get_llm())
+    return agent_executor
+
+# --- Readiness ---
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+_warm_up_error = None
+
+def warm_up():
+    """
+    Builds the agent (and with it the tools, checkpointer and LLM client) on a background thread.
+    A failed attempt is retried on the next call.
+
+    Returns:
+        bool: True when the agent is ready.
+    """
+    global _warm_up_thread
+    if agent_executor is not None:
+        return True
+    with _warm_up_lock:
+        if _warm_up_thread is None or not _warm_up_thread.is_alive():
+            _warm_up_thread = threading.Thread(target=_run_warm_up, name="warm-up", daemon=True)
+            _warm_up_thread.start()
+    return False
+
+def _run_warm_up():
+    global _warm_up_error
+    started = datetime.now()
+    try:
+        get_agent()
+        _warm_up_error = None
+        logging.info(f"✅ Agent ready in {(datetime.now() - started).total_seconds():.2f}s")
+    except Exception as e:
+        _warm_up_error = str(e)
+        logging.error(f"Warm-up failed: {e}", exc_info=True)
+
+def readiness():
+    """
+    Returns (body, status code) for /ready: 200 once the agent is built, otherwise 503 (the first probe starts it).
+    """
+    if warm_up():
+        return {"status": "ready"}, 200
+    body = {"status": "starting"}
+    if _warm_up_error:
+        body["last_error"] = _warm_up_error
+    return body, 503
 
 # --- Session Handling ---
 DEFAULT_SESSION_ID = str(uuid.uuid4())  # Default session per server reload
 logging.info(f"✅ New default session id created: {DEFAULT_SESSION_ID}")
 
+def read_user(data):
+    """
+    Returns (user id, error message) for a chat request's optional "userId".
+
+    Without one the turn uses the server's own Google account. The ID must be
+    one that link_account.py stored a token for; it is trusted as sent, so put
+    an authenticating proxy in front when serving several users.
+    """
+    user_id = data.get("userId")
+    if user_id is None or user_id == "":
+        return None, None
+    if not isinstance(user_id, str):
+        return None, "userId must be a string"
+    if not tenants.vault.exists(user_id):
+        return None, "No Google account is linked for this user"
+    return user_id, None
+
+def thread_config(session_id, user_id=None):
+    """
+    Returns the graph config of a chat session; a user's sessions are namespaced so other users cannot load them.
+    """
+    return {"configurable": {"thread_id": f"{user_id}:{session_id}" if user_id else session_id}}
+
+def prefetch_for(args):
+    """
+    Starts prefetching when a /health check asks for it with ?prefetch=1 (as calendar-chat.html does
+    on load), for the ?user= it names or the server's own account. Plain liveness probes never reach
+    Google, and unknown users are ignored, so the check itself always succeeds.
+    """
+    if args.get("prefetch") != "1":
+        return
+    user_id, error = read_user({"userId": args.get("user")})
+    if not error:
+        prefetch.start(user_id)
+
 # --- Health Check Endpoint ---
 @app.route('/health', methods=['GET'])
 def health():
+    prefetch_for(request.args)
     return jsonify({"status": "ok"}), 200
 
+# --- Readiness Endpoint ---
+@app.route('/ready', methods=['GET'])
+def ready():
+    body, status = readiness()
+    return jsonify(body), status
+
+# --- Stats Endpoint ---
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        "fast_path": fast_path.stats.snapshot(),
+        "response_cache": response_cache.snapshot(),
+        "sessions": telemetry.session_usage.snapshot(),
+        "coalescing": coalesce.snapshot(),
+        "prefetch": prefetch.snapshot(),
+    }), 200
+
+# --- Metrics Endpoint ---
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    body, content_type = telemetry.metrics_response()
+    return Response(body, mimetype=content_type)
+
+# --- Chat Helpers ---
+def build_input_message(user_input, config, user_id=None):
+    """
+    Builds the graph input for a user turn, injecting the system prompt only on the first message of a session.
+    Also marks the session as active, which may evict idle sessions, and on a session's first message
+    starts prefetching the user's week and tasks, which then load while the model reads the prompt.
+    """
+    memory = get_memory()
+    sessions.touch(config["configurable"]["thread_id"])
+    now = datetime.now().strftime("%Y-%m-%d %H:%M")
+    user_input_with_date = f"{user_input}\n\nCURRENT DATE & TIME: {now}"
+
+
+    # 👇 Inject system prompt only on first message
+    if not memory.get(config):
+        prefetch.start(user_id)
+        return {
+            "messages": [
+                {"role": "system", "content": build_system_prompt()},
+                {"role": "user", "content": user_input_with_date},
+            ]
+        }
+    return {"messages": [{"role": "user", "content": user_input_with_date}]}
+
+def fast_path_messages(input_message, answer):
+    """
+    Builds the state update recording a fast-path answer in the session, as if the agent had made the tool call,
+    so follow-up turns can refer to the listed events or tasks.
+    """
+    from langchain_core.messages import AIMessage, ToolMessage
+
+    tool_call = {"name": answer.tool_name, "args": answer.tool_args, "id": answer.tool_call_id}
+    return {
+        "messages": [
+            *input_message["messages"],
+            AIMessage(content="", tool_calls=[tool_call]),
+            ToolMessage(content=json.dumps(answer.result), tool_call_id=answer.tool_call_id, name=answer.tool_name),
+            AIMessage(content=answer.text),
+        ]
+    }
+
+def shortcut(user_input, input_message):
+    """
+    Answers a turn without the agent when the fast path or the response cache can.
+
+    Returns:
+        tuple: (response text, state update recording the exchange), or None to run the agent.
+    """
+    from langchain_core.messages import AIMessage
+
+    trace = telemetry.current_turn()
+    answer = fast_path.try_answer(user_input)
+    if answer is not None:
+        if trace is not None:
+            trace.path = "fast_path"
+        logging.info(f"Fast path ({answer.intent}) response: {answer.text}")
+        return answer.text, fast_path_messages(input_message, answer)
+
+    cached = response_cache.get(user_input)
+    if cached is not None:
+        if trace is not None:
+            trace.path = "cache"
+        logging.info(f"Cached response: {cached}")
+        return cached, {"messages": [*input_message["messages"], AIMessage(content=cached)]}
+    return None
+
+def message_text(message):
+    """
+    Returns the plain text of a message whose content may be a string or a list of content parts.
+    """
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+        if isinstance(part, str) or part.get("type") == "text"
+    )
+
+def sse(event, data):
+    """
+    Formats one Server-Sent Event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+STREAM_MODES = ["messages", "updates"]
+
+def stream_events(mode, chunk):
+    """
+    Turns one item of agent_executor.stream(stream_mode=STREAM_MODES) into SSE strings.
+    """
+    from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+    if mode == "messages":
+        message, metadata = chunk
+        # Only the agent node's answer text; tool calls are reported from "updates"
+        if metadata.get("langgraph_node") == "agent" and isinstance(message, AIMessageChunk):
+            text = message_text(message)
+            if text:
+                yield sse("token", {"text": text})
+        return
+
+    for node, update in chunk.items():
+        # Only the agent and tool nodes; the history hook re-emits old messages when it trims
+        if node not in ("agent", "tools"):
+            continue
+        for message in (update or {}).get("messages", []):
+            if isinstance(message, AIMessage):
+                for tool_call in message.tool_calls:
+                    yield sse("tool_start", {"name": tool_call["name"], "args": tool_call["args"]})
+            elif isinstance(message, ToolMessage):
+                yield sse("tool_end", {"name": message.name, "status": message.status})
+
 # --- Chat Endpoint ---
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -221,29 +503,29 @@ def chat():
             logging.warning("No message provided in chat endpoint request.")
             return jsonify({"error": "No message provided"}), 400
 
-        session_id = data.get("sessionId", DEFAULT_SESSION_ID)   # get sessionId from frontend
-        config = {"configurable": {"thread_id": session_id}}
-
+        user_id, error = read_user(data)
+        if error:
+            return jsonify({"error": error}), 403
 
-        now = datetime.now().strftime("%Y-%m-%d %H:%M")
-        user_input_with_date = f"{user_input}\n\nCURRENT DATE & TIME: {now}"
+        session_id = data.get("sessionId", DEFAULT_SESSION_ID)   # get sessionId from frontend
+        config = thread_config(session_id, user_id)
 
+        input_message = build_input_message(user_input, config, user_id)
 
-        # 👇 Inject system prompt only on first message
-        if not memory.get(config):
-            input_message = {
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input_with_date},
-                ]
-            }
-        else:
-            input_message = {"messages": [{"role": "user", "content": user_input_with_date}]}
+        logging.info(f"Received message: '{user_input}' | Session: {session_id}")
 
-        logging.info(f"Received message: '{user_input}' | Session: {DEFAULT_SESSION_ID}")
+        with tenants.acting_as(user_id), telemetry.turn(session_id) as trace:
+            # Common and repeated read-only questions are answered without the LLM
+            hit = shortcut(user_input, input_message)
+            if hit is not None:
+                agent_response, update = hit
+                get_agent().update_state(config, update, as_node="agent")
+                return jsonify({"response": agent_response, "sessionId": session_id})
 
-        final_state = agent_executor.invoke(input_message, config)
-        agent_response = final_state["messages"][-1].content
+            pending = response_cache.prepare(user_input)
+            final_state = get_agent().invoke(input_message, {**config, "callbacks": [trace.callback]})
+            response_cache.store(pending, final_state["messages"])
+            agent_response = message_text(final_state["messages"][-1])
 
         logging.info(f"Agent response: {agent_response}")
 
@@ -256,6 +538,65 @@ def chat():
         logging.error(f"An error occurred: {e}", exc_info=True)
         return jsonify({"error": "An internal server error occurred."}), 500
 
+# --- Streaming Chat Endpoint ---
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Same as /chat, but streams the turn as Server-Sent Events:
+    token (LLM text as it is generated), tool_start / tool_end (tool progress),
+    done (final response) or error.
+    """
+    data = request.get_json(force=True) or {}
+    user_input = data.get('message')
+
+    if not user_input or not isinstance(user_input, str) or not user_input.strip():
+        logging.warning("No message provided in chat stream endpoint request.")
+        return jsonify({"error": "No message provided"}), 400
+
+    user_id, error = read_user(data)
+    if error:
+        return jsonify({"error": error}), 403
+
+    session_id = data.get("sessionId", DEFAULT_SESSION_ID)
+    config = thread_config(session_id, user_id)
+    input_message = build_input_message(user_input, config, user_id)
+
+    logging.info(f"Received streaming message: '{user_input}' | Session: {session_id}")
+
+    def generate():
+        try:
+            # The body runs after this view returns, so the user is set again here
+            with tenants.acting_as(user_id), telemetry.turn(session_id) as trace:
+                hit = shortcut(user_input, input_message)
+                if hit is not None:
+                    agent_response, update = hit
+                    get_agent().update_state(config, update, as_node="agent")
+                    yield sse("token", {"text": agent_response})
+                    yield sse("done", {"response": agent_response, "sessionId": session_id})
+                    return
+
+                pending = response_cache.prepare(user_input)
+                run_config = {**config, "callbacks": [trace.callback]}
+                for mode, chunk in get_agent().stream(input_message, run_config, stream_mode=STREAM_MODES):
+                    yield from stream_events(mode, chunk)
+
+                messages = get_agent().get_state(config).values["messages"]
+                response_cache.store(pending, messages)
+                agent_response = message_text(messages[-1])
+            logging.info(f"Agent response: {agent_response}")
+            yield sse("done", {"response": agent_response, "sessionId": session_id})
+
+        except Exception as e:
+            logging.error(f"An error occurred while streaming: {e}", exc_info=True)
+            yield sse("error", {"error": "An internal server error occurred."})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # --- Main App Runner ---
 if __name__ == '__main__':
+    warm_up()
     app.run(debug=False, port=5000)
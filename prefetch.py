@@ -0,0 +1,79 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import telemetry
+import tenants
+
+logger = logging.getLogger(__name__)
+
+# Load this week's events and the task list in the background when a session starts or the UI asks on /health; CAL_PREFETCH=0 turns it off
+USE_PREFETCH = os.getenv("CAL_PREFETCH", "1") != "0"
+# Seconds prefetched direct reads (mirrors off) keep answering get_events / get_tasks; the mirrors stay fresh on their own
+PREFETCH_TTL = float(os.getenv("CAL_PREFETCH_TTL", "300"))
+PREFETCH_THREADS = int(os.getenv("CAL_PREFETCH_THREADS", "4"))
+# A user is prefetched at most this often, however many sessions or health checks arrive
+MIN_INTERVAL = 10.0
+
+_pool = ThreadPoolExecutor(max_workers=PREFETCH_THREADS, thread_name_prefix="prefetch")
+_started = OrderedDict()  # user -> when their last prefetch started, least recently used first
+_counts = {"started": 0, "skipped": 0, "failed": 0}
+_lock = threading.Lock()
+
+
+def start(user_id: str = None) -> bool:
+    """
+    Starts loading a user's events and tasks on background threads, so the first turn finds them cached.
+
+    Args:
+        user_id (str, optional): The user to prefetch for; None for the server's own account.
+
+    Returns:
+        bool: True if a prefetch was started, False if it is off or ran for this user moments ago.
+    """
+    if not USE_PREFETCH:
+        return False
+    now = time.monotonic()
+    with _lock:
+        last = _started.get(user_id)
+        if last is not None and now - last < MIN_INTERVAL:
+            _counts["skipped"] += 1
+            return False
+        _started[user_id] = now
+        _started.move_to_end(user_id)
+        while len(_started) > tenants.MAX_TENANTS:
+            _started.popitem(last=False)
+        _counts["started"] += 1
+    for kind in ("events", "tasks"):
+        _pool.submit(_warm, user_id, kind)
+    return True
+
+
+def _warm(user_id, kind):
+    try:
+        # Deferred, so importing this module stays cheap at boot
+        import tools
+        from google_clients import without_login
+
+        # Without a stored token this fails fast rather than opening a consent flow on a worker
+        with tenants.acting_as(user_id), without_login(), telemetry.span("prefetch", kind):
+            if kind == "events":
+                tools.prefetch_events(keep=PREFETCH_TTL)
+            else:
+                tools.prefetch_tasks(keep=PREFETCH_TTL)
+    except Exception as e:
+        with _lock:
+            _counts["failed"] += 1
+        logger.warning(f"Prefetching {kind} for {user_id or 'the default account'} failed: {e}")
+
+
+def snapshot() -> dict:
+    """
+    Returns how many prefetches were started and skipped as recent (per user), and how many
+    events / tasks loads failed (two per started prefetch), as totals for /stats.
+    """
+    with _lock:
+        return dict(_counts)
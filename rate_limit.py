@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict
+
+import telemetry
+import tenants
+
+logger = logging.getLogger(__name__)
+
+# Pace Google calls per user and API and retry quota / transient errors; set CAL_RATE_LIMIT=0 to call unthrottled
+USE_RATE_LIMIT = os.getenv("CAL_RATE_LIMIT", "1") != "0"
+# Calls per second per user, the ceiling the adaptive rate climbs back to (Calendar's default quota is 600/min per user)
+API_RATES = {
+    "calendar": float(os.getenv("CAL_CALENDAR_QPS", "10")),
+    "tasks": float(os.getenv("CAL_TASKS_QPS", "10")),
+}
+# Calls that may go out back to back after an idle spell. Google's quotas are per minute, so by default
+# 10 seconds' worth of the API's rate (100 calls at 10/s, two full batches)
+RATE_BURST = float(os.getenv("CAL_RATE_BURST", "0")) or None
+BURST_SECONDS = 10.0
+# Retries of one call after quota / transient errors, with full-jitter exponential backoff
+MAX_RETRIES = int(os.getenv("CAL_MAX_RETRIES", "5"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 32.0
+# Multiplicative decrease on a quota error, additive increase (share of the ceiling) per successful call
+RATE_DECREASE = 0.5
+RATE_INCREASE = 0.02
+MIN_RATE = 0.5
+
+QUOTA_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket whose refill rate adapts to quota errors (AIMD).
+
+    acquire() blocks until enough tokens are available; a request for more
+    tokens than the burst (a batch) waits for a full bucket and leaves it in
+    debt, so the average rate still holds. Each quota error halves the rate
+    (down to MIN_RATE); each success adds back a small share of the ceiling,
+    so bulk jobs settle just under the real quota instead of oscillating
+    between bursts of errors and idle backoff.
+
+    Args:
+        rate (float): Ceiling in tokens per second.
+        burst (float, optional): Bucket size. Defaults to BURST_SECONDS of the rate.
+    """
+
+    def __init__(self, rate: float, burst: float = None):
+        self.ceiling = rate
+        self.rate = rate
+        self.burst = max(burst or rate * BURST_SECONDS, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Takes tokens, sleeping until they are available.
+
+        Returns:
+            float: Seconds waited.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                needed = min(tokens, self.burst)
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def throttled(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(MIN_RATE, self.rate * RATE_DECREASE)
+            # Also stop the calls already queued from going out at the old pace
+            self._tokens = min(self._tokens, 0.0)
+
+    def succeeded(self, calls: int = 1):
+        if self.rate >= self.ceiling:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.ceiling, self.rate + self.ceiling * RATE_INCREASE * calls)
+
+
+_buckets = OrderedDict()  # (user, api) -> TokenBucket, least recently used first
+_buckets_lock = threading.Lock()
+
+
+def bucket(api: str) -> TokenBucket:
+    """
+    Returns the current user's bucket for an API ('calendar', 'tasks'), shared by all threads.
+    """
+    key = (tenants.current_user(), api)
+    with _buckets_lock:
+        found = _buckets.get(key)
+        if found is None:
+            found = _buckets[key] = TokenBucket(API_RATES.get(api, API_RATES["calendar"]), RATE_BURST)
+            while len(_buckets) > 2 * tenants.MAX_TENANTS:
+                _buckets.popitem(last=False)
+        else:
+            _buckets.move_to_end(key)
+        return found
+
+
+def _reason(error) -> str:
+    try:
+        details = json.loads(error.content)["error"]
+        return (details.get("errors") or [{}])[0].get("reason") or details.get("status", "")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return ""
+
+
+def classify(error, method: str = "GET"):
+    """
+    Returns "quota" for rate-limit errors (safe to retry: Google did not run the call), "transient" for
+    server errors on idempotent methods, or None when the error must not be retried.
+    """
+    status = getattr(getattr(error, "resp", None), "status", None)
+    if status == 429 or (status == 403 and _reason(error) in QUOTA_REASONS):
+        return "quota"
+    # A failed insert / patch may still have been applied, so only reads are retried on 5xx
+    if status in TRANSIENT_STATUSES and method in ("GET", "HEAD"):
+        return "transient"
+    return None
+
+
+def backoff(attempt: int, error=None) -> float:
+    """
+    Returns the delay before retry number `attempt` (from 0): Retry-After if the server sent one, else full jitter.
+    """
+    resp = getattr(error, "resp", None)
+    retry_after = resp.get("retry-after") if resp is not None else None
+    if retry_after and str(retry_after).isdigit():
+        return float(retry_after)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def call(api: str, name: str, method: str, send, calls: int = 1, credit: bool = True):
+    """
+    Runs send() under the API's rate limit, retrying quota and transient errors with backoff.
+
+    Args:
+        api (str): 'calendar' or 'tasks'.
+        name (str): Method ID for logs and metrics, e.g. 'calendar.events.insert'.
+        method (str): HTTP method, which decides whether server errors are retried.
+        send (callable): Makes the HTTP call; raises googleapiclient.errors.HttpError.
+        calls (int, optional): Quota units the call uses (the number of calls in a batch).
+        credit (bool, optional): Count a success towards raising the rate again; batches
+            do this themselves, since their parts can fail on their own.
+
+    Returns:
+        Whatever send() returns.
+    """
+    if not USE_RATE_LIMIT:
+        return send()
+    limiter = bucket(api)
+    attempt = 0
+    while True:
+        limiter.acquire(calls)
+        try:
+            result = send()
+        except Exception as e:
+            kind = classify(e, method)
+            if kind is None or attempt >= MAX_RETRIES:
+                raise
+            retry_in(limiter, api, name, kind, attempt, e)
+            attempt += 1
+            continue
+        if credit:
+            limiter.succeeded(calls)
+        return result
+
+
+def retry_in(limiter: TokenBucket, api: str, name: str, kind: str, attempt: int, error=None):
+    """
+    Records a retryable failure (slowing the bucket for quota errors) and sleeps out the backoff.
+    """
+    if kind == "quota":
+        limiter.throttled()
+    delay = backoff(attempt, error)
+    telemetry.GOOGLE_RETRIES.labels(api, kind).inc()
+    logger.warning(f"⚠️ {name}: {kind} error, retry {attempt + 1}/{MAX_RETRIES} in {delay:.2f}s (rate {limiter.rate:.1f}/s)")
+    time.sleep(delay)
@@ -0,0 +1,237 @@
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytz
+from dateutil.rrule import rrulestr, rruleset
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# Fetch recurring events as one master (plus its exceptions) and expand the
+# occurrences locally; set CAL_EXPAND_RECURRENCE=0 to download every instance (singleEvents=True)
+EXPAND_RECURRENCE = os.getenv("CAL_EXPAND_RECURRENCE", "1") != "0"
+# Safety net for rules without an end queried over a huge window
+MAX_OCCURRENCES = 5000
+
+
+def is_master(event: dict) -> bool:
+    return bool(event.get("recurrence"))
+
+
+def _all_day(value: dict) -> bool:
+    return "dateTime" not in value
+
+
+def _series_zone(master: dict):
+    name = master["start"].get("timeZone")
+    return ZoneInfo(name) if name else None
+
+
+def instance_key(value: dict) -> str:
+    """
+    Returns the suffix Google gives an instance ID for an (original) start: '20250106T033000Z', or '20250106' all day.
+    """
+    if _all_day(value):
+        return value["date"].replace("-", "")
+    return datetime.fromisoformat(value["dateTime"]).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def instance_id(master_id: str, value: dict) -> str:
+    return f"{master_id}_{instance_key(value)}"
+
+
+def _dtstart(master: dict) -> datetime:
+    value = master["start"]
+    if _all_day(value):
+        return datetime.combine(date.fromisoformat(value["date"]), time())
+    start = datetime.fromisoformat(value["dateTime"])
+    zone = _series_zone(master)
+    # Occurrences keep the wall-clock time of the series' zone across DST changes
+    return start.astimezone(zone) if zone else start
+
+
+def _parse_value(raw: str, params: dict, dtstart: datetime) -> datetime:
+    """
+    Parses one RDATE / EXDATE value into the same kind of datetime as dtstart (aware for timed series, naive all day).
+    """
+    if "T" not in raw:
+        day = date(int(raw[:4]), int(raw[4:6]), int(raw[6:8]))
+        return datetime.combine(day, dtstart.timetz() if dtstart.tzinfo else dtstart.time())
+    moment = datetime.strptime(raw.rstrip("Z"), "%Y%m%dT%H%M%S")
+    if dtstart.tzinfo is None:
+        return datetime.combine(moment.date(), time())
+    if raw.endswith("Z"):
+        return moment.replace(tzinfo=timezone.utc)
+    # A TZID parameter, or else floating time in the series' zone
+    return moment.replace(tzinfo=ZoneInfo(params["TZID"]) if "TZID" in params else dtstart.tzinfo)
+
+
+def _rule(line: str, dtstart: datetime):
+    # dateutil wants UNTIL in UTC for a timezone-aware DTSTART and without a zone otherwise
+    parts = []
+    for part in line.split(":", 1)[1].split(";"):
+        if part.upper().startswith("UNTIL="):
+            until = part[6:]
+            if dtstart.tzinfo is None:
+                part = f"UNTIL={until[:8]}"
+            elif "T" not in until:
+                # Date-only UNTIL: through the end of that day in the series' zone
+                end_of_day = datetime.combine(date(int(until[:4]), int(until[4:6]), int(until[6:8])), time(23, 59, 59), dtstart.tzinfo)
+                part = "UNTIL=" + end_of_day.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            elif not until.endswith("Z"):
+                part = "UNTIL=" + datetime.strptime(until, "%Y%m%dT%H%M%S").replace(tzinfo=dtstart.tzinfo).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        parts.append(part)
+    return rrulestr(";".join(parts), dtstart=dtstart)
+
+
+def rule_set(recurrence: list, dtstart: datetime) -> rruleset:
+    """
+    Builds the occurrence set of RRULE / EXRULE / RDATE / EXDATE lines (RFC 5545) starting at dtstart.
+
+    Raises:
+        ValueError: A line is not a valid recurrence rule or date list.
+    """
+    rules = rruleset()
+    for line in recurrence:
+        name, _, values = line.partition(":")
+        name, *raw_params = name.split(";")
+        params = dict(param.split("=", 1) for param in raw_params if "=" in param)
+        name = name.upper()
+        if name == "RRULE":
+            rules.rrule(_rule(line, dtstart))
+        elif name == "EXRULE":
+            rules.exrule(_rule(line, dtstart))
+        elif name in ("RDATE", "EXDATE"):
+            for raw in values.split(","):
+                moment = _parse_value(raw.strip(), params, dtstart)
+                (rules.rdate if name == "RDATE" else rules.exdate)(moment)
+        else:
+            raise ValueError(f"Unsupported recurrence line: {line!r}")
+    # DTSTART is the first occurrence, unless an EXDATE removes it
+    rules.rdate(dtstart)
+    return rules
+
+
+def normalize_recurrence(recurrence: list) -> list:
+    """
+    Checks recurrence lines for create_event, accepting bare rules ('FREQ=WEEKLY;BYDAY=MO') as RRULEs.
+
+    Raises:
+        ValueError: A line does not parse.
+    """
+    lines = [line if ":" in line else f"RRULE:{line}" for line in (line.strip() for line in recurrence) if line]
+    rule_set(lines, datetime(2000, 1, 1, tzinfo=timezone.utc))
+    return lines
+
+
+def _instance(master: dict, start: datetime, duration: timedelta) -> dict:
+    """
+    Builds the instance resource Google would return (with singleEvents=True) for one occurrence.
+    """
+    instance = {key: value for key, value in master.items() if key not in ("id", "etag", "recurrence")}
+    if _all_day(master["start"]):
+        start_value = {"date": start.date().isoformat()}
+        end_value = {"date": (start + duration).date().isoformat()}
+    else:
+        end_zone = master["end"].get("timeZone")
+        end = start + duration
+        start_value = {"dateTime": start.isoformat()}
+        end_value = {"dateTime": (end.astimezone(ZoneInfo(end_zone)) if end_zone else end).isoformat()}
+        if master["start"].get("timeZone"):
+            start_value["timeZone"] = master["start"]["timeZone"]
+        if end_zone:
+            end_value["timeZone"] = end_zone
+    instance.update(
+        id=instance_id(master["id"], start_value),
+        recurringEventId=master["id"],
+        originalStartTime=dict(start_value),
+        start=start_value,
+        end=end_value,
+    )
+    return instance
+
+
+def _duration(master: dict, dtstart: datetime) -> timedelta:
+    end = master["end"]
+    if _all_day(end):
+        return datetime.combine(date.fromisoformat(end["date"]), time()) - dtstart
+    return datetime.fromisoformat(end["dateTime"]) - dtstart
+
+
+def occurrences(master: dict, start: datetime, end: datetime, skip=frozenset()) -> list:
+    """
+    Expands a recurring master into the instances overlapping [start, end), in order.
+
+    Args:
+        master (dict): Event resource with a recurrence list.
+        start (datetime): Aware window start.
+        end (datetime): Aware window end.
+        skip (set, optional): Instance keys (see instance_key()) to leave out: cancelled or modified instances.
+
+    Returns:
+        list: Instance resources, like the API's singleEvents=True expansion.
+    """
+    dtstart = _dtstart(master)
+    duration = _duration(master, dtstart)
+    rules = rule_set(master["recurrence"], dtstart)
+    if dtstart.tzinfo is None:
+        # All-day occurrences are anchored to IST midnight, like event_store's event times
+        lo, hi = start.astimezone(IST).replace(tzinfo=None), end.astimezone(IST).replace(tzinfo=None)
+    else:
+        lo, hi = start, end
+
+    instances = []
+    # Occurrences starting up to one duration before the window still overlap it
+    for moment in rules.xafter(lo - duration, count=MAX_OCCURRENCES, inc=False):
+        if moment >= hi:
+            break
+        instance = _instance(master, moment, duration)
+        if instance_key(instance["originalStartTime"]) not in skip:
+            instances.append(instance)
+    return instances
+
+
+def occurrence(master: dict, key: str):
+    """
+    Returns the instance of a master whose instance key is `key`, or None if the series has no such occurrence.
+    """
+    dtstart = _dtstart(master)
+    try:
+        if dtstart.tzinfo is None:
+            moment = datetime.strptime(key, "%Y%m%d")
+        else:
+            moment = datetime.strptime(key, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc).astimezone(dtstart.tzinfo)
+    except ValueError:
+        return None
+    if moment not in rule_set(master["recurrence"], dtstart).between(moment, moment, inc=True):
+        return None
+    return _instance(master, moment, _duration(master, dtstart))
+
+
+def expand(items: list, start: datetime, end: datetime, event_start, event_end) -> list:
+    """
+    Turns a singleEvents=False listing (masters, one-off events, exceptions) into the instances overlapping [start, end).
+
+    Args:
+        items (list): Event resources from events.list(singleEvents=False).
+        start (datetime): Aware window start.
+        end (datetime): Aware window end.
+        event_start (callable): Returns an event's aware start.
+        event_end (callable): Returns an event's aware end.
+
+    Returns:
+        list: Events overlapping the window, ordered by start.
+    """
+    masters, singles, overridden = [], [], {}
+    for event in items:
+        if event.get("recurringEventId") and event.get("originalStartTime"):
+            overridden.setdefault(event["recurringEventId"], set()).add(instance_key(event["originalStartTime"]))
+        if event.get("status") == "cancelled":
+            continue
+        (masters if is_master(event) else singles).append(event)
+
+    events = [event for event in singles if event_end(event) > start and event_start(event) < end]
+    for master in masters:
+        events.extend(occurrences(master, start, end, overridden.get(master["id"], frozenset())))
+    events.sort(key=event_start)
+    return events
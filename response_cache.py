@@ -0,0 +1,176 @@
+import os
+import re
+import time
+import threading
+from datetime import datetime
+from collections import OrderedDict
+
+import tenants
+from fast_path import IST, find_window, normalize
+
+# Cache agent answers to read-only questions; set CAL_RESPONSE_CACHE=0 to disable
+USE_RESPONSE_CACHE = os.getenv("CAL_RESPONSE_CACHE", "1") != "0"
+RESPONSE_CACHE_TTL = float(os.getenv("CAL_RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("CAL_RESPONSE_CACHE_SIZE", "256"))
+
+# Tools whose results an answer may be cached on, and the data each one reads
+READ_TOOLS = {
+    "get_events": "events",
+    "get_event_by_name_and_timefarame": "events",
+    "check_conflicts": "events",
+    "find_free_slots": "events",
+    "find_time_blocks": "events",
+    "get_tasks": "tasks",
+    "get_tasks_by_name": "tasks",
+}
+# Messages that lean on earlier turns mean different things in different sessions
+CONTEXTUAL = re.compile(r"\b(it|its|that|those|them|they|these|again|same|above|previous|earlier|instead|else)\b")
+
+
+class ResponseCache:
+    """
+    LRU cache of agent answers to read-only questions, shared by all sessions of a user.
+
+    Entries are keyed on the user, the normalized question and the date window it
+    resolves to (today's date when it names none, since relative questions
+    change meaning at midnight). An answer is only stored when every tool the
+    agent called was a read, and it records the version of the data those
+    tools read (see tools.data_versions()), taken from the mirrors the turn's
+    reads just synced rather than by syncing again. Any write through the tools or
+    change picked up by a sync bumps the version, so affected entries stop
+    matching; entries also expire after `ttl` seconds.
+
+    Args:
+        max_entries (int, optional): Most answers to keep.
+        ttl (float, optional): Seconds an answer stays valid.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored at, {kind: version}, response)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def key(self, user_input: str, now: datetime = None):
+        """
+        Returns the cache key for a message, or None if its answer must not be shared.
+        """
+        if not USE_RESPONSE_CACHE:
+            return None
+        text = normalize(user_input)
+        if not text or CONTEXTUAL.search(text):
+            return None
+        now = now or datetime.now(IST)
+        window = find_window(text, now) or (now.date(),)
+        return (tenants.current_user(), text, *(value.isoformat() for value in window))
+
+    def get(self, user_input: str):
+        """
+        Returns the cached answer for a message, or None.
+        """
+        key = self.key(user_input)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            self._count(miss=True)
+            return None
+
+        stored_at, versions, response = entry
+        # Imported here, like in prepare(), so importing this module stays cheap at boot
+        from tools import data_versions
+
+        current = data_versions(versions)
+        if time.monotonic() - stored_at > self.ttl or any(current[kind] != version for kind, version in versions.items()):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            self._count(miss=True, stale=True)
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        self._count()
+        return response
+
+    def prepare(self, user_input: str):
+        """
+        Captures the key and write counters before an agent turn, for store().
+        Nothing is synced, so the turn never waits on Google before the model starts.
+
+        Returns:
+            tuple: (key, write counters), or None if the answer must not be cached.
+        """
+        key = self.key(user_input)
+        if key is None:
+            return None
+        from tools import write_versions
+
+        return key, write_versions()
+
+    def store(self, pending, messages: list):
+        """
+        Caches the answer of a finished agent turn if it only read data.
+
+        Args:
+            pending (tuple): What prepare() returned before the turn.
+            messages (list): The thread's messages after the turn.
+        """
+        if pending is None:
+            return
+        key, writes = pending
+
+        turn = []
+        for message in reversed(messages):
+            if message.type == "human":
+                break
+            turn.append(message)
+        tool_names = [call["name"] for message in turn if message.type == "ai" for call in message.tool_calls]
+        # Unread data or any write makes the answer unsafe to reuse
+        if not tool_names or any(name not in READ_TOOLS for name in tool_names) or not turn:
+            return
+
+        response = turn[0].text
+        if not response:
+            return
+        kinds = {READ_TOOLS[name] for name in tool_names}
+        from tools import data_versions, write_versions
+
+        # A write from another session during the turn may postdate what the tools read
+        if write_versions(kinds) != {kind: writes[kind] for kind in kinds}:
+            return
+        # The turn's reads synced the mirrors, so their current versions describe what the answer was built from
+        versions = data_versions(kinds, sync=False)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), versions, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, miss=False, stale=False):
+        with self._lock:
+            if miss:
+                self.misses += 1
+            else:
+                self.hits += 1
+            if stale:
+                self.stale += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,190 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import coalesce
+import tenants
+from google_clients import tasks_service
+from title_index import TitleIndex
+
+# Reads trigger a delta sync when the mirror is older than this (seconds)
+TASK_SYNC_INTERVAL = float(os.getenv("CAL_TASK_SYNC_INTERVAL", "30"))
+PAGE_SIZE = 100  # Tasks API maximum
+# Partial response: the fields the tools read and write back
+TASK_FIELDS = "id,etag,title,notes,status,due,completed,updated,deleted,hidden,parent,position"
+LIST_FIELDS = f"nextPageToken,items({TASK_FIELDS})"
+
+
+class TaskStore:
+    """
+    Local mirror of one Google Tasks list.
+
+    The first sync pages through the whole list; later syncs only ask for tasks
+    updated since the newest `updated` timestamp seen (server clock, so no skew),
+    including deleted and hidden ones so they can be dropped locally. Writes made
+    by the tools are applied immediately through apply().
+
+    Args:
+        tasklist_id (str): The task list to mirror.
+        sync_interval (float, optional): Seconds a sync stays fresh for reads.
+    """
+
+    def __init__(self, tasklist_id: str, sync_interval: float = TASK_SYNC_INTERVAL):
+        self.tasklist_id = tasklist_id
+        self.sync_interval = sync_interval
+        # Bumped whenever the mirrored data changes
+        self.version = 0
+        self.titles = TitleIndex()
+
+        self._tasks = {}          # task id -> task resource, in list order
+        self._updated_min = None  # RFC 3339 watermark for delta syncs
+        self._last_sync = None
+
+        self._lock = threading.RLock()      # guards the mirrored data
+        self._sync_lock = threading.Lock()  # one sync at a time
+
+    # --- Sync ---
+    def sync(self, force: bool = False):
+        """
+        Brings the mirror up to date unless it was synced within sync_interval.
+
+        Args:
+            force (bool, optional): Sync even if the mirror is still fresh.
+        """
+        # Readers that queue behind a running sync are usually answered by it
+        waited = not self._sync_lock.acquire(blocking=False)
+        if waited:
+            self._sync_lock.acquire()
+        try:
+            if not force and self._is_fresh():
+                if waited:
+                    coalesce.record("tasks.sync", "joined")
+                return
+            coalesce.record("tasks.sync", "upstream")
+            if self._updated_min is None:
+                self._full_sync()
+            else:
+                self._delta_sync()
+            self._last_sync = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def _is_fresh(self) -> bool:
+        return self._last_sync is not None and time.monotonic() - self._last_sync < self.sync_interval
+
+    def _list_all(self, **params) -> list:
+        service = tasks_service()
+        items, page_token = [], None
+        while True:
+            result = service.tasks().list(
+                tasklist=self.tasklist_id,
+                maxResults=PAGE_SIZE,
+                pageToken=page_token,
+                fields=LIST_FIELDS,
+                **params,
+            ).execute()
+            items.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return items
+
+    def _advance_watermark(self, items: list, started: str):
+        newest = max((task["updated"] for task in items if task.get("updated")), default=None)
+        candidates = [value for value in (self._updated_min, newest) if value]
+        # Nothing seen yet: fall back to our own clock at the start of the sync
+        self._updated_min = max(candidates) if candidates else started
+
+    def _full_sync(self):
+        started = _now_rfc3339()
+        items = self._list_all()
+        with self._lock:
+            self._tasks = {task["id"]: task for task in items}
+            self.titles.rebuild((task_id, task.get("title", "")) for task_id, task in self._tasks.items())
+            self.version += 1
+        self._advance_watermark(items, started)
+
+    def _delta_sync(self):
+        started = _now_rfc3339()
+        items = self._list_all(updatedMin=self._updated_min, showDeleted=True, showHidden=True)
+        with self._lock:
+            for task in items:
+                current = self._tasks.get(task["id"])
+                # updatedMin is inclusive, so the newest task comes back every time
+                if current is not None and current.get("etag") == task.get("etag"):
+                    continue
+                self._apply(task)
+        self._advance_watermark(items, started)
+
+    # --- Writes ---
+    def apply(self, task: dict):
+        """
+        Writes a created, updated or deleted task resource through to the mirror.
+        """
+        with self._lock:
+            self._apply(task)
+
+    def _apply(self, task: dict):
+        # The default list view hides deleted and hidden (cleared) tasks, so the mirror does too
+        if task.get("deleted") or task.get("hidden"):
+            self._tasks.pop(task["id"], None)
+            self.titles.remove(task["id"])
+        else:
+            self._tasks[task["id"]] = task
+            self.titles.upsert(task["id"], task.get("title", ""))
+        self.version += 1
+
+    # --- Reads ---
+    def get(self, task_id: str) -> dict:
+        """
+        Returns the mirrored task with this ID, or None.
+        """
+        self.sync()
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def all_tasks(self) -> list:
+        """
+        Returns every mirrored task.
+        """
+        self.sync()
+        with self._lock:
+            return list(self._tasks.values())
+
+    def search(self, name: str, limit: int = 5, score_cutoff: float = 0) -> list:
+        """
+        Fuzzy-matches task titles.
+
+        Returns:
+            list: Matching tasks, best match first.
+        """
+        self.sync()
+        with self._lock:
+            return [self._tasks[task_id] for task_id, _ in self.titles.search(name, limit, score_cutoff)]
+
+
+def _now_rfc3339() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+_stores = OrderedDict()  # (user, tasklist_id) -> TaskStore, least recently used first
+_stores_lock = threading.Lock()
+
+
+def get_task_store(tasklist_id: str) -> TaskStore:
+    """
+    Returns the shared mirror for a task list of the current user (see tenants.acting_as()), creating it on first use.
+
+    At most tenants.MAX_MIRRORS mirrors are kept; an evicted one is rebuilt with a full sync when used again.
+    """
+    key = (tenants.current_user(), tasklist_id)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = TaskStore(tasklist_id)
+            while len(_stores) > tenants.MAX_MIRRORS:
+                _stores.popitem(last=False)
+        else:
+            _stores.move_to_end(key)
+    return store
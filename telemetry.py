@@ -0,0 +1,278 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+import contextlib
+import contextvars
+from collections import OrderedDict
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Seconds; covers sub-millisecond mirror reads up to slow multi-step turns
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Per-session usage kept for /stats (least recently active dropped first)
+MAX_TRACKED_SESSIONS = 1000
+# Heaviest sessions listed in /stats, under a hash of their ID
+TOP_SESSIONS = 10
+
+TURN_SECONDS = Histogram(
+    "cal_turn_seconds", "Chat turn latency by how it was answered", ["path"], buckets=LATENCY_BUCKETS,
+)
+TURN_TOOL_CALLS = Histogram(
+    "cal_turn_tool_calls", "Tool calls per chat turn", buckets=(0, 1, 2, 3, 5, 8, 13, 21),
+)
+TURN_TOKENS = Histogram(
+    "cal_turn_tokens", "LLM tokens per chat turn", ["direction"],
+    buckets=(100, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+LLM_TOKENS = Counter("cal_llm_tokens", "LLM tokens", ["direction"])
+GOOGLE_RETRIES = Counter("cal_google_retries", "Google API calls retried, by API and error kind (quota, transient)", ["api", "kind"])
+COALESCED_READS = Counter(
+    "cal_reads", "Calendar / Tasks reads by whether they called the API or were coalesced", ["name", "outcome"],
+)
+
+# One histogram per span kind, all labelled by the span name and outcome
+SPAN_SECONDS = {
+    kind: Histogram(f"cal_{kind}_seconds", description, ["name", "status"], buckets=LATENCY_BUCKETS)
+    for kind, description in {
+        "agent_step": "LangGraph node (agent, tools, pre_model_hook) run time",
+        "llm": "Chat model call time",
+        "tool": "Tool run time",
+        "google_api": "Google API request time (method, or 'batch')",
+        "google_build": "Google API client construction time",
+        "credentials": "OAuth credential load / refresh time",
+        "prefetch": "Background prefetch time for a new session (events, tasks)",
+    }.items()
+}
+
+
+class TurnTrace:
+    """
+    Spans and usage collected during one chat turn.
+
+    Spans opened anywhere while the turn is current (tools, Google API calls,
+    credential refreshes, including on tool threads, which copy the context)
+    are appended to it; the LLM, tool and graph-node spans come from
+    `callback`, which is passed to the agent in the run config.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.path = "agent"
+        self.started = time.perf_counter()
+        self.spans = []  # (kind, name, offset seconds, duration seconds, status)
+        self.tool_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.callback = TelemetryCallback(self)
+        self._lock = threading.Lock()
+
+    def add_span(self, kind, name, started, duration, status):
+        with self._lock:
+            self.spans.append((kind, name, round(started - self.started, 4), round(duration, 4), status))
+
+    def add_tokens(self, input_tokens, output_tokens):
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def summary(self, seconds: float) -> dict:
+        totals = {}
+        for kind, _, _, duration, _ in self.spans:
+            totals[kind] = round(totals.get(kind, 0) + duration, 4)
+        return {
+            "session_id": self.session_id,
+            "path": self.path,
+            "seconds": round(seconds, 4),
+            "seconds_by_kind": totals,
+            "tool_calls": self.tool_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "spans": self.spans,
+        }
+
+
+_current_turn = contextvars.ContextVar("cal_turn", default=None)
+
+
+def current_turn():
+    """
+    Returns the TurnTrace of the chat turn being handled, or None outside a turn.
+    """
+    return _current_turn.get()
+
+
+@contextlib.contextmanager
+def span(kind: str, name: str):
+    """
+    Times a block into the `kind` histogram (labelled name / status) and the current turn, if any.
+    """
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _record(kind, name, started, time.perf_counter() - started, status)
+
+
+def _record(kind, name, started, duration, status):
+    SPAN_SECONDS[kind].labels(name=name, status=status).observe(duration)
+    trace = _current_turn.get()
+    if trace is not None:
+        trace.add_span(kind, name, started, duration, status)
+
+
+class TelemetryCallback(BaseCallbackHandler):
+    """
+    Turns LangChain run events into agent_step / llm / tool spans and token counts for one turn.
+    """
+
+    def __init__(self, trace: TurnTrace):
+        self.trace = trace
+        self._runs = {}  # run id -> (kind, name, started)
+
+    def _start(self, run_id, kind, name):
+        self._runs[run_id] = (kind, name, time.perf_counter())
+
+    def _end(self, run_id, status="ok"):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        kind, name, started = run
+        duration = time.perf_counter() - started
+        SPAN_SECONDS[kind].labels(name=name, status=status).observe(duration)
+        self.trace.add_span(kind, name, started, duration, status)
+
+    # --- Graph nodes ---
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not the runnables nested inside it
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "agent_step", node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error")
+
+    # --- LLM ---
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm", (serialized or {}).get("name") or "chat_model")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm", (serialized or {}).get("name") or "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        self.trace.add_tokens(input_tokens, output_tokens)
+        LLM_TOKENS.labels(direction="input").inc(input_tokens)
+        LLM_TOKENS.labels(direction="output").inc(output_tokens)
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error")
+
+    # --- Tools ---
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.trace.tool_calls += 1
+        self._start(run_id, "tool", (serialized or {}).get("name") or kwargs.get("name") or "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        # A ToolMessage with status "error" means the tool raised and the agent got the error text
+        self._end(run_id, "error" if getattr(output, "status", None) == "error" else "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error")
+
+
+# --- Turns ---
+class SessionUsage:
+    """
+    Running totals per session (turns, tool calls, tokens), for /stats.
+
+    Session IDs double as checkpoint thread IDs, so anyone holding one can
+    continue that conversation; snapshots therefore never contain them.
+    """
+
+    def __init__(self, max_sessions: int = MAX_TRACKED_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, trace: TurnTrace):
+        with self._lock:
+            usage = self._sessions.pop(trace.session_id, None) or {
+                "turns": 0, "tool_calls": 0, "input_tokens": 0, "output_tokens": 0,
+            }
+            usage["turns"] += 1
+            usage["tool_calls"] += trace.tool_calls
+            usage["input_tokens"] += trace.input_tokens
+            usage["output_tokens"] += trace.output_tokens
+            self._sessions[trace.session_id] = usage
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        """
+        Returns totals over the tracked sessions and the TOP_SESSIONS heaviest by tokens, keyed by a short hash of their ID.
+        """
+        with self._lock:
+            sessions = [(session_id, dict(usage)) for session_id, usage in self._sessions.items()]
+        totals = {"sessions": len(sessions), "turns": 0, "tool_calls": 0, "input_tokens": 0, "output_tokens": 0}
+        for _, usage in sessions:
+            for field, value in usage.items():
+                totals[field] += value
+        sessions.sort(key=lambda item: item[1]["input_tokens"] + item[1]["output_tokens"], reverse=True)
+        totals["top"] = [
+            {"session": hashlib.sha256(session_id.encode()).hexdigest()[:12], **usage}
+            for session_id, usage in sessions[:TOP_SESSIONS]
+        ]
+        return totals
+
+
+session_usage = SessionUsage()
+
+
+@contextlib.contextmanager
+def turn(session_id: str):
+    """
+    Traces one chat turn: makes a TurnTrace current, then records it into the metrics and logs its summary.
+
+    Usage:
+        with telemetry.turn(session_id) as trace:
+            agent_executor.invoke(input_message, {**config, "callbacks": [trace.callback]})
+    """
+    trace = TurnTrace(session_id)
+    token = _current_turn.set(trace)
+    try:
+        yield trace
+    except BaseException:
+        trace.path = f"{trace.path}_error"
+        raise
+    finally:
+        _current_turn.reset(token)
+        seconds = time.perf_counter() - trace.started
+        TURN_SECONDS.labels(path=trace.path).observe(seconds)
+        TURN_TOOL_CALLS.observe(trace.tool_calls)
+        TURN_TOKENS.labels(direction="input").observe(trace.input_tokens)
+        TURN_TOKENS.labels(direction="output").observe(trace.output_tokens)
+        session_usage.add(trace)
+        logging.info(f"Turn trace: {json.dumps(trace.summary(seconds))}")
+
+
+def metrics_response():
+    """
+    Returns (body, content type) for a Prometheus scrape.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
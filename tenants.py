@@ -0,0 +1,96 @@
+import os
+import hashlib
+import contextlib
+import contextvars
+
+# Encrypted per-user OAuth tokens live here, one file per user (see link_account.py)
+TOKEN_DIR = os.getenv("CAL_TOKEN_DIR", "tokens")
+# Fernet key for the token files; `python link_account.py --generate-key` makes one
+TOKEN_KEY = os.getenv("CAL_TOKEN_KEY")
+# Live credentials (and their refresh state) kept in memory, least recently used evicted first
+MAX_TENANTS = int(os.getenv("CAL_MAX_TENANTS", "256"))
+# Calendar and task list mirrors kept in memory across all users, least recently used evicted first
+MAX_MIRRORS = int(os.getenv("CAL_MAX_MIRRORS", "512"))
+
+_current_user = contextvars.ContextVar("cal_user", default=None)
+
+
+def current_user():
+    """
+    Returns the user the current request acts for, or None for the server's own account (token.json).
+    """
+    return _current_user.get()
+
+
+@contextlib.contextmanager
+def acting_as(user_id: str = None):
+    """
+    Runs the block on behalf of a user: Google credentials, clients and mirrors are that user's.
+
+    Threads started with a copy of the context (asyncio.to_thread, LangChain tool
+    executors, the calendar fan-out) inherit the user.
+    """
+    token = _current_user.set(user_id or None)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+class TokenVault:
+    """
+    Per-user OAuth tokens, Fernet-encrypted at rest.
+
+    Files are named after a hash of the user ID, so the directory listing does
+    not reveal who has linked an account. Writes go through a temporary file
+    and an atomic rename, and the files are readable by the owner only.
+
+    Args:
+        directory (str, optional): Where the token files are kept.
+        key (str, optional): Fernet key (urlsafe base64, 32 bytes).
+    """
+
+    def __init__(self, directory: str = TOKEN_DIR, key: str = TOKEN_KEY):
+        self.directory = directory
+        self.key = key
+        self._cipher = None
+
+    def _fernet(self):
+        if self._cipher is None:
+            if not self.key:
+                raise RuntimeError("CAL_TOKEN_KEY must be set to store or read per-user tokens")
+            from cryptography.fernet import Fernet
+
+            self._cipher = Fernet(self.key)
+        return self._cipher
+
+    def path(self, user_id: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(user_id.encode()).hexdigest() + ".token")
+
+    def exists(self, user_id: str) -> bool:
+        return os.path.exists(self.path(user_id))
+
+    def read(self, user_id: str):
+        """
+        Returns the user's authorized-user token JSON, or None if the user has not linked an account.
+
+        Raises:
+            cryptography.fernet.InvalidToken: The file was not written with this key.
+        """
+        try:
+            with open(self.path(user_id), "rb") as token:
+                return self._fernet().decrypt(token.read()).decode()
+        except FileNotFoundError:
+            return None
+
+    def write(self, user_id: str, token_json: str):
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = self.path(user_id)
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as token:
+            token.write(self._fernet().encrypt(token_json.encode()))
+        os.replace(tmp_path, path)
+
+
+vault = TokenVault()
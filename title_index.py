@@ -0,0 +1,117 @@
+import threading
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# Above this many candidates, score with cdist across all cores instead of extract
+CDIST_MIN_CHOICES = 5000
+
+
+def normalize_title(title: str) -> str:
+    return (title or "").lower().strip()
+
+
+class TitleIndex:
+    """
+    Fuzzy title lookup over pre-normalized titles.
+
+    Titles are lowercased once when added and kept in one contiguous list, so a
+    search only normalizes the query. Small candidate sets are scored with
+    process.extract (heap-based top-k), large ones with a multi-threaded cdist.
+    Items are added, changed and removed in place as the underlying data changes.
+
+    Args:
+        scorer (callable, optional): rapidfuzz scorer. Defaults to fuzz.partial_ratio ("contains-like").
+    """
+
+    def __init__(self, scorer=fuzz.partial_ratio):
+        self.scorer = scorer
+        self._ids = []
+        self._titles = []
+        self._positions = {}  # item id -> position in _ids / _titles
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def rebuild(self, items):
+        """
+        Replaces the whole index with (id, title) pairs.
+        """
+        with self._lock:
+            self._ids, self._titles, self._positions = [], [], {}
+            for item_id, title in items:
+                self._add(item_id, title)
+
+    def upsert(self, item_id: str, title: str):
+        """
+        Adds an item or updates its title.
+        """
+        with self._lock:
+            position = self._positions.get(item_id)
+            if position is None:
+                self._add(item_id, title)
+            else:
+                self._titles[position] = normalize_title(title)
+
+    def remove(self, item_id: str):
+        """
+        Removes an item if present.
+        """
+        with self._lock:
+            position = self._positions.pop(item_id, None)
+            if position is None:
+                return
+            # Move the last entry into the hole so the lists stay contiguous
+            last_id, last_title = self._ids.pop(), self._titles.pop()
+            if position < len(self._ids):
+                self._ids[position], self._titles[position] = last_id, last_title
+                self._positions[last_id] = position
+
+    def _add(self, item_id, title):
+        self._positions[item_id] = len(self._ids)
+        self._ids.append(item_id)
+        self._titles.append(normalize_title(title))
+
+    def search(self, query: str, limit: int = 5, score_cutoff: float = 0, ids: list = None) -> list:
+        """
+        Returns the best-matching items.
+
+        Args:
+            query (str): Search text.
+            limit (int, optional): Maximum number of matches.
+            score_cutoff (float, optional): Minimum score (0-100); lower scores are rejected early.
+            ids (list, optional): Only consider these item ids, in this order (e.g. a time window).
+
+        Returns:
+            list: (id, score) pairs, best first; ties keep candidate order.
+        """
+        query = normalize_title(query)
+        with self._lock:
+            if ids is None:
+                candidate_ids, titles = list(self._ids), list(self._titles)
+            else:
+                candidate_ids = [i for i in ids if i in self._positions]
+                titles = [self._titles[self._positions[i]] for i in candidate_ids]
+
+        if not titles or limit <= 0:
+            return []
+
+        if len(titles) < CDIST_MIN_CHOICES:
+            matches = process.extract(
+                query, titles, scorer=self.scorer, processor=None, limit=limit, score_cutoff=score_cutoff
+            )
+            return [(candidate_ids[index], score) for _, score, index in matches]
+
+        scores = process.cdist(
+            [query], titles, scorer=self.scorer, processor=None, score_cutoff=score_cutoff, workers=-1
+        )[0]
+        hits = np.flatnonzero(scores >= score_cutoff)
+        if len(hits) > limit:
+            # Keep everything above the k-th best score, then fill with the earliest ties
+            kth = np.partition(scores[hits], len(hits) - limit)[len(hits) - limit]
+            above = hits[scores[hits] > kth]
+            tied = hits[scores[hits] == kth][:limit - len(above)]
+            hits = np.concatenate((above, tied))
+        hits = hits[np.lexsort((hits, -scores[hits]))]
+        return [(candidate_ids[index], float(scores[index])) for index in hits]
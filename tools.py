@@ -1,47 +1,43 @@
-import os.path
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import os
+import re
+import heapq
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from googleapiclient.errors import HttpError
 from datetime import datetime, timedelta
 import pytz
-from rapidfuzz import fuzz
 from typing import List, Dict
 from langchain.tools import tool 
 
+import tenants
+from google_clients import SCOPES, get_creds, calendar_service, tasks_service, execute_batch
+from event_store import EVENT_FIELDS, get_event_store, event_start, event_end
+from task_store import TASK_FIELDS, get_task_store
+from intervals import WORKING_HOURS, free_slots
+from availability import find_blocks
+from recurrence import normalize_recurrence
+from coalesce import SingleFlight
+from title_index import TitleIndex
+
 CALENDAR_ID='ae74fa4fda8818b1fac026895d5eb544540b0799567bd8e16ca771250f6bc1bf@group.calendar.google.com'
 TASKLIST_ID='MjFUS0VlSGtRRldRalhueg'
-
-
-SCOPES = ["https://www.googleapis.com/auth/calendar",'https://www.googleapis.com/auth/tasks']
-
-def get_creds():
-    creds = None
-    token_path = "/Users/akshaythammana/Ai_Calendar/token.json"
-    creds_path = "/Users/akshaythammana/Ai_Calendar/creds.json"
-
-    # Load existing credentials
-    if os.path.exists(token_path):
-        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-
-    # If credentials are not valid, refresh or regenerate
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-            except Exception as e:
-                print(f"⚠️ Token refresh failed: {e}. Re-authenticating...")
-                creds = None  # force login
-        if not creds or not creds.valid:
-            flow = InstalledAppFlow.from_client_secrets_file(creds_path, SCOPES)
-            creds = flow.run_local_server(port=0)
-
-        # Save the new credentials
-        with open(token_path, "w") as token:
-            token.write(creds.to_json())
-
-    return creds
+# Calendars the read tools cover by default (comma-separated IDs); new events still go to CALENDAR_ID
+READ_CALENDAR_IDS = [c.strip() for c in os.getenv("CAL_READ_CALENDARS", CALENDAR_ID).split(",") if c.strip()]
+# Signed-in users (tenants.acting_as()) use their own primary calendar and default task list
+USER_CALENDAR_ID = "primary"
+USER_TASKLIST_ID = "@default"
+# Threads that read several calendars at once
+CALENDAR_THREADS = int(os.getenv("CAL_CALENDAR_THREADS", "8"))
+
+# Serve event reads from the local mirror (event_store.py); set CAL_EVENT_MIRROR=0 to always hit the API
+USE_EVENT_MIRROR = os.getenv("CAL_EVENT_MIRROR", "1") != "0"
+# Same for tasks (task_store.py); set CAL_TASK_MIRROR=0 to always hit the API
+USE_TASK_MIRROR = os.getenv("CAL_TASK_MIRROR", "1") != "0"
+
+# Partial responses for direct API reads: just what the compact projections use
+COMPACT_EVENT_FIELDS = "nextPageToken,items(id,status,summary,location,start,end,transparency,recurringEventId)"
+COMPACT_TASK_FIELDS = "nextPageToken,items(id,title,status,due)"
+CATEGORY_TAG = re.compile(r"^\s*\[([A-Z]+)\]")
 
   
 def convert_ist_to_api_timestamp(date_string: str) -> str:
@@ -85,22 +81,12 @@ def convert_ist_to_api_timestamp(date_string: str) -> str:
         print(f"Error converting timestamp: {e}")
         raise
 
-@tool
-def get_events(start_datetime_str: str = None, end_datetime_str: str = None):
+def resolve_window(start_datetime_str: str = None, end_datetime_str: str = None):
     """
-    Retrieves all Google Calendar events between the specified start and end datetimes.Use this get event in the next day or week
-
-    Args:
-        start_datetime_str (str, optional): Start datetime in '%Y-%m-%d %H:%M:%S' (IST). Defaults to today.
-        end_datetime_str (str, optional): End datetime in '%Y-%m-%d %H:%M:%S' (IST). Defaults to 7 days from start.
+    Resolves optional IST datetime strings into an aware (start, end) pair.
 
-    Returns:
-        list: List of event resource dicts.
+    Defaults to today 00:00 IST → 7 days later, like get_events.
     """
-    # make calendar id gobal variable
-    creds = get_creds()
-
-
     # Handle default dates (now to 7 days later)
     tz = pytz.timezone("Asia/Kolkata")
     now = datetime.now(tz)
@@ -115,20 +101,271 @@ def get_events(start_datetime_str: str = None, end_datetime_str: str = None):
     else:
         end_datetime = convert_ist_to_api_timestamp(end_datetime_str)
 
-    service = build('calendar', 'v3', credentials=creds)
+    return start_datetime, end_datetime
+
+# --- Multi-calendar reads ---
+def main_calendar():
+    """
+    Returns the calendar new events go to: CALENDAR_ID, or a signed-in user's primary calendar.
+    """
+    return CALENDAR_ID if tenants.current_user() is None else USER_CALENDAR_ID
+
+def main_tasklist():
+    """
+    Returns the task list the task tools use: TASKLIST_ID, or a signed-in user's default list.
+    """
+    return TASKLIST_ID if tenants.current_user() is None else USER_TASKLIST_ID
+
+_calendar_pool = ThreadPoolExecutor(max_workers=CALENDAR_THREADS, thread_name_prefix="calendar")
+
+def _calendar_ids(calendar_ids=None):
+    # Requested calendars without duplicates, in order; the configured read set (or the user's calendar) by default
+    if not calendar_ids:
+        calendar_ids = READ_CALENDAR_IDS if tenants.current_user() is None else [USER_CALENDAR_ID]
+    return list(dict.fromkeys(calendar_ids))
+
+def _tagged(calendar_id, events):
+    # Shallow copies, so the mirror's own resources are never modified
+    return [{**event, "calendarId": calendar_id} for event in events]
+
+def _fan_out(fn, calendar_ids):
+    """
+    Runs fn(calendar_id) for every calendar at once and returns the results in calendar order.
+
+    Wall time is that of the slowest calendar. Each call runs in a copy of the
+    caller's context, so its Google API spans land in the current turn trace.
+
+    Raises:
+        ValueError: Some calendars could not be read (not found or no access).
+    """
+    if len(calendar_ids) == 1:
+        return [fn(calendar_ids[0])]
+    futures = [_calendar_pool.submit(contextvars.copy_context().run, fn, calendar_id) for calendar_id in calendar_ids]
+
+    results, unreadable = [], []
+    for calendar_id, future in zip(calendar_ids, futures):
+        try:
+            results.append(future.result())
+        except HttpError as e:
+            if e.resp.status not in (403, 404):
+                raise
+            unreadable.append(calendar_id)
+    if unreadable:
+        raise ValueError(f"Could not read the calendars: {', '.join(unreadable)}")
+    return results
+
+def list_events(start_datetime, end_datetime, verbose=False, calendar_ids=None):
+    """
+    Returns the events overlapping [start_datetime, end_datetime), ordered by start time.
+
+    Several calendars are read concurrently and k-way merged by start time;
+    their events are then copies tagged with "calendarId". A single calendar's
+    events are returned as they are.
+
+    Served from the local calendar mirrors unless CAL_EVENT_MIRROR=0; the mirrors
+    keep recurring events as series and expand them locally. Direct API reads
+    only download the fields compact_event() needs unless verbose is set.
+
+    Args:
+        calendar_ids (list, optional): Calendars to read. Defaults to READ_CALENDAR_IDS.
+    """
+    calendar_ids = _calendar_ids(calendar_ids)
+
+    def read(calendar_id):
+        return _list_calendar_events(calendar_id, start_datetime, end_datetime, verbose)
+
+    per_calendar = _fan_out(read, calendar_ids)
+    if len(calendar_ids) == 1:
+        return per_calendar[0]
+    return list(heapq.merge(
+        *(_tagged(calendar_id, events) for calendar_id, events in zip(calendar_ids, per_calendar)),
+        key=event_start,
+    ))
+
+# --- Coalesced direct reads ---
+# Scopes: (start, end, verbose) for events, verbose for tasks. Verbose results carry every compact field too.
+_event_reads = SingleFlight(
+    "calendar.events.list",
+    covers=lambda call, read: call[0] <= read[0] and read[1] <= call[1] and call[2] >= read[2],
+    narrow=lambda events, read: [event for event in events if event_end(event) > read[0] and event_start(event) < read[1]],
+)
+_task_reads = SingleFlight("tasks.tasks.list", covers=lambda call, read: call >= read, narrow=lambda tasks, read: list(tasks))
+
+def _list_calendar_events(calendar_id, start_datetime, end_datetime, verbose=False, keep=None):
+    if USE_EVENT_MIRROR:
+        return get_event_store(calendar_id).query(start_datetime, end_datetime)
+
+    # The same or a wider window of this calendar, in flight or just read, answers without another call
+    return _event_reads.run(
+        (tenants.current_user(), calendar_id),
+        (start_datetime, end_datetime, verbose),
+        lambda: _fetch_calendar_events(calendar_id, start_datetime, end_datetime, verbose),
+        window=keep,
+    )
+
+def _fetch_calendar_events(calendar_id, start_datetime, end_datetime, verbose=False):
+    creds = get_creds()
+    service = calendar_service(creds)
+
+    fields = f"nextPageToken,items({EVENT_FIELDS})" if verbose else COMPACT_EVENT_FIELDS
+
+    # Follow nextPageToken: a single page stops at 250 events
+    events, page_token = [], None
+    while True:
+        events_result = service.events().list(
+            calendarId=calendar_id,
+            timeMin=start_datetime.isoformat(),
+            timeMax=end_datetime.isoformat(),
+            maxResults=2500,
+            pageToken=page_token,
+            fields=fields,
+            # Google expands series here: a windowed series listing leaves out instances moved
+            # out of the window, so local expansion would show them at their old time
+            singleEvents=True,
+            orderBy="startTime",
+        ).execute()
+        events.extend(events_result.get('items', []))
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return events
+
+# --- Session-start prefetch ---
+def prefetch_window():
+    """
+    Returns the window a new session's first questions usually fall in: this week's Monday
+    00:00 IST to 7 days from today, which covers today, tomorrow, this week and get_events' default.
+    """
+    today, end = resolve_window()
+    return today - timedelta(days=today.weekday()), end
+
+def prefetch_events(keep=None):
+    """
+    Loads prefetch_window() of every read calendar: syncs the mirrors, or with CAL_EVENT_MIRROR=0
+    makes the direct reads that get_events then reuses for `keep` seconds (until a write).
+    """
+    start_datetime, end_datetime = prefetch_window()
+    _fan_out(lambda calendar_id: _list_calendar_events(calendar_id, start_datetime, end_datetime, keep=keep), _calendar_ids())
+
+def prefetch_tasks(keep=None):
+    """
+    Loads the task list get_tasks reads, like prefetch_events().
+    """
+    _list_tasks(keep=keep)
+
+# --- Compact projections ---
+def _category(title):
+    match = CATEGORY_TAG.match(title or "")
+    return match.group(1) if match else None
+
+def _format_event_time(value):
+    if "dateTime" in value:
+        return datetime.fromisoformat(value["dateTime"]).astimezone(pytz.timezone("Asia/Kolkata")).strftime('%Y-%m-%d %H:%M:%S')
+    # All-day events keep their date
+    return value.get("date")
+
+def compact_event(event):
+    """
+    Projects an event resource onto the fields the agent needs, with times in IST ('%Y-%m-%d %H:%M:%S', or a date for all-day events).
+
+    Instances of a recurring event also carry "series_id", the ID that edits the whole series,
+    and events read from several calendars carry "calendar", the calendar they came from.
+    """
+    compact = {
+        "id": event["id"],
+        "title": event.get("summary", ""),
+        "start": _format_event_time(event.get("start", {})),
+        "end": _format_event_time(event.get("end", {})),
+        "category": _category(event.get("summary")),
+        "location": event.get("location"),
+    }
+    if event.get("recurringEventId"):
+        compact["series_id"] = event["recurringEventId"]
+    if event.get("calendarId"):
+        compact["calendar"] = event["calendarId"]
+    return compact
+
+def compact_task(task):
+    """
+    Projects a task resource onto the fields the agent needs (due is a date; the Tasks API ignores the time).
+    """
+    return {
+        "id": task["id"],
+        "title": task.get("title", ""),
+        "due": task["due"][:10] if task.get("due") else None,
+        "status": task.get("status"),
+        "category": _category(task.get("title")),
+    }
+
+def _fuzzy_match(items, title_field, name, limit, score_cutoff):
+    # partial_ratio = "contains-like"; best match first, ties keep the input order
+    index = TitleIndex()
+    index.rebuild((position, item.get(title_field, "")) for position, item in enumerate(items))
+    return [items[position] for position, _ in index.search(name, limit, score_cutoff)]
+
+# Bumped by every write tool, so cached answers go stale even with the mirrors off
+_write_versions = {"events": 0, "tasks": 0}
+
+def write_versions(kinds=("events", "tasks")):
+    """
+    Returns the write counters behind data_versions(), which change only on writes through the tools (no API calls).
+    """
+    return {kind: _write_versions[kind] for kind in kinds}
 
-    events_result = service.events().list(
-        calendarId=CALENDAR_ID,
-        timeMin=start_datetime.isoformat(),
-        timeMax=end_datetime.isoformat(),
-        singleEvents=True,
-        orderBy='startTime'
-    ).execute()
+def data_versions(kinds=("events", "tasks"), sync=True):
+    """
+    Returns a version per data kind ("events", "tasks") that changes whenever that data may have changed:
+    on every write through the tools and on every sync that brings in outside changes.
 
-    return events_result.get('items', [])
+    Args:
+        sync (bool, optional): Bring the mirrors up to date first. Without it the versions describe the
+            data the mirrors last served, at no API cost.
+    """
+    versions = write_versions(kinds)
+    if USE_EVENT_MIRROR and "events" in versions:
+        calendar_ids = _calendar_ids()
+        if sync:
+            _fan_out(lambda calendar_id: get_event_store(calendar_id).sync(), calendar_ids)
+        store_versions = tuple(get_event_store(calendar_id).version for calendar_id in calendar_ids)
+        versions["events"] = (store_versions, versions["events"])
+    if USE_TASK_MIRROR and "tasks" in versions:
+        store = get_task_store(main_tasklist())
+        if sync:
+            store.sync()
+        versions["tasks"] = (store.version, versions["tasks"])
+    return versions
+
+def _write_through(event):
+    _write_versions["events"] += 1
+    _event_reads.invalidate((tenants.current_user(), main_calendar()))
+    if USE_EVENT_MIRROR:
+        get_event_store(main_calendar()).apply(event)
+
+def _write_through_task(task):
+    _write_versions["tasks"] += 1
+    _task_reads.invalidate((tenants.current_user(), main_tasklist()))
+    if USE_TASK_MIRROR:
+        get_task_store(main_tasklist()).apply(task)
 
 @tool
-def create_event(
+def get_events(start_datetime_str: str = None, end_datetime_str: str = None, verbose: bool = False, calendar_ids: List[str] = None):
+    """
+    Retrieves all Google Calendar events between the specified start and end datetimes.Use this get event in the next day or week
+
+    Args:
+        start_datetime_str (str, optional): Start datetime in '%Y-%m-%d %H:%M:%S' (IST). Defaults to today.
+        end_datetime_str (str, optional): End datetime in '%Y-%m-%d %H:%M:%S' (IST). Defaults to 7 days from start.
+        verbose (bool, optional): Return full event resources (description, attendees, reminders, ...) instead of the compact view.
+        calendar_ids (List[str], optional): Calendars to read (IDs or email addresses), merged by start time. Defaults to the user's calendars.
+
+    Returns:
+        list: Events as {"id", "title", "start", "end", "category", "location"} (IST), or full resources if verbose.
+              With several calendars each event also has "calendar", the calendar it came from.
+    """
+    start_datetime, end_datetime = resolve_window(start_datetime_str, end_datetime_str)
+    events = list_events(start_datetime, end_datetime, verbose, calendar_ids)
+    return events if verbose else [compact_event(event) for event in events]
+
+def build_event_body(
     summary: str,
     start_datetime_str: str,
     end_datetime_str: str,
@@ -136,9 +373,10 @@ def create_event(
     location: str = "",
     attendees: List[str] = None,
     reminders: dict = None, 
+    recurrence: List[str] = None,
 ):
     """
-    Creates a new event in the configured Google Calendar.
+    Builds the Calendar API event resource for a new event.
 
     Args:
         summary (str): Event title.
@@ -157,31 +395,13 @@ def create_event(
                     }
                 ]
                 }
+        recurrence (list, optional): RFC 5545 lines for a repeating event, e.g. ["RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10"]
+            or ["RRULE:FREQ=DAILY;UNTIL=20250930", "EXDATE;TZID=Asia/Kolkata:20250815T100000"]. Times repeat in IST.
 
     Returns:
-        dict: The created event resource.
+        dict: The event resource to insert.
     """
-
-    # Step 1: Handle Credentials
-    creds = get_creds()
-    
-    # Handle default dates (now to 7 days later)
-    tz = pytz.timezone("Asia/Kolkata")
-    now = datetime.now(tz)
-
-    if not start_datetime_str:
-        start_datetime= tz.localize(datetime(now.year, now.month, now.day))
-    else:
-        start_datetime = convert_ist_to_api_timestamp(start_datetime_str)
-    
-    if not end_datetime_str:
-        end_datetime = start_datetime + timedelta(days=7)
-    else:
-        end_datetime = convert_ist_to_api_timestamp(end_datetime_str)
-    
-    
-    # Step 2: Build the event data
-    service = build("calendar", "v3", credentials=creds)
+    start_datetime, end_datetime = resolve_window(start_datetime_str, end_datetime_str)
 
     event_body = {
         "summary": summary,
@@ -200,10 +420,51 @@ def create_event(
 
     if attendees:
         event_body["attendees"] = [{"email": email} for email in attendees]
+    if recurrence:
+        event_body["recurrence"] = normalize_recurrence(recurrence)
 
-    # Step 3: Create the event
-    event = service.events().insert(calendarId=CALENDAR_ID, body=event_body).execute()
-    return event
+    return event_body
+
+@tool
+def create_event(
+    summary: str,
+    start_datetime_str: str,
+    end_datetime_str: str,
+    description: str = "",
+    location: str = "",
+    attendees: List[str] = None,
+    reminders: dict = None, 
+    recurrence: List[str] = None,
+):
+    """
+    Creates a new event in the configured Google Calendar.
+
+    Args:
+        summary (str): Event title.
+        start_datetime_str (str): Start datetime in '%Y-%m-%d %H:%M:%S' (IST).
+        end_datetime_str (str): End datetime in '%Y-%m-%d %H:%M:%S' (IST).
+        description (str, optional): Event description.
+        location (str, optional): Event location.
+        attendees (list, optional): List of attendee emails.
+        reminders (dict, optional): Reminder configuration. 
+        Sample reminder format "reminders": {
+                "useDefault": false, // Set to true to use default calendar reminders, false to define custom overrides
+                "overrides": [
+                    {
+                    "method": "email", // Method of reminder: "email" or "popup"
+                    "minutes": 24 * 60 // Minutes before the event start time for the reminder to trigger
+                    }
+                ]
+                }
+        recurrence (list, optional): RFC 5545 lines for a repeating event, e.g. ["RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10"]
+            or ["RRULE:FREQ=DAILY;UNTIL=20250930", "EXDATE;TZID=Asia/Kolkata:20250815T100000"]. Times repeat in IST.
+
+    Returns:
+        dict: The created event resource.
+    """
+    return create_event_non_tool(
+        summary, start_datetime_str, end_datetime_str, description, location, attendees, reminders, recurrence
+    )
 
 def create_event_non_tool(
     summary: str,
@@ -213,6 +474,7 @@ def create_event_non_tool(
     location: str = "",
     attendees: List[str] = None,
     reminders: dict = None, 
+    recurrence: List[str] = None,
 ):
     """
     Creates a new event in the configured Google Calendar.
@@ -234,6 +496,8 @@ def create_event_non_tool(
                     }
                 ]
                 }
+        recurrence (list, optional): RFC 5545 lines for a repeating event, e.g. ["RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10"]
+            or ["RRULE:FREQ=DAILY;UNTIL=20250930", "EXDATE;TZID=Asia/Kolkata:20250815T100000"]. Times repeat in IST.
 
     Returns:
         dict: The created event resource.
@@ -241,45 +505,16 @@ def create_event_non_tool(
 
     # Step 1: Handle Credentials
     creds = get_creds()
-    
-    # Handle default dates (now to 7 days later)
-    tz = pytz.timezone("Asia/Kolkata")
-    now = datetime.now(tz)
 
-    if not start_datetime_str:
-        start_datetime= tz.localize(datetime(now.year, now.month, now.day))
-    else:
-        start_datetime = convert_ist_to_api_timestamp(start_datetime_str)
-    
-    if not end_datetime_str:
-        end_datetime = start_datetime + timedelta(days=7)
-    else:
-        end_datetime = convert_ist_to_api_timestamp(end_datetime_str)
-    
-    
     # Step 2: Build the event data
-    service = build("calendar", "v3", credentials=creds)
-
-    event_body = {
-        "summary": summary,
-        "location": location,
-        "description": description,
-        "start": {
-            "dateTime": start_datetime.isoformat(),
-            "timeZone": "Asia/Kolkata",  # Adjust as needed
-        },
-        "end": {
-            "dateTime": end_datetime.isoformat(),
-            "timeZone": "Asia/Kolkata",
-        },
-        "reminders": reminders or {"useDefault": True},
-    }
-
-    if attendees:
-        event_body["attendees"] = [{"email": email} for email in attendees]
+    service = calendar_service(creds)
+    event_body = build_event_body(
+        summary, start_datetime_str, end_datetime_str, description, location, attendees, reminders, recurrence
+    )
 
     # Step 3: Create the event
-    event = service.events().insert(calendarId=CALENDAR_ID, body=event_body).execute()
+    event = service.events().insert(calendarId=main_calendar(), body=event_body).execute()
+    _write_through(event)
     return event
 
 @tool
@@ -288,7 +523,7 @@ def create_multiple_events(events: List[dict]) -> List[dict]:
     Creates multiple events in the calendar.
 
     Each event must include: summary, start_datetime_str, end_datetime_str.
-    Optional: description, location, attendees, reminders.
+    Optional: description, location, attendees, reminders, recurrence.
 
     Example input:
     [
@@ -300,25 +535,38 @@ def create_multiple_events(events: List[dict]) -> List[dict]:
         ...
     ]
     """
-    results = []
-    for event in events:
+    service = calendar_service(get_creds())
+
+    # Invalid items fail here and never reach the API; the rest go out in batches of 50
+    results = [None] * len(events)
+    requests, positions = [], []
+    for i, event in enumerate(events):
         try:
-            result = create_event_non_tool(
+            event_body = build_event_body(
                 summary=event.get("summary"),
                 start_datetime_str=event.get("start_datetime_str"),
                 end_datetime_str=event.get("end_datetime_str"),
                 description=event.get("description", ""),
                 location=event.get("location", ""),
                 attendees=event.get("attendees"),
-                reminders=event.get("reminders")
+                reminders=event.get("reminders"),
+                recurrence=event.get("recurrence"),
             )
-            results.append(result)
         except Exception as e:
-            results.append({"error": str(e), "event": event})
+            results[i] = {"error": str(e), "event": event}
+            continue
+        requests.append(service.events().insert(calendarId=main_calendar(), body=event_body))
+        positions.append(i)
+
+    for i, (created, error) in zip(positions, execute_batch(service, requests)):
+        if error is None:
+            _write_through(created)
+        results[i] = created if error is None else {"error": str(error), "event": events[i]}
     return results
 
 @tool
-def get_event_by_name_and_timefarame(name: str, start_datetime_str: str, end_datetime_str: str, threshold: int = 65, top_k: int = 5) -> List[Dict]:
+def get_event_by_name_and_timefarame(name: str, start_datetime_str: str, end_datetime_str: str, threshold: int = 65, top_k: int = 5, verbose: bool = False,
+                                     calendar_ids: List[str] = None) -> List[Dict]:
     """
     Gets event based on the partial title and time period. Name can be a part of the title not nessasry the whole title.
     Args:
@@ -327,26 +575,210 @@ def get_event_by_name_and_timefarame(name: str, start_datetime_str: str, end_dat
         end_datetime_str (str): End datetime in '%Y-%m-%d %H:%M:%S' (IST).
         threshold (int, optional): Minimum fuzzy match score (0–100).
         top_k (int, optional): Maximum number of results to return.
+        verbose (bool, optional): Return full event resources instead of the compact view.
+        calendar_ids (List[str], optional): Calendars to search. Defaults to the user's calendars.
 
     Returns:
-        List[dict]: List of matched event resource dicts.
+        List[dict]: Matched events, best match first, in the same shape as get_events.
+    """
+
+    start_datetime, end_datetime = resolve_window(start_datetime_str, end_datetime_str)
+    if USE_EVENT_MIRROR:
+        calendar_ids = _calendar_ids(calendar_ids)
+
+        # Each mirror keeps a title index that is updated as events change
+        def search(calendar_id):
+            store = get_event_store(calendar_id)
+            return store.search(name, start_datetime, end_datetime, top_k, threshold, with_scores=True)
+
+        per_calendar = _fan_out(search, calendar_ids)
+        if len(calendar_ids) == 1:
+            events = [event for event, _ in per_calendar[0]]
+        else:
+            # Every list is best first, so a k-way merge on score gives the overall best
+            merged = heapq.merge(
+                *([({**event, "calendarId": calendar_id}, score) for event, score in matches]
+                  for calendar_id, matches in zip(calendar_ids, per_calendar)),
+                key=lambda match: -match[1],
+            )
+            events = [event for event, _ in merged][:top_k]
+    else:
+        events = _fuzzy_match(list_events(start_datetime, end_datetime, verbose, calendar_ids), "summary", name, top_k, threshold)
+    return events if verbose else [compact_event(event) for event in events]
+
+@tool
+def check_conflicts(start_datetime_str: str, end_datetime_str: str, verbose: bool = False, calendar_ids: List[str] = None) -> List[Dict]:
     """
+    Finds the events that overlap a time range. Use this before creating or moving an event to detect clashes.
 
-    events = get_events(start_datetime_str,end_datetime_str)
-    if not events:
-        print('No events found')
-        return
-    matches = []
+    Args:
+        start_datetime_str (str): Start datetime in '%Y-%m-%d %H:%M:%S' (IST).
+        end_datetime_str (str): End datetime in '%Y-%m-%d %H:%M:%S' (IST).
+        verbose (bool, optional): Return full event resources instead of the compact view.
+        calendar_ids (List[str], optional): Calendars to check. Defaults to the user's calendars.
+
+    Returns:
+        List[dict]: Conflicting events ordered by start time, in the same shape as get_events. Empty if the range is free.
+    """
+    events = list_events(*resolve_window(start_datetime_str, end_datetime_str), verbose, calendar_ids)
+    return events if verbose else [compact_event(event) for event in events]
+
+@tool
+def find_free_slots(start_datetime_str: str = None, end_datetime_str: str = None, duration_minutes: int = 60, working_hours_only: bool = True) -> List[Dict]:
+    """
+    Finds free time gaps of at least duration_minutes between events. Use this for "free time" or "when can I fit X" questions.
+
+    Args:
+        start_datetime_str (str, optional): Start datetime in '%Y-%m-%d %H:%M:%S' (IST). Defaults to now.
+        end_datetime_str (str, optional): End datetime in '%Y-%m-%d %H:%M:%S' (IST). Defaults to 7 days from today.
+        duration_minutes (int, optional): Minimum length of a slot in minutes.
+        working_hours_only (bool, optional): Only search the working hours (6:30-10:30 AM and 6:30-10:30 PM).
+
+    Returns:
+        List[dict]: Free slots as {"start", "end", "duration_minutes"} in IST, in time order.
+    """
+    if duration_minutes <= 0:
+        raise ValueError("duration_minutes must be a positive number of minutes")
+    start_datetime, end_datetime = resolve_window(start_datetime_str, end_datetime_str)
+    # Never suggest time that has already passed
+    start_datetime = max(start_datetime, datetime.now(pytz.utc))
+
+    busy = _busy_intervals(list_events(start_datetime, end_datetime))
+    slots = free_slots(
+        busy, start_datetime, end_datetime, timedelta(minutes=duration_minutes),
+        WORKING_HOURS if working_hours_only else None,
+    )
+    tz = pytz.timezone("Asia/Kolkata")
+    return [
+        {
+            "start": slot_start.astimezone(tz).strftime('%Y-%m-%d %H:%M:%S'),
+            "end": slot_end.astimezone(tz).strftime('%Y-%m-%d %H:%M:%S'),
+            "duration_minutes": int((slot_end - slot_start).total_seconds() // 60),
+        }
+        for slot_start, slot_end in slots
+    ]
 
+def _busy_intervals(events):
+    """
+    Returns the (start, end) busy time of events, skipping those marked as free.
+    """
+    busy = []
     for event in events:
-        title = event.get("summary", "")
-        score = fuzz.partial_ratio(name.lower(), title.lower())  # partial = "contains-like"
-        if score >= threshold:
-            matches.append((score, event))
+        # "transparent" events are marked as free time in Google Calendar
+        if event.get("transparency") == "transparent":
+            continue
+        try:
+            busy.append((event_start(event), event_end(event)))
+        except (KeyError, ValueError):
+            continue
+    return busy
 
-    # Sort by match score descending
-    matches.sort(reverse=True, key=lambda x: x[0])
-    return [event for score, event in matches[:top_k]]
+def _freebusy(calendar_ids, start_datetime, end_datetime):
+    """
+    Returns the busy (start, end) intervals of other calendars in one freebusy query.
+    """
+    result = calendar_service().freebusy().query(body={
+        "timeMin": start_datetime.isoformat(),
+        "timeMax": end_datetime.isoformat(),
+        "timeZone": "Asia/Kolkata",
+        "items": [{"id": calendar_id} for calendar_id in calendar_ids],
+    }).execute()
+
+    busy, unreadable = [], []
+    for calendar_id in calendar_ids:
+        calendar = result.get("calendars", {}).get(calendar_id, {})
+        if calendar.get("errors") or calendar_id not in result.get("calendars", {}):
+            unreadable.append(calendar_id)
+            continue
+        for block in calendar.get("busy", []):
+            busy.append((
+                datetime.fromisoformat(block["start"].replace("Z", "+00:00")),
+                datetime.fromisoformat(block["end"].replace("Z", "+00:00")),
+            ))
+    if unreadable:
+        raise ValueError(f"Could not read the free/busy times of: {', '.join(unreadable)}")
+    return busy
+
+@tool
+def find_time_blocks(duration_minutes: int, count: int = 3, start_datetime_str: str = None, end_datetime_str: str = None,
+                     working_hours_only: bool = True, one_per_day: bool = True, calendar_ids: List[str] = None) -> List[Dict]:
+    """
+    Finds the best free blocks of exactly duration_minutes, e.g. "three 2-hour study blocks next week".
+    Can also require the time to be free in other calendars (shared or colleagues' calendars).
+
+    Args:
+        duration_minutes (int): Length of each block in minutes.
+        count (int, optional): How many blocks to return.
+        start_datetime_str (str, optional): Start datetime in '%Y-%m-%d %H:%M:%S' (IST). Defaults to now.
+        end_datetime_str (str, optional): End datetime in '%Y-%m-%d %H:%M:%S' (IST). Defaults to 7 days from today.
+        working_hours_only (bool, optional): Only search the working hours (6:30-10:30 AM and 6:30-10:30 PM).
+        one_per_day (bool, optional): At most one block per day, to spread them out.
+        calendar_ids (List[str], optional): Other calendars (IDs or email addresses) that must also be free.
+
+    Returns:
+        List[dict]: Blocks as {"start", "end", "duration_minutes", "buffer_minutes"} in IST, best first.
+                    buffer_minutes is the free time on the tighter side of the block (capped at 30).
+    """
+    if duration_minutes <= 0:
+        raise ValueError("duration_minutes must be a positive number of minutes")
+    if count <= 0:
+        raise ValueError("count must be a positive number of blocks")
+    start_datetime, end_datetime = resolve_window(start_datetime_str, end_datetime_str)
+    # Never suggest time that has already passed
+    start_datetime = max(start_datetime, datetime.now(pytz.utc))
+    if start_datetime >= end_datetime:
+        return []
+
+    busy = _busy_intervals(list_events(start_datetime, end_datetime))
+    others = [calendar_id for calendar_id in calendar_ids or [] if calendar_id not in _calendar_ids()]
+    if others:
+        busy.extend(_freebusy(others, start_datetime, end_datetime))
+
+    blocks = find_blocks(
+        busy, start_datetime, end_datetime, timedelta(minutes=duration_minutes), count,
+        WORKING_HOURS if working_hours_only else None, one_per_day,
+    )
+    return [
+        {
+            "start": block_start.strftime('%Y-%m-%d %H:%M:%S'),
+            "end": block_end.strftime('%Y-%m-%d %H:%M:%S'),
+            "duration_minutes": duration_minutes,
+            "buffer_minutes": buffer,
+        }
+        for block_start, block_end, buffer in blocks
+    ]
+
+def _event_patch_body(updated_fields):
+    """
+    Turns the fields an edit asks for into a PATCH body, converting start_datetime_str / end_datetime_str (IST) into start / end.
+    """
+    body = {key: value for key, value in updated_fields.items() if key not in ("start_datetime_str", "end_datetime_str")}
+    for field, key in (("start", "start_datetime_str"), ("end", "end_datetime_str")):
+        if updated_fields.get(key):
+            body[field] = {
+                "dateTime": convert_ist_to_api_timestamp(updated_fields[key]).isoformat(),
+                "timeZone": "Asia/Kolkata"
+            }
+    return body
+
+def _shift_event_time(value, minutes):
+    if "dateTime" in value:
+        shifted = datetime.fromisoformat(value["dateTime"]) + timedelta(minutes=minutes)
+        return dict(value, dateTime=shifted.isoformat())
+    if minutes % (24 * 60):
+        raise ValueError("All-day events can only be shifted by whole days (multiples of 1440 minutes)")
+    return dict(value, date=(datetime.fromisoformat(value["date"]) + timedelta(minutes=minutes)).date().isoformat())
+
+def _if_match(request, resource):
+    # The write fails with 412 instead of overwriting a change made since the resource was read
+    if resource and resource.get("etag"):
+        request.headers["If-Match"] = resource["etag"]
+    return request
+
+def _edit_error(error, kind):
+    if isinstance(error, HttpError) and error.resp.status == 412:
+        return f"The {kind} was changed since it was last read; fetch it again before editing."
+    return str(error)
 
 def edit_event_by_id(event_id, updated_fields):
     """
@@ -354,42 +786,109 @@ def edit_event_by_id(event_id, updated_fields):
 
     Args:
         event_id (str): The event's unique identifier.
-        updated_fields (dict): Fields to update (e.g., {'summary': 'New Title'}).
+        updated_fields (dict): Fields to update (e.g., {'summary': 'New Title'}). Use start_datetime_str /
+            end_datetime_str ('%Y-%m-%d %H:%M:%S', IST) to move the event.
 
     Returns:
-        dict: The updated event resource, or None if update fails.
+        dict: The updated event resource.
     """
-    #WIP convert input start and end time strings to the required format before running
-    if "start_datetime_str" in updated_fields:
-        updated_fields["start"] = {
-        "dateTime": convert_ist_to_api_timestamp(event["start_datetime_str"]).isoformat(),
-        "timeZone": "Asia/Kolkata"
-    }
-    
-    if "end_datetime_str" in updated_fields:
-        updated_fields["end"]={
-        "dateTime": convert_ist_to_api_timestamp(event["start_datetime_str"]).isoformat(),
-        "timeZone": "Asia/Kolkata"
-    }
-    
     creds = get_creds()
-    service = build('calendar', 'v3', credentials=creds)
-    # try:
-        # Get the existing event
-    event = service.events().get(calendarId=CALENDAR_ID, eventId=event_id).execute()
+    service = calendar_service(creds)
 
-    # Update event with new fields
-    event.update(updated_fields)
-
-    # Push the update
-    updated_event = service.events().update(
-        calendarId=CALENDAR_ID,
+    # One PATCH with only the changed fields, guarded by the event's etag: the mirrored one, or
+    # with the mirror off a GET of just the etag
+    request = service.events().patch(
+        calendarId=main_calendar(),
         eventId=event_id,
-        body=event
-    ).execute()
+        body=_event_patch_body(updated_fields)
+    )
+    try:
+        if USE_EVENT_MIRROR:
+            current = get_event_store(main_calendar()).get(event_id)
+        else:
+            current = service.events().get(calendarId=main_calendar(), eventId=event_id, fields="etag").execute()
+        updated_event = _if_match(request, current).execute()
+    except HttpError as e:
+        if e.resp.status == 412 and USE_EVENT_MIRROR:
+            get_event_store(main_calendar()).sync(force=True)
+        raise ValueError(_edit_error(e, "event")) from e
+    _write_through(updated_event)
 
     return updated_event
 
+@tool
+def edit_multiple_events(edits: List[dict]) -> List[dict]:
+    """
+    Edits several events in one go, e.g. "move all my STUDY blocks an hour later". Get the event ids first.
+
+    Each edit must include event_id, and updated_fields and/or shift_minutes:
+    - updated_fields (dict): Fields to change, as for edit_event_by_id (start_datetime_str / end_datetime_str in IST to move).
+    - shift_minutes (int): Move the event by this many minutes (negative = earlier), keeping its length.
+
+    Example input:
+    [
+        {"event_id": "abc123", "shift_minutes": 60},
+        {"event_id": "def456", "updated_fields": {"summary": "[STUDY] Algorithms"}}
+    ]
+
+    Returns:
+        List[dict]: For each edit, in order, the updated event in the same shape as get_events, or {"error", "event_id"}.
+    """
+    service = calendar_service(get_creds())
+    results = [None] * len(edits)
+
+    # Shifts need the current times: use the mirror, and fetch anything else in one batch
+    current = {}
+    if USE_EVENT_MIRROR:
+        store = get_event_store(main_calendar())
+        for edit in edits:
+            # Edits without an ID are reported on their own below
+            event = store.get(edit["event_id"]) if edit.get("event_id") else None
+            if event is not None:
+                current[event["id"]] = event
+    missing = list(dict.fromkeys(
+        edit["event_id"] for edit in edits
+        if edit.get("event_id") and edit.get("shift_minutes") and edit["event_id"] not in current
+    ))
+    fetches = [service.events().get(calendarId=main_calendar(), eventId=event_id) for event_id in missing]
+    for event_id, (event, error) in zip(missing, execute_batch(service, fetches)):
+        if error is None:
+            current[event_id] = event
+
+    requests, positions = [], []
+    for i, edit in enumerate(edits):
+        event_id = edit.get("event_id")
+        try:
+            if not event_id:
+                raise ValueError("event_id is required")
+            body = _event_patch_body(edit.get("updated_fields") or {})
+            if edit.get("shift_minutes"):
+                event = current.get(event_id)
+                if event is None:
+                    raise ValueError(f"Event {event_id} not found")
+                body["start"] = _shift_event_time(event["start"], int(edit["shift_minutes"]))
+                body["end"] = _shift_event_time(event["end"], int(edit["shift_minutes"]))
+            if not body:
+                raise ValueError("Nothing to change: give updated_fields or shift_minutes")
+        except Exception as e:
+            results[i] = {"error": str(e), "event_id": event_id}
+            continue
+        request = service.events().patch(calendarId=main_calendar(), eventId=event_id, body=body)
+        requests.append(_if_match(request, current.get(event_id)))
+        positions.append(i)
+
+    conflicts = False
+    for i, (updated, error) in zip(positions, execute_batch(service, requests)):
+        if error is None:
+            _write_through(updated)
+            results[i] = compact_event(updated)
+        else:
+            conflicts = conflicts or (isinstance(error, HttpError) and error.resp.status == 412)
+            results[i] = {"error": _edit_error(error, "event"), "event_id": edits[i]["event_id"]}
+    if conflicts and USE_EVENT_MIRROR:
+        get_event_store(main_calendar()).sync(force=True)
+    return results
+
 @tool
 def list_task_lists():
     """
@@ -398,28 +897,49 @@ def list_task_lists():
     Prints each task list's title and ID.
     """
     creds = get_creds()
-    service = build('tasks', 'v1', credentials=creds)
+    service = tasks_service(creds)
 
     results = service.tasklists().list(maxResults=10).execute()
     tasklists = results.get('items', [])
     for tl in tasklists:
         print(f"{tl['title']} (ID: {tl['id']})")
 
+def _list_tasks(verbose=False, keep=None):
+    if USE_TASK_MIRROR:
+        return get_task_store(main_tasklist()).all_tasks()
+    return _task_reads.run((tenants.current_user(), main_tasklist()), verbose, lambda: _fetch_tasks(verbose), window=keep)
+
+def _fetch_tasks(verbose=False):
+    creds = get_creds()
+    service = tasks_service(creds)
+
+    # The API returns at most 100 tasks per page
+    tasks, page_token = [], None
+    while True:
+        results = service.tasks().list(
+            tasklist=main_tasklist(),
+            maxResults=100,
+            pageToken=page_token,
+            fields=f"nextPageToken,items({TASK_FIELDS})" if verbose else COMPACT_TASK_FIELDS,
+        ).execute()
+        tasks.extend(results.get('items', []))
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return tasks
+
 @tool
-def get_tasks():
+def get_tasks(verbose: bool = False):
     """
     Lists all tasks in the default task list.
 
-    Prints each task's title,status and ID.
-    """
-    creds = get_creds()
-    service = build('tasks', 'v1', credentials=creds)
-    
+    Args:
+        verbose (bool, optional): Return full task resources (notes, completed, ...) instead of the compact view.
 
-    results = service.tasks().list(tasklist=TASKLIST_ID).execute()
-    tasks = results.get('items', [])
-    for task in tasks:
-        print(f"{task['title']} - Status: {task['status']} - ID:{tasks['id']}")
+    Returns:
+        list: Tasks as {"id", "title", "due", "status", "category"}, or full resources if verbose.
+    """
+    tasks = _list_tasks(verbose)
+    return tasks if verbose else [compact_task(task) for task in tasks]
 
 @tool
 def create_task(title, notes=None, due=None):
@@ -435,14 +955,16 @@ def create_task(title, notes=None, due=None):
         dict: The created task resource.
     """
     creds = get_creds()
-    service = build('tasks', 'v1', credentials=creds)
+    service = tasks_service(creds)
 
     task = {
         'title': title,
         'notes': notes,
         'due': due  # ISO 8601: '2025-08-01T17:00:00.000Z'
     }
-    return service.tasks().insert(tasklist=TASKLIST_ID, body=task).execute()
+    created = service.tasks().insert(tasklist=main_tasklist(), body=task).execute()
+    _write_through_task(created)
+    return created
 
 @tool
 def edit_task_by_id(task_id, update_payload: dict):
@@ -454,29 +976,58 @@ def edit_task_by_id(task_id, update_payload: dict):
         update_payload (dict): Fields to update (e.g., {'title': 'New Title'}).
 
     Returns:
-        dict: The updated task resource, or None if update fails.
+        dict: The updated task resource.
     """
     creds = get_creds()
-    service = build('tasks', 'v1', credentials=creds)
-
+    service = tasks_service(creds)
 
+    # One PATCH with only the changed fields, guarded by the mirrored etag when there is one
+    task = get_task_store(main_tasklist()).get(task_id) if USE_TASK_MIRROR else None
+    request = service.tasks().patch(tasklist=main_tasklist(), task=task_id, body=update_payload)
     try:
-        # Get the current task
-        task = service.tasks().get(tasklist=TASKLIST_ID, task=task_id).execute()
+        updated_task = _if_match(request, task).execute()
+    except HttpError as e:
+        if e.resp.status == 412 and USE_TASK_MIRROR:
+            get_task_store(main_tasklist()).sync(force=True)
+        raise ValueError(_edit_error(e, "task")) from e
+    _write_through_task(updated_task)
 
-        # Update with new fields
-        task.update(update_payload)
+    return updated_task
+
+@tool
+def edit_multiple_tasks(edits: List[dict]) -> List[dict]:
+    """
+    Edits several tasks in one go. Get the task ids first.
 
-        # Push the update
-        updated_task = service.tasks().update(tasklist=TASKLIST_ID, task=task_id, body=task).execute()
-        return updated_task
+    Each edit must include task_id and update_payload (fields to change, e.g. {"status": "completed"}).
 
-    except Exception as e:
-        print("Error updating task:", e)
-        return None
+    Returns:
+        List[dict]: For each edit, in order, the updated task in the same shape as get_tasks, or {"error", "task_id"}.
+    """
+    service = tasks_service(get_creds())
+    store = get_task_store(main_tasklist()) if USE_TASK_MIRROR else None
+    results = [None] * len(edits)
+
+    requests, positions = [], []
+    for i, edit in enumerate(edits):
+        task_id, payload = edit.get("task_id"), edit.get("update_payload")
+        if not task_id or not payload:
+            results[i] = {"error": "task_id and update_payload are required", "task_id": task_id}
+            continue
+        request = service.tasks().patch(tasklist=main_tasklist(), task=task_id, body=payload)
+        requests.append(_if_match(request, store.get(task_id) if store else None))
+        positions.append(i)
+
+    for i, (updated, error) in zip(positions, execute_batch(service, requests)):
+        if error is None:
+            _write_through_task(updated)
+            results[i] = compact_task(updated)
+        else:
+            results[i] = {"error": _edit_error(error, "task"), "task_id": edits[i]["task_id"]}
+    return results
 
 @tool   
-def get_tasks_by_name(name='', top_n=5,score_cutoff=50):
+def get_tasks_by_name(name='', top_n=5,score_cutoff=50, verbose: bool = False):
     """
     Performs fuzzy search for tasks by title.
 
@@ -484,33 +1035,18 @@ def get_tasks_by_name(name='', top_n=5,score_cutoff=50):
         name (str): Search query for task title.
         top_n (int, optional): Maximum number of results to return.
         score_cutoff (int, optional): Minimum fuzzy match score (0-100).
+        verbose (bool, optional): Return full task resources instead of the compact view.
 
     Returns:
-        A list of matched task dicts (with title and id) sorted by similarity.
+        A list of matched tasks, in the same shape as get_tasks, sorted by similarity.
     """
-    creds = get_creds()
-    service = build('tasks', 'v1', credentials=creds)
-
     try:
-        result = service.tasks().list(tasklist=TASKLIST_ID).execute()
-        tasks = result.get('items', [])
-
-        if not tasks:
-            return []
-
-        matches = []
-
-        for task in tasks:
-            title = task.get("title", "")
-            score = fuzz.partial_ratio(name.lower(), title.lower())  # partial = "contains-like"
-            if score >= score_cutoff:
-                matches.append((score, task))
-
-        # Sort by match score descending
-        matches.sort(reverse=True, key=lambda x: x[0])
-        return [event for score, event in matches[:top_n]]
+        if USE_TASK_MIRROR:
+            tasks = get_task_store(main_tasklist()).search(name, top_n, score_cutoff)
+        else:
+            tasks = _fuzzy_match(_list_tasks(verbose), "title", name, top_n, score_cutoff)
+        return tasks if verbose else [compact_task(task) for task in tasks]
 
     except Exception as e:
         print("Error in fuzzy_search_tasks:", e)
         return []
-